@@ -234,6 +234,33 @@ const languageOptions = [
   { value: "zh", label: "중국어" },
 ];
 
+const SUBTITLE_WINDOW_SECONDS = 300; // 한 번에 가져오는 자막 구간 (5분)
+const SUBTITLE_LOOKAHEAD_SECONDS = 60; // 재생 위치 뒤로 이만큼이 없으면 다음 구간을 가져옴
+
+// id로 중복을 빼고 시작 시각 순으로 합침
+const mergeSubtitles = (existing: Subtitle[], added: Subtitle[]) => {
+  const seen = new Set(existing.map((sub) => sub.id));
+  return [...existing, ...added.filter((sub) => !seen.has(sub.id))].sort(
+    (a, b) => a.startTime - b.startTime
+  );
+};
+
+// 가져온 구간 목록에 [from, to)를 더하고 겹치거나 맞닿은 구간을 합침
+const addRange = (ranges: Array<[number, number]>, from: number, to: number) => {
+  const merged: Array<[number, number]> = [];
+  for (const [a, b] of [...ranges, [from, to] as [number, number]].sort(
+    (x, y) => x[0] - y[0]
+  )) {
+    const last = merged[merged.length - 1];
+    if (last && a <= last[1]) {
+      last[1] = Math.max(last[1], b);
+    } else {
+      merged.push([a, b]);
+    }
+  }
+  return merged;
+};
+
 const VideoDetail: React.FC = () => {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
@@ -251,6 +278,57 @@ const VideoDetail: React.FC = () => {
   const [translationProgress, setTranslationProgress] = useState(0);
   const [currentSubtitleIndex, setCurrentSubtitleIndex] = useState(0);
   const [isPlaying, setIsPlaying] = useState(false);
+  const [queue, setQueue] = useState<{ position: number; queued: number }>({
+    position: 0,
+    queued: 0,
+  });
+  // 원본 자막은 재생 위치 주변 구간만 가져옴 (이미 가져온 구간, 가져오는 중 여부)
+  const loadedRangesRef = useRef<Array<[number, number]>>([]);
+  const loadingRangeRef = useRef(false);
+
+  const fetchSubtitleRange = async (
+    from: number,
+    to?: number
+  ): Promise<Subtitle[]> => {
+    const params = new URLSearchParams({ from: String(from) });
+    if (to !== undefined) params.set("to", String(to));
+    const response = await fetch(
+      `http://127.0.0.1:8081/api/videos/${id}/subtitles?${params}`
+    );
+    // 아직 자막이 저장되지 않은 비디오 (처리 중)
+    if (response.status === 404) return [];
+    if (!response.ok) {
+      throw new Error("Failed to fetch subtitles");
+    }
+    const data = await response.json();
+    return data.subtitles || [];
+  };
+
+  const ensureSubtitleWindow = async (time: number) => {
+    if (!id || loadingRangeRef.current) return;
+    const from = Math.max(0, Math.floor(time));
+    const covering = loadedRangesRef.current.find(
+      ([a, b]) => a <= from && from < b
+    );
+    if (covering && covering[1] >= from + SUBTITLE_LOOKAHEAD_SECONDS) return;
+    // 가져온 구간 안이면 그 끝에서 이어서 가져옴
+    const start = covering ? covering[1] : from;
+    const end = start + SUBTITLE_WINDOW_SECONDS;
+    loadingRangeRef.current = true;
+    try {
+      const subtitles = await fetchSubtitleRange(start, end);
+      loadedRangesRef.current = addRange(loadedRangesRef.current, start, end);
+      setVideo((prev) =>
+        prev
+          ? { ...prev, subtitles: mergeSubtitles(prev.subtitles || [], subtitles) }
+          : prev
+      );
+    } catch (error) {
+      console.error("Error fetching subtitles:", error);
+    } finally {
+      loadingRangeRef.current = false;
+    }
+  };
 
   // API 키 확인을 위한 디버깅 로그 추가
   useEffect(() => {
@@ -295,7 +373,7 @@ const VideoDetail: React.FC = () => {
   };
 
   const handleTranslate = async (force = false) => {
-    if (!video?.subtitles || !video.detected_language) {
+    if (!video || !video.detected_language) {
       return;
     }
     if (selectedLanguage === "original") {
@@ -326,7 +404,8 @@ const VideoDetail: React.FC = () => {
         }
       }
 
-      // 2. 백엔드에서 한 번에 번역 수행
+      // 2. 백엔드에서 한 번에 번역 수행 (화면에는 일부 구간만 있으므로 전체 자막을 가져옴)
+      const subtitles = await fetchSubtitleRange(0);
       const response = await fetch(
         `http://127.0.0.1:8081/api/translate-subtitles`,
         {
@@ -335,7 +414,7 @@ const VideoDetail: React.FC = () => {
             "Content-Type": "application/json",
           },
           body: JSON.stringify({
-            subtitles: video.subtitles,
+            subtitles,
             target_lang: selectedLanguage,
             source_lang: video.detected_language,
           }),
@@ -377,12 +456,18 @@ const VideoDetail: React.FC = () => {
       if (!id) return; // id가 없는 경우 early return
 
       try {
-        const response = await fetch(`http://127.0.0.1:8081/api/videos/${id}`);
+        // 메타데이터만 받고 자막은 재생 위치에 맞춰 구간별로 가져옴
+        const response = await fetch(
+          `http://127.0.0.1:8081/api/videos/${id}?subtitles=false`
+        );
         if (!response.ok) {
           throw new Error("Failed to fetch video");
         }
         const data = await response.json();
-        setVideo(data);
+        setVideo((prev) => ({
+          ...data,
+          subtitles: prev && prev.id === data.id ? prev.subtitles : [],
+        }));
         setError(null);
       } catch (error) {
         console.error("Error fetching video:", error);
@@ -392,13 +477,73 @@ const VideoDetail: React.FC = () => {
       }
     };
 
-    fetchVideo();
-    const interval = setInterval(fetchVideo, 5000);
-    return () => clearInterval(interval);
+    // 폴링 대신 WebSocket으로 진행률과 새 자막(subtitle_delta)을 받음
+    let ws: WebSocket | null = null;
+    let closed = false;
+    let lastSeq = 0;
+    loadedRangesRef.current = [];
+
+    fetchVideo().then(() => {
+      if (closed) return;
+      ensureSubtitleWindow(0);
+      ws = new WebSocket("ws://127.0.0.1:8081/ws/progress");
+      ws.onopen = () => {
+        ws?.send(JSON.stringify({ type: "subscribe", videoId: id }));
+      };
+      ws.onmessage = (event) => {
+        try {
+          const message = JSON.parse(event.data);
+          if (message.type === "resync") {
+            // 서버 큐가 넘쳐 놓친 메시지가 있음: 다시 구독해 전체 자막 스냅샷을 받음 (id로 중복 제거)
+            lastSeq = 0;
+            fetchVideo();
+            ws?.send(JSON.stringify({ type: "subscribe", videoId: id }));
+            return;
+          }
+          if (message.videoId !== id) return;
+          if (message.type === "subtitle_delta") {
+            if (message.seq <= lastSeq) return;
+            lastSeq = message.seq;
+            setVideo((prev) =>
+              prev
+                ? {
+                    ...prev,
+                    subtitles: mergeSubtitles(
+                      prev.subtitles || [],
+                      message.subtitles as Subtitle[]
+                    ),
+                  }
+                : prev
+            );
+          } else if (message.type === "queue") {
+            // 처리 대기 순번 (0이면 처리가 시작됨)
+            setQueue({ position: message.position, queued: message.queued });
+          } else if (message.type === "progress") {
+            setVideo((prev) =>
+              prev ? { ...prev, progress: message.progress } : prev
+            );
+            if (message.progress >= 100) {
+              // 처리 중에 비어 있던 구간도 저장된 자막으로 다시 가져옴
+              fetchVideo();
+              loadedRangesRef.current = [];
+              ensureSubtitleWindow(playerRef.current?.getCurrentTime() || 0);
+            }
+          }
+        } catch (error) {
+          console.error("Error processing WebSocket message:", error);
+        }
+      };
+    });
+
+    return () => {
+      closed = true;
+      ws?.close();
+    };
   }, [id]);
 
   const handleTimeUpdate = (state: { playedSeconds: number }) => {
     setCurrentTime(state.playedSeconds);
+    ensureSubtitleWindow(state.playedSeconds);
 
     // 현재 시간에 해당하는 자막 찾기
     const subtitles =
@@ -524,6 +669,11 @@ const VideoDetail: React.FC = () => {
       </VideoInfo>
 
       <SubtitleContainer>
+        {queue.position > 0 && (
+          <DetectedLanguage>
+            처리 대기 중: {queue.position}번째 (대기 {queue.queued}개)
+          </DetectedLanguage>
+        )}
         {video.detected_language && (
           <DetectedLanguage>
             감지된 언어: {video.detected_language}
@@ -175,6 +175,25 @@ const TranslationBadge = styled.span<{ lang: string }>`
   margin-left: 0.5rem;
 `;
 
+const LoadMoreButton = styled.button`
+  display: block;
+  margin: 2rem auto 0;
+  padding: 0.75rem 1.5rem;
+  background-color: white;
+  color: #007bff;
+  border: 1px solid #007bff;
+  border-radius: 4px;
+  font-size: 1rem;
+  cursor: pointer;
+  &:hover:not(:disabled) {
+    background-color: #f0f7ff;
+  }
+  &:disabled {
+    opacity: 0.6;
+    cursor: default;
+  }
+`;
+
 const BadgeContainer = styled.div`
   display: flex;
   flex-wrap: wrap;
@@ -210,8 +229,44 @@ interface VideoData {
   };
 }
 
+const PAGE_SIZE = 50;
+
+const normalizeVideo = (video: VideoData): VideoData => ({
+  ...video,
+  status: video.status || "pending",
+  progress: video.progress || 0,
+  subtitles: video.subtitles || [],
+  title: video.title || "Untitled Video",
+  duration: video.duration || "Unknown",
+  thumbnailUrl:
+    video.thumbnailUrl ||
+    "https://via.placeholder.com/300x180?text=No+Thumbnail",
+  targetLangs: video.targetLangs || [], // targetLangs 기본값 설정
+});
+
+const fetchPage = async (cursor?: string | null) => {
+  const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+  if (cursor) params.set("cursor", cursor);
+  const response = await fetch(`http://127.0.0.1:8081/api/videos?${params}`);
+  if (!response.ok) {
+    throw new Error("Failed to fetch videos");
+  }
+  const data = await response.json();
+  const items: VideoData[] = Array.isArray(data) ? data : data.items;
+  const nextCursor: string | null = Array.isArray(data)
+    ? null
+    : data.nextCursor || null;
+  return { items: items.map(normalizeVideo), nextCursor };
+};
+
 const VideoList: React.FC = () => {
+  // 첫 페이지는 주기적으로 새로고침하고, "더 보기"로 불러온 이후 페이지는 따로 보관
   const [videos, setVideos] = useState<VideoData[]>([]);
+  const [olderVideos, setOlderVideos] = useState<VideoData[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const hasOlderRef = useRef(false);
+  const firstPageRef = useRef<VideoData[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const navigate = useNavigate();
@@ -285,13 +340,14 @@ const VideoList: React.FC = () => {
             return;
           }
           if (data.type === "progress") {
-            setVideos((prevVideos) =>
+            const applyProgress = (prevVideos: VideoData[]) =>
               prevVideos.map((video) =>
                 video.id === data.videoId
                   ? { ...video, progress: data.progress, status: data.status }
                   : video
-              )
-            );
+              );
+            setVideos(applyProgress);
+            setOlderVideos(applyProgress);
           }
         } catch (error) {
           console.error("Error processing WebSocket message:", error);
@@ -374,26 +430,27 @@ const VideoList: React.FC = () => {
 
   const fetchVideos = async () => {
     try {
-      const response = await fetch("http://127.0.0.1:8081/api/videos");
-      if (!response.ok) {
-        throw new Error("Failed to fetch videos");
+      // 자막을 제외한 요약 목록의 첫 페이지 (ETag로 변경이 없으면 304)
+      const page = await fetchPage();
+      const firstIds = new Set(page.items.map((video) => video.id));
+      if (hasOlderRef.current) {
+        // 새 업로드로 첫 페이지에서 밀려난 항목은 이후 페이지 앞쪽으로 옮김
+        const pushedOut = firstPageRef.current.filter(
+          (video) => !firstIds.has(video.id)
+        );
+        if (pushedOut.length > 0) {
+          const pushedIds = new Set(pushedOut.map((video) => video.id));
+          setOlderVideos((older) => [
+            ...pushedOut,
+            ...older.filter((video) => !pushedIds.has(video.id)),
+          ]);
+        }
+      }
+      firstPageRef.current = page.items;
+      setVideos(page.items);
+      if (!hasOlderRef.current) {
+        setNextCursor(page.nextCursor);
       }
-      const data = await response.json();
-      console.log("Fetched video data:", data); // 데이터 확인용 로그
-      const processedVideos = data.map((video: VideoData) => ({
-        ...video,
-        status: video.status || "pending",
-        progress: video.progress || 0,
-        subtitles: video.subtitles || [],
-        title: video.title || "Untitled Video",
-        duration: video.duration || "Unknown",
-        thumbnailUrl:
-          video.thumbnailUrl ||
-          "https://via.placeholder.com/300x180?text=No+Thumbnail",
-        targetLangs: video.targetLangs || [], // targetLangs 기본값 설정
-      }));
-      console.log("Processed videos:", processedVideos); // 처리된 데이터 확인용 로그
-      setVideos(processedVideos);
       setError(null);
     } catch (error) {
       console.error("Error fetching videos:", error);
@@ -403,6 +460,27 @@ const VideoList: React.FC = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      hasOlderRef.current = true;
+      setOlderVideos((prev) => [
+        ...prev,
+        ...page.items.filter(
+          (video) => !prev.some((item) => item.id === video.id)
+        ),
+      ]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error fetching more videos:", error);
+      setError("비디오 목록을 불러오는데 실패했습니다.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     let mounted = true;
 
@@ -452,7 +530,11 @@ const VideoList: React.FC = () => {
         throw new Error("Failed to delete video");
       }
 
-      // 삭제 후 비디오 목록 새로고침
+      // 삭제 후 비디오 목록 새로고침 (이후 페이지에서도 제거)
+      setOlderVideos((prev) => prev.filter((video) => video.id !== videoId));
+      firstPageRef.current = firstPageRef.current.filter(
+        (video) => video.id !== videoId
+      );
       fetchVideos();
     } catch (error) {
       console.error("Error deleting video:", error);
@@ -504,6 +586,12 @@ const VideoList: React.FC = () => {
     return badges;
   };
 
+  const firstPageIds = new Set(videos.map((video) => video.id));
+  const allVideos = [
+    ...videos,
+    ...olderVideos.filter((video) => !firstPageIds.has(video.id)),
+  ];
+
   const calculateProgress = (video: VideoData) => {
     if (video.status === "completed") return 100;
     if (video.status === "failed") return 0;
@@ -537,14 +625,14 @@ const VideoList: React.FC = () => {
         <div style={{ color: "red", marginBottom: "1rem" }}>{error}</div>
       )}
 
-      {!loading && !error && videos.length === 0 && (
+      {!loading && !error && allVideos.length === 0 && (
         <div style={{ textAlign: "center", padding: "2rem" }}>
           등록된 비디오가 없습니다.
         </div>
       )}
 
       <VideoGrid>
-        {videos.map((video) => (
+        {allVideos.map((video) => (
           <VideoCard
             key={video.id}
             onClick={() => navigate(`/videos/${video.id}`)}
@@ -583,6 +671,12 @@ const VideoList: React.FC = () => {
           </VideoCard>
         ))}
       </VideoGrid>
+
+      {nextCursor && (
+        <LoadMoreButton onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? "불러오는 중..." : "더 보기"}
+        </LoadMoreButton>
+      )}
     </Container>
   );
 };
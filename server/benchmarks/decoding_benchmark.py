@@ -0,0 +1,77 @@
+"""디코딩 전략 벤치마크: beam 대비 speculative(greedy 우선)와 greedy의 속도와 WER.
+
+저장소에는 샘플 오디오가 없으므로 측정할 파일을 지정합니다. 정답 텍스트(--reference)가 없으면
+beam 결과를 기준으로 WER 차이를 계산합니다. 서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.decoding_benchmark sample.m4a --reference sample.txt --model small
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import numpy as np
+
+from services.audio_service import FfmpegAudioSource
+from services.transcription_service import SAMPLE_RATE, DecodingConfig, decoding_stats, transcribe_audio
+from services.model_service import get_model
+
+def _words(text: str):
+    return re.findall(r"\w+", text.lower())
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """단어 단위 편집 거리 / 정답 단어 수."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+async def load_audio(path: str) -> np.ndarray:
+    source = FfmpegAudioSource(path)
+    return np.concatenate([block async for block in source.blocks()])
+
+async def run(args):
+    audio = await load_audio(args.audio)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    await asyncio.to_thread(get_model, args.model)  # 로드 시간 제외
+    outputs, results = {}, []
+    for strategy in args.strategies.split(","):
+        decoding_stats.update(windows=0, fallbacks=0)
+        config = DecodingConfig(strategy=strategy)
+        started = time.perf_counter()
+        subtitles = await transcribe_audio(audio, SAMPLE_RATE, args.model, config) or []
+        wall = time.perf_counter() - started
+        outputs[strategy] = " ".join(sub.text for sub in subtitles)
+        results.append({
+            "strategy": strategy,
+            "wallSeconds": round(wall, 2),
+            "realTimeFactor": round(wall / audio_seconds, 3),
+            "fallbackWindows": decoding_stats["fallbacks"],
+            "greedyWindows": decoding_stats["windows"],
+        })
+    reference = open(args.reference, encoding="utf-8").read() if args.reference else outputs.get("beam")
+    baseline = next((r for r in results if r["strategy"] == "beam"), results[0])
+    for result in results:
+        result["speedup"] = round(baseline["wallSeconds"] / result["wallSeconds"], 2)
+        if reference is not None:
+            result["wer"] = round(word_error_rate(reference, outputs[result["strategy"]]), 4)
+    return {"audioSeconds": round(audio_seconds, 1), "model": args.model,
+            "werReference": "file" if args.reference else "beam", "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("audio")
+    parser.add_argument("--reference", help="정답 텍스트 파일")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--strategies", default="beam,speculative,greedy")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
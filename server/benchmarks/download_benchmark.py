@@ -0,0 +1,136 @@
+"""다운로드 단계 벤치마크: 로컬 HTTP 서버가 제공하는 미디어 파일로 메타데이터 조회, 포맷 선택,
+구간 동시 다운로드 + ffmpeg 파이프 디코딩을 실행합니다 (외부 네트워크 없음).
+
+파일을 지정하지 않으면 ffmpeg로 합성 Opus/WebM 픽스처를 만듭니다. --no-range 로 구간 요청을
+지원하지 않는 서버를, --rate-kbps 로 느린 연결을 흉내 냅니다. 서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.download_benchmark --seconds 600 --concurrency 1,4,8
+    python -m benchmarks.download_benchmark sample.webm --rate-kbps 4000
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from services.audio_service import SAMPLE_RATE
+from services.download_service import DownloadAudioSource, fetch_metadata, select_audio_format
+
+def make_fixture(seconds: float, directory: str) -> str:
+    path = os.path.join(directory, "fixture.webm")
+    subprocess.run([
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+        "-ac", "2", "-ar", "48000", "-c:a", "libopus", "-b:a", "64k", path,
+    ], check=True)
+    return path
+
+def serve(directory: str, ranges: bool, rate_kbps: float) -> ThreadingHTTPServer:
+    """단일 구간 요청(bytes=a-b)을 지원하는 정적 파일 서버를 백그라운드 스레드로 띄웁니다."""
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def log_message(self, *args):
+            pass
+
+        def guess_type(self, path):
+            return "audio/webm" if path.endswith(".webm") else super().guess_type(path)
+
+        def send_head(self):
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if not ranges or not match:
+                return super().send_head()
+            path = self.translate_path(self.path)
+            size = os.path.getsize(path)
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+            f = open(path, "rb")
+            f.seek(start)
+            self.send_response(206)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            self._remaining = end - start + 1
+            return f
+
+        def copyfile(self, source, outputfile):
+            remaining = getattr(self, "_remaining", None)
+            while remaining is None or remaining > 0:
+                data = source.read(64 * 1024 if remaining is None else min(64 * 1024, remaining))
+                if not data:
+                    break
+                outputfile.write(data)
+                if remaining is not None:
+                    remaining -= len(data)
+                if rate_kbps:
+                    time.sleep(len(data) * 8 / 1000 / rate_kbps)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def run_once(info: dict, concurrency: int, chunk_bytes: int) -> dict:
+    fmt = select_audio_format(info)
+    events = []
+    source = DownloadAudioSource(fmt, lambda done, total: events.append((time.perf_counter(), done, total)),
+                                 concurrency, chunk_bytes)
+    started = time.perf_counter()
+    first_block = None
+    samples = 0
+    async for block in source.blocks():
+        if first_block is None:
+            first_block = time.perf_counter() - started
+        samples += len(block)
+    wall = time.perf_counter() - started
+    downloaded = events[-1][1] if events else 0
+    return {
+        "concurrency": concurrency,
+        "format": fmt.get("format_id"),
+        "wallSeconds": round(wall, 2),
+        "firstBlockSeconds": round(first_block or 0, 3),
+        "downloadedBytes": downloaded,
+        "megabytesPerSecond": round(downloaded / wall / 1024 ** 2, 2),
+        "progressEvents": len(events),
+        "decodedSeconds": round(samples / SAMPLE_RATE, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("media", nargs="?", help="제공할 미디어 파일 (없으면 합성 픽스처)")
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--concurrency", default="1,4")
+    parser.add_argument("--chunk-kb", type=int, default=512)
+    parser.add_argument("--rate-kbps", type=float, default=0, help="연결당 전송 속도 제한 (0 = 제한 없음)")
+    parser.add_argument("--no-range", action="store_true", help="구간 요청을 지원하지 않는 서버로 동작")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.media:
+            media = os.path.abspath(args.media)
+            os.symlink(media, os.path.join(directory, os.path.basename(media)))
+            name = os.path.basename(media)
+        else:
+            name = os.path.basename(make_fixture(args.seconds, directory))
+        server = serve(directory, not args.no_range, args.rate_kbps)
+        url = f"http://127.0.0.1:{server.server_address[1]}/{name}"
+        try:
+            info = fetch_metadata(url)
+
+            async def run_all():
+                return [await run_once(info, int(n), args.chunk_kb * 1024) for n in args.concurrency.split(",")]
+
+            results = asyncio.run(run_all())
+        finally:
+            server.shutdown()
+    print(json.dumps({"url": url, "ranges": not args.no_range, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
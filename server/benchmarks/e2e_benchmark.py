@@ -0,0 +1,338 @@
+"""엔드투엔드 벤치마크: 합성 발화/무음 WAV 픽스처와 로컬 대체 서비스로 파이프라인 전체와 단계별 성능을 잽니다.
+
+외부 서비스는 모두 로컬 대체로 바꿉니다.
+- 다운로드(yt-dlp): 픽스처 WAV를 읽어 16kHz mono로 내보내는 소스
+- Firestore: 인메모리 저장소 (LIVESUB_STORE=memory)
+- 번역 API: 지정한 지연 후 접두어를 붙여 돌려주는 백엔드 (set_backend)
+캐시, 산출물, 번역 메모리는 임시 디렉터리를 사용하므로 실행 간에 서로 영향을 주지 않습니다.
+
+결과(처리량, 지연 백분위수, 단계별 최대 RSS)는 JSON으로 출력하므로 커밋 간 비교에 쓸 수 있습니다.
+Whisper가 필요한 단계(transcribe_audio, process_video)는 모델을 내려받습니다. 서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.e2e_benchmark --seconds 30,300 --rates 16000:1,48000:2 --output e2e.json
+    python -m benchmarks.e2e_benchmark --stages vad,translate,serialize
+    python -m benchmarks.e2e_benchmark --fixture-dir recordings/ --stages process_video
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from datetime import datetime
+import numpy as np
+
+STAGES = ["vad", "transcribe", "translate", "serialize", "process_video"]
+BLOCK_SECONDS = 10
+
+def synthetic_speech(seconds: float, sample_rate: int, channels: int = 1, seed: int = 0) -> np.ndarray:
+    """발화(피치가 변하는 배음 + 포먼트 대역 잡음)와 무음이 무작위 길이로 번갈아 나오는 int16 오디오."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    out = np.zeros(n, dtype=np.float32)
+    position = int(rng.uniform(0.2, 1.0) * sample_rate)
+    while position < n:
+        length = min(int(rng.uniform(0.5, 3.0) * sample_rate), n - position)
+        t = np.arange(length, dtype=np.float32) / sample_rate
+        pitch = rng.uniform(90, 220) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(1, 4) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+        syllables = 0.5 * (1 - np.cos(2 * np.pi * rng.uniform(3, 6) * t))  # 음절 단위 포락선
+        noise = rng.standard_normal(length).astype(np.float32)
+        out[position:position + length] = 0.25 * syllables * (voiced + 0.2 * noise)
+        position += length + int(rng.uniform(0.3, 1.5) * sample_rate)
+    out += 0.003 * rng.standard_normal(n).astype(np.float32)  # 배경 잡음
+    pcm = (np.clip(out, -1, 1) * 32767).astype(np.int16)
+    return np.repeat(pcm[:, None], channels, axis=1) if channels > 1 else pcm[:, None]
+
+def write_wav(path: str, pcm: np.ndarray, sample_rate: int):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(pcm.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(np.ascontiguousarray(pcm).tobytes())
+
+def read_wav(path: str):
+    """(int16 (samples, channels) 배열, 샘플레이트)."""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise SystemExit(f"Only 16-bit PCM WAV fixtures are supported: {path}")
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        return pcm.reshape(-1, wf.getnchannels()), wf.getframerate()
+
+def make_fixtures(directory: str, lengths, rates, seed: int):
+    fixtures = []
+    for seconds in lengths:
+        for rate, channels in rates:
+            path = os.path.join(directory, f"speech_{int(seconds)}s_{rate}hz_{channels}ch.wav")
+            write_wav(path, synthetic_speech(seconds, rate, channels, seed), rate)
+            fixtures.append(path)
+    return fixtures
+
+class RssSampler:
+    """구간 동안 /proc/self/statm을 주기적으로 읽어 최대 RSS를 잽니다 (없으면 ru_maxrss)."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._proc = os.path.exists("/proc/self/statm")
+
+    def _rss(self) -> int:
+        if self._proc:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page
+        # Linux는 KB, macOS는 바이트 단위
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    def __enter__(self):
+        self.peak = self._rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+def percentiles(values):
+    arr = np.asarray(values, dtype=np.float64) * 1000
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 2),
+        "p90": round(float(np.percentile(arr, 90)), 2),
+        "p99": round(float(np.percentile(arr, 99)), 2),
+        "max": round(float(arr.max()), 2),
+    }
+
+async def measure(name: str, fixture: str, repeat: int, fn, units: float, unit_name: str, **extra) -> dict:
+    """fn(run)을 repeat번 실행해 지연 백분위수(ms), 처리량(단위/초), 최대 RSS를 기록합니다."""
+    latencies = []
+    with RssSampler() as rss:
+        for run in range(repeat):
+            started = time.perf_counter()
+            result = fn(run)
+            if asyncio.iscoroutine(result):
+                result = await result
+            latencies.append(time.perf_counter() - started)
+    total = sum(latencies)
+    report = {
+        "case": name,
+        "fixture": os.path.basename(fixture) if fixture else None,
+        "runs": repeat,
+        "latencyMs": percentiles(latencies),
+        "throughput": {unit_name: round(units * repeat / total, 2) if total else None},
+        "peakRssMiB": round(rss.peak / 1024 ** 2, 1),
+        **extra,
+    }
+    print(f"{name:28s} {report['fixture'] or '':32s} p50={report['latencyMs']['p50']:10.2f}ms "
+          f"{unit_name}={report['throughput'][unit_name]}", file=sys.stderr)
+    return report
+
+def configure_environment(workdir: str):
+    """서비스 모듈을 가져오기 전에 로컬 대체와 임시 경로를 설정합니다."""
+    os.environ["LIVESUB_STORE"] = "memory"
+    os.environ["LIVESUB_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["LIVESUB_ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ["LIVESUB_TRANSLATION_MEMORY"] = os.path.join(workdir, "translation_memory.db")
+    os.environ["LIVESUB_JOB_DB"] = os.path.join(workdir, "jobs.db")  # 전사 체크포인트도 여기에 기록됨
+    os.environ.setdefault("LIVESUB_WARMUP_MODELS", "")
+
+def install_stand_ins(translation_latency: float):
+    """다운로더와 번역 API를 로컬 대체로 바꿉니다 (Firestore는 configure_environment에서 설정)."""
+    from services import video_service
+    from services.audio_service import SAMPLE_RATE, AudioPreprocessor
+    from services.translation_service import TranslationBackend, set_backend
+
+    class FixtureAudioSource:
+        """픽스처 WAV를 블록 단위로 읽어 ffmpeg 출력과 같은 16kHz mono float32로 내보냅니다."""
+
+        def __init__(self, path, on_progress=None):
+            self.path = path
+            self.on_progress = on_progress
+
+        async def blocks(self):
+            with wave.open(self.path, "rb") as wf:
+                rate, channels = wf.getframerate(), wf.getnchannels()
+                preprocessor = AudioPreprocessor(rate, SAMPLE_RATE)
+                total = wf.getnframes() * 2 * channels
+                read = 0
+                while True:
+                    data = wf.readframes(rate * BLOCK_SECONDS)
+                    if not data:
+                        break
+                    read += len(data)
+                    if self.on_progress:
+                        self.on_progress(read, total)
+                    yield preprocessor.process(np.frombuffer(data, dtype=np.int16).reshape(-1, channels))
+                    await asyncio.sleep(0)
+                tail = preprocessor.flush()
+                if len(tail):
+                    yield tail
+
+        def close(self):
+            pass
+
+    def fetch_metadata(url: str) -> dict:
+        # url 형식: fixture://<경로>#<실행 번호>
+        path, run = url[len("fixture://"):].rsplit("#", 1)
+        with wave.open(path, "rb") as wf:
+            duration = wf.getnframes() / wf.getframerate()
+        return {"id": f"{os.path.basename(path)}-{run}", "title": os.path.basename(path),
+                "duration": duration, "thumbnail": "", "_path": path}
+
+    async def open_download(video_id, info, on_progress=None):
+        return FixtureAudioSource(info["_path"], on_progress)
+
+    class LocalTranslationBackend(TranslationBackend):
+        async def translate(self, texts, target_language):
+            if translation_latency:
+                await asyncio.sleep(translation_latency)
+            return [f"[{target_language}] {text}" for text in texts]
+
+    video_service.fetch_metadata = fetch_metadata
+    video_service.open_download = open_download
+    set_backend(LocalTranslationBackend())
+
+def synthetic_subtitles(count: int, run: int):
+    from models.video import Subtitle
+
+    # 실행마다 다른 텍스트를 써서 번역 메모리 적중을 피함
+    return [Subtitle(id=str(i), startTime=i * 2.0, endTime=i * 2.0 + 1.8,
+                     text=f"run {run} line {i} lorem ipsum dolor sit amet") for i in range(count)]
+
+async def run_benchmarks(args, fixtures) -> list:
+    from models.video import Video
+    from services.transcription_service import SAMPLE_RATE, apply_vad, transcribe_audio
+    from services.translation_service import translate_subtitles
+    from services.video_service import process_video
+    from services.model_service import QUALITY_TIERS, get_model
+
+    results = []
+    stages = args.stages.split(",")
+    loaded = {path: read_wav(path) for path in fixtures}
+
+    if "vad" in stages:
+        for path, (pcm, rate) in loaded.items():
+            if rate != SAMPLE_RATE:
+                continue  # webrtcvad는 8/16/32/48kHz만 지원하므로 16kHz 픽스처에서만 측정
+            audio = pcm[:, 0].astype(np.float32) / 32768.0
+            seconds = len(audio) / rate
+            results.append(await measure("apply_vad", path, args.repeat,
+                                         lambda run: apply_vad(audio, rate), seconds, "audioSecondsPerSecond"))
+
+    if "transcribe" in stages or "process_video" in stages:
+        model_name = QUALITY_TIERS[args.quality]
+        started = time.perf_counter()
+        await asyncio.to_thread(get_model, model_name)
+        results.append({"case": "model_load", "model": model_name,
+                        "seconds": round(time.perf_counter() - started, 2)})
+
+    if "transcribe" in stages:
+        for path, (pcm, rate) in loaded.items():
+            seconds = len(pcm) / rate
+            results.append(await measure(
+                "transcribe_audio", path, args.repeat,
+                lambda run: transcribe_audio(pcm if pcm.shape[1] > 1 else pcm[:, 0], rate, model_name),
+                seconds, "audioSecondsPerSecond", model=model_name,
+            ))
+
+    if "translate" in stages:
+        for count in (100, 1000):
+            results.append(await measure(
+                f"translate_subtitles[{count}]", None, args.repeat,
+                lambda run: translate_subtitles(synthetic_subtitles(count, run), "ko"),
+                count, "subtitlesPerSecond", translationLatencyMs=args.translation_latency * 1000,
+            ))
+
+    if "serialize" in stages:
+        for count in (100, 5000):
+            video = Video(id="bench", title="bench", description="", youtubeUrl="", thumbnailUrl="",
+                          uploadDate=datetime.now(), duration="0", progress=100, status="completed",
+                          subtitles=synthetic_subtitles(count, 0))
+            results.append(await measure(f"Video.to_dict[{count}]", None, args.repeat * 10,
+                                         lambda run: video.to_dict(), 1, "callsPerSecond"))
+            payloads = [video.to_dict() for _ in range(args.repeat * 10)]  # from_dict가 입력을 바꾸므로 미리 준비
+            results.append(await measure(f"Video.from_dict[{count}]", None, args.repeat * 10,
+                                         lambda run: Video.from_dict(payloads[run]), 1, "callsPerSecond"))
+
+    if "process_video" in stages:
+        for path, (pcm, rate) in loaded.items():
+            seconds = len(pcm) / rate
+
+            async def run_pipeline(run, path=path):
+                video = await process_video(f"bench-{run}", f"fixture://{path}#{run}", ["ko"], quality=args.quality)
+                if video is None:
+                    raise RuntimeError(f"process_video failed for {path}")
+                return video
+
+            results.append(await measure("process_video", path, args.repeat, run_pipeline,
+                                         seconds, "audioSecondsPerSecond", model=model_name))
+            # 같은 영상 ID로 다시 요청: 전사 캐시 적중 경로
+            results.append(await measure(
+                "process_video[cached]", path, args.repeat,
+                lambda run, path=path: process_video(f"bench-cached-{run}", f"fixture://{path}#0", ["ko"], quality=args.quality),
+                seconds, "audioSecondsPerSecond", model=model_name,
+            ))
+    return results
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", default="30,300", help="합성 픽스처 길이 (초, 쉼표 구분)")
+    parser.add_argument("--rates", default="16000:1,44100:2,48000:2", help="샘플레이트:채널 수 (쉼표 구분)")
+    parser.add_argument("--fixture-dir", help="합성 대신 사용할 16-bit PCM WAV 디렉터리")
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quality", default="fast", help="Whisper 품질 등급 (fast | balanced | best)")
+    parser.add_argument("--translation-latency", type=float, default=0.05, help="번역 대체 API 요청당 지연 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON을 저장할 경로 (없으면 표준 출력)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="livesub-bench-") as workdir:
+        configure_environment(workdir)
+        if args.fixture_dir:
+            fixtures = sorted(os.path.join(args.fixture_dir, f) for f in os.listdir(args.fixture_dir) if f.endswith(".wav"))
+        else:
+            rates = [tuple(int(v) for v in item.split(":")) for item in args.rates.split(",")]
+            fixtures = make_fixtures(workdir, [float(s) for s in args.seconds.split(",")], rates, args.seed)
+        install_stand_ins(args.translation_latency)
+
+        # 단계별 풀의 세마포어가 이벤트 루프에 묶이므로 모든 측정을 한 루프에서 실행
+        results = asyncio.run(run_benchmarks(args, fixtures))
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.now().isoformat(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""추론 워커 수에 따른 처리량 벤치마크 (오디오 초 / 벽시계 초).
+
+워커 수마다 InferencePool을 새로 띄워 모델을 모든 워커에 미리 올린 뒤 (로드 시간 제외),
+같은 오디오를 transcribe_stream으로 처리하는 데 걸린 시간을 잽니다.
+서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.inference_scaling --wav sample.wav --workers 1,2,4,8 --model base
+    python -m benchmarks.inference_scaling --seconds 600 --workers 1,2,4
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import wave
+import numpy as np
+
+from benchmarks.vad_benchmark import synthetic_audio
+from services.inference_service import InferencePool, set_inference_pool
+from services.transcription_service import BLOCK_SECONDS, SAMPLE_RATE, _array_blocks, transcribe_stream
+
+def load_wav(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise SystemExit("16kHz mono 16-bit WAV required (ffmpeg -i in -ac 1 -ar 16000 out.wav)")
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+
+async def run_once(audio: np.ndarray, workers: int, threads: int, model_name: str) -> dict:
+    pool = InferencePool(workers, threads)
+    set_inference_pool(pool)
+    try:
+        started = time.perf_counter()
+        pids = await pool.warm_up(model_name)
+        load_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        subtitles = 0
+        async for batch, _ in transcribe_stream(_array_blocks(audio, SAMPLE_RATE * BLOCK_SECONDS), SAMPLE_RATE, model_name):
+            subtitles += len(batch)
+        wall = time.perf_counter() - started
+    finally:
+        set_inference_pool(None)
+        pool.shutdown()
+    audio_seconds = len(audio) / SAMPLE_RATE
+    return {
+        "workers": workers,
+        "torchThreads": pool.torch_threads,
+        "warmedWorkers": len(pids),
+        "loadSeconds": round(load_seconds, 2),
+        "wallSeconds": round(wall, 2),
+        "audioSecondsPerWallSecond": round(audio_seconds / wall, 2),
+        "subtitles": subtitles,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wav", help="16kHz mono WAV (없으면 합성 오디오 사용)")
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=0, help="워커당 torch 스레드 (0 = 코어 수 / 워커 수)")
+    parser.add_argument("--model", default="base")
+    args = parser.parse_args()
+
+    audio = load_wav(args.wav) if args.wav else synthetic_audio(args.seconds)
+    print(f"audio: {len(audio) / SAMPLE_RATE:.0f}s, cpus: {os.cpu_count()}, model: {args.model}")
+
+    async def run_all():
+        # 단계별 풀의 세마포어가 이벤트 루프에 묶이므로 모든 측정을 한 루프에서 실행
+        results = []
+        for workers in [int(n) for n in args.workers.split(",")]:
+            result = await run_once(audio, workers, args.threads, args.model)
+            results.append(result)
+            print(f"workers={workers:3d} threads={result['torchThreads']:3d}: "
+                  f"{result['audioSecondsPerWallSecond']:8.2f} audio-s/wall-s ({result['wallSeconds']:.1f}s)")
+        return results
+
+    print(json.dumps(asyncio.run(run_all()), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""실시간 전사 재생 하네스.
+
+WAV 파일을 실제 재생 속도로 /ws/live 에 보내고, 자막이 가리키는 오디오 끝 시점을 보낸 뒤
+해당 자막을 받기까지 걸린 시간(캡션 지연)의 백분위수를 출력합니다.
+서버를 먼저 띄운 뒤 서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.live_replay sample.wav --url ws://127.0.0.1:8081/ws/live
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import time
+import wave
+import numpy as np
+
+def _percentiles(values):
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values) * 1000
+    return {
+        "count": len(values),
+        "p50": round(float(np.percentile(arr, 50)), 1),
+        "p90": round(float(np.percentile(arr, 90)), 1),
+        "p99": round(float(np.percentile(arr, 99)), 1),
+        "max": round(float(arr.max()), 1),
+    }
+
+async def replay(path: str, url: str, chunk_ms: int, speed: float, language):
+    import websockets
+
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise SystemExit("Only 16-bit PCM WAV files are supported")
+        sample_rate = wf.getframerate()
+        channels = wf.getnchannels()
+        frames = wf.readframes(wf.getnframes())
+    frame_bytes = 2 * channels
+    chunk_bytes = int(sample_rate * chunk_ms / 1000) * frame_bytes
+
+    sent_seconds, sent_at = [], []  # 보낸 오디오 끝 위치(초)와 보낸 시각
+    latencies = {"partial": [], "final": []}
+    finals = []
+    stats = {}
+
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({
+            "type": "start",
+            "encoding": "pcm_s16le",
+            "sampleRate": sample_rate,
+            "channels": channels,
+            "language": language,
+        }))
+        ready = json.loads(await ws.recv())
+        print(f"session: {ready.get('session')}")
+
+        async def send_audio():
+            started = time.monotonic()
+            for offset in range(0, len(frames), chunk_bytes):
+                chunk = frames[offset:offset + chunk_bytes]
+                position = (offset + len(chunk)) / frame_bytes / sample_rate
+                # 실제 재생 속도에 맞춰 보냄
+                delay = started + position / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await ws.send(chunk)
+                sent_seconds.append(position)
+                sent_at.append(time.monotonic())
+            await ws.send(json.dumps({"type": "stop"}))
+
+        async def receive_captions():
+            async for raw in ws:
+                message = json.loads(raw)
+                kind = message.get("type")
+                if kind in latencies:
+                    received = time.monotonic()
+                    i = bisect.bisect_left(sent_seconds, message["endTime"] - 1e-6)
+                    if i < len(sent_at):
+                        latencies[kind].append(received - sent_at[i])
+                    if kind == "final":
+                        finals.append(message)
+                        print(f"[{message['startTime']:7.2f} - {message['endTime']:7.2f}] {message['text']}")
+                elif kind == "stats":
+                    stats.update(message)
+                    return
+
+        await asyncio.gather(send_audio(), receive_captions())
+
+    return {
+        "audioSeconds": len(frames) / frame_bytes / sample_rate,
+        "captions": len(finals),
+        "partialLatencyMs": _percentiles(latencies["partial"]),
+        "finalLatencyMs": _percentiles(latencies["final"]),
+        "server": stats,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("wav")
+    parser.add_argument("--url", default="ws://127.0.0.1:8081/ws/live")
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--speed", type=float, default=1.0, help="1.0 = 실시간")
+    parser.add_argument("--language", default=None)
+    args = parser.parse_args()
+    report = asyncio.run(replay(args.wav, args.url, args.chunk_ms, args.speed, args.language))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""오디오 전처리 벤치마크: 기존 경로(전체 배열 다운믹스/정규화 + librosa kaiser_best)와
+블록 단위 AudioPreprocessor(폴리페이즈 리샘플)의 처리량과 최대 메모리.
+
+기본 입력은 합성한 1시간 48kHz 스테레오 int16 오디오입니다. librosa나 scipy가 없으면 해당 경로는 건너뜁니다.
+서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.preprocess_benchmark --seconds 3600 --rate 48000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+import numpy as np
+
+from services.audio_service import AudioPreprocessor
+from services.transcription_service import BLOCK_SECONDS, NOISE_GATE, SAMPLE_RATE
+
+def synthetic_stereo(seconds: float, rate: int) -> np.ndarray:
+    """음성 대역 톤과 잡음을 섞은 (samples, 2) int16 오디오."""
+    rng = np.random.default_rng(0)
+    frames = int(seconds * rate)
+    out = np.empty((frames, 2), dtype=np.int16)
+    step = rate * 60
+    for start in range(0, frames, step):
+        t = np.arange(start, min(start + step, frames)) / rate
+        tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)
+        noise = 0.02 * rng.standard_normal(len(t))
+        out[start:start + len(t), 0] = ((tone + noise) * 32767).astype(np.int16)
+        out[start:start + len(t), 1] = ((0.8 * tone + noise) * 32767).astype(np.int16)
+    return out
+
+def legacy_path(audio: np.ndarray, rate: int) -> np.ndarray:
+    """이전 transcribe_audio와 같은 순서: 전체 배열 다운믹스 → 정규화 → librosa 리샘플 → 블록 전처리."""
+    import librosa
+
+    mono = audio.mean(axis=1).astype(np.float32) / 32768.0
+    if np.max(np.abs(mono)) > 1.0:
+        mono = mono / np.max(np.abs(mono))
+    mono = librosa.resample(mono, orig_sr=rate, target_sr=SAMPLE_RATE, res_type="kaiser_best")
+    block = SAMPLE_RATE * BLOCK_SECONDS
+    parts = []
+    for start in range(0, len(mono), block):
+        part = mono[start:start + block] - np.mean(mono[start:start + block])
+        part[np.abs(part) < NOISE_GATE] = 0
+        parts.append(part)
+    return np.concatenate(parts)
+
+def scipy_path(audio: np.ndarray, rate: int) -> np.ndarray:
+    """참고용: 전체 배열을 scipy.signal.resample_poly로 한 번에 리샘플."""
+    from math import gcd
+    from scipy.signal import resample_poly
+
+    g = gcd(rate, SAMPLE_RATE)
+    mono = audio.mean(axis=1, dtype=np.float32) / 32768.0
+    return resample_poly(mono, SAMPLE_RATE // g, rate // g).astype(np.float32)
+
+def fused_path(audio: np.ndarray, rate: int) -> np.ndarray:
+    """transcribe_stream과 같은 방식: 원본 블록을 AudioPreprocessor에 차례로 넣음."""
+    preprocessor = AudioPreprocessor(rate, SAMPLE_RATE, NOISE_GATE)
+    block = rate * BLOCK_SECONDS
+    parts = [preprocessor.process(audio[start:start + block]) for start in range(0, len(audio), block)]
+    parts.append(preprocessor.flush())
+    return np.concatenate(parts)
+
+def measure(name, fn, audio, rate):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        out = fn(audio, rate)
+    except ImportError as e:
+        tracemalloc.stop()
+        return {"path": name, "skipped": str(e)}
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seconds = len(audio) / rate
+    return {
+        "path": name,
+        "wallSeconds": round(wall, 2),
+        "audioSecondsPerWallSecond": round(seconds / wall, 1),
+        "peakMemoryMiB": round(peak / 1024 ** 2, 1),
+        "outputSamples": len(out),
+    }, out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3600)
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--paths", default="legacy,scipy,fused")
+    args = parser.parse_args()
+
+    audio = synthetic_stereo(args.seconds, args.rate)
+    print(f"input: {args.seconds:.0f}s {args.rate}Hz stereo int16 ({audio.nbytes / 1024 ** 2:.0f} MiB)")
+    paths = {"legacy": legacy_path, "scipy": scipy_path, "fused": fused_path}
+    results, outputs = [], {}
+    for name in args.paths.split(","):
+        result = measure(name, paths[name], audio, args.rate)
+        if isinstance(result, tuple):
+            result, outputs[name] = result
+        results.append(result)
+    # 리샘플 결과 차이 (노이즈 게이트 전 scipy 기준은 게이트 영향이 있어 참고용)
+    if "fused" in outputs:
+        for name in ("legacy", "scipy"):
+            if name in outputs:
+                n = min(len(outputs[name]), len(outputs["fused"]))
+                diff = outputs[name][:n] - outputs["fused"][:n]
+                results.append({"compare": f"fused-vs-{name}", "rmsDifference": float(np.sqrt(np.mean(diff ** 2)))})
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
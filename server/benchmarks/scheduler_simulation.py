@@ -0,0 +1,135 @@
+"""작업 스케줄러 시뮬레이션: 합성 작업 수천 개를 JobManager에 제출해 수락 제어와 SJF + aging을 확인합니다.
+
+실제 JobManager/JobQueue를 쓰고 처리 함수만 작업 비용에 비례해 잠드는 함수로 바꿉니다. 시간은
+--scale 배로 줄인 가상 시계(초 = 시뮬레이션 초)를 쓰므로 Retry-After와 aging도 시뮬레이션 초 단위입니다.
+거절된 클라이언트는 Retry-After만큼 기다렸다가 다시 제출합니다. 정책별로 짧은/긴 작업의 대기 시간,
+최대 대기 시간(기아 여부), 429 횟수와 대기 순번 알림 수를 비교합니다. 서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.scheduler_simulation --jobs 3000 --clients 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+
+from services.job_service import AdmissionRejected, JobManager, SQLiteJobStore
+
+POLICIES = {
+    "fifo": 1e9,  # aging이 비용을 압도하면 제출 순서대로 처리됨
+    "sjf": 0.0,
+    "sjf-aging": None,  # --aging-rate
+}
+SHORT_SECONDS = 600  # 이 길이 이하를 짧은 영상으로 집계
+
+def synthetic_jobs(count: int, clients: int, arrival_rate: float, seed: int = 0):
+    """(도착 시각, 클라이언트, 영상 길이) 목록. 길이는 짧은 클립 위주에 1~3시간 영상이 섞인 분포."""
+    rng = random.Random(seed)
+    jobs, t = [], 0.0
+    for i in range(count):
+        # 가끔 한 클라이언트가 여러 개를 한꺼번에 올리는 몰림
+        t += 0.0 if rng.random() < 0.2 else rng.expovariate(arrival_rate)
+        if rng.random() < 0.15:
+            duration = rng.uniform(3600, 3 * 3600)
+        else:
+            duration = min(rng.lognormvariate(5.5, 0.8), 3600)
+        jobs.append((t, f"client-{rng.randrange(clients)}", duration))
+    return jobs
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+async def simulate(policy: str, jobs, args) -> dict:
+    loop = asyncio.get_running_loop()
+    origin = loop.time()
+
+    def clock():
+        return (loop.time() - origin) / args.scale
+
+    submitted_at, started_at, finished_at = {}, {}, {}
+    messages = {"count": 0}
+
+    async def handler(video_id, youtube_url, target_langs, cost):
+        started_at[video_id] = clock()
+        await asyncio.sleep(cost * args.seconds_per_audio_second * args.scale)
+        finished_at[video_id] = clock()
+        return video_id
+
+    def on_position(video_id, position, queued):
+        messages["count"] += 1
+
+    aging_rate = POLICIES[policy] if POLICIES[policy] is not None else args.aging_rate
+    manager = JobManager(SQLiteJobStore(":memory:"), handler, max_concurrent=args.concurrency,
+                         max_active=args.max_active, max_per_client=args.max_per_client,
+                         aging_rate=aging_rate, on_position=on_position, clock=clock)
+    await manager.start()
+    rejections, retry_afters = 0, []
+    jitter = random.Random(args.seed)
+
+    async def client(index, arrival, client_id, duration):
+        nonlocal rejections
+        await asyncio.sleep(max(0.0, arrival * args.scale - (loop.time() - origin)))
+        video_id = f"video-{index}"
+        submitted_at[video_id] = clock()
+        while True:
+            try:
+                # 처리 함수에 비용을 넘기려고 options에 넣음 (실제 서버는 quality/decoding만 넣음)
+                await manager.submit(video_id, f"https://example.com/{index}", [], {"cost": duration},
+                                     cost=duration, client_id=client_id)
+                return
+            except AdmissionRejected as e:
+                rejections += 1
+                retry_afters.append(e.retry_after)
+                # 같은 시각에 몰리지 않도록 Retry-After에 흔들림을 더함
+                await asyncio.sleep(e.retry_after * jitter.uniform(1.0, 2.0) * args.scale)
+
+    await asyncio.gather(*(client(i, *job) for i, job in enumerate(jobs)))
+    while len(finished_at) < len(jobs):
+        await asyncio.sleep(0.05)
+    await manager.stop()
+
+    durations = {f"video-{i}": job[2] for i, job in enumerate(jobs)}
+    # 대기 시간 = 처음 제출(거절 포함)부터 처리 시작까지
+    waits = {video_id: started_at[video_id] - submitted_at[video_id] for video_id in started_at}
+    short = [w for video_id, w in waits.items() if durations[video_id] <= SHORT_SECONDS]
+    long = [w for video_id, w in waits.items() if durations[video_id] > SHORT_SECONDS]
+    return {
+        "policy": policy,
+        "agingRate": aging_rate,
+        "jobs": len(jobs),
+        "makespanSeconds": round(max(finished_at.values()), 0),
+        "shortWaitMean": round(statistics.mean(short), 1) if short else None,
+        "shortWaitP95": percentile(short, 0.95),
+        "longWaitMean": round(statistics.mean(long), 1) if long else None,
+        "longWaitP95": percentile(long, 0.95),
+        "maxWait": round(max(waits.values()), 1),
+        "rejections": rejections,
+        "retryAfterP50": percentile(retry_afters, 0.5),
+        "positionMessages": messages["count"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=3000)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--arrival-rate", type=float, default=0.008, help="초당 평균 제출 수 (시뮬레이션 초)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-active", type=int, default=64)
+    parser.add_argument("--max-per-client", type=int, default=4)
+    parser.add_argument("--aging-rate", type=float, default=0.05)
+    parser.add_argument("--seconds-per-audio-second", type=float, default=0.3, help="처리 시간 / 오디오 길이")
+    # 너무 작으면 이벤트 루프 지연이 처리 시간에 더해져 과부하가 부풀려짐
+    parser.add_argument("--scale", type=float, default=1e-4, help="실제 초 / 시뮬레이션 초")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policies", default="fifo,sjf,sjf-aging")
+    args = parser.parse_args()
+
+    jobs = synthetic_jobs(args.jobs, args.clients, args.arrival_rate, args.seed)
+    results = [asyncio.run(simulate(policy, jobs, args)) for policy in args.policies.split(",")]
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
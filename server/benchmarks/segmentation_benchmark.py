@@ -0,0 +1,83 @@
+"""자막 분할 벤치마크: 합성 단어 스트림을 Segmenter에 배치 단위로 넣어 처리 시간과 결과 자막 수를 잽니다.
+
+단어 수를 늘려 가며 단어당 처리 시간이 일정한지(선형 시간) 확인하고, 같은 단어를 Whisper 구간처럼
+묶었을 때의 줄 수, 읽기 속도(CPS) 초과 비율과 비교합니다. 배치 경계에서 앞 배치의 끝 단어를
+다시 넣어 중복 제거도 함께 확인합니다. 서버 디렉터리에서 실행합니다:
+
+    python -m benchmarks.segmentation_benchmark --words 10000,100000,1000000
+"""
+import argparse
+import json
+import random
+import time
+
+from services.segmentation_service import MAX_CPS, Segmenter
+
+VOCABULARY = ("the", "a", "video", "subtitle", "really", "going", "to", "we", "think", "about",
+              "this", "that", "people", "because", "actually", "right", "so", "and", "it's", "just")
+
+def synthetic_words(count: int, seed: int = 0):
+    """발화 속도와 쉼, 문장 끝이 섞인 (start, end, text) 단어 목록."""
+    rng = random.Random(seed)
+    words, t = [], 0.0
+    for i in range(count):
+        text = " " + rng.choice(VOCABULARY)
+        if rng.random() < 0.08:
+            text += rng.choice(".?,")
+        length = 0.12 + 0.05 * len(text)
+        words.append((t, t + length, text))
+        t += length + (rng.choice((0.8, 1.6)) if rng.random() < 0.05 else 0.04)
+    return words
+
+def whisper_like_segments(words, seed: int = 0):
+    """단어 3~12개씩 묶은 구간 (이전 동작: 길이가 들쭉날쭉한 Whisper 구간을 그대로 자막으로 씀)."""
+    rng = random.Random(seed)
+    segments, i = [], 0
+    while i < len(words):
+        chunk = words[i:i + rng.randint(3, 12)]
+        segments.append((chunk[0][0], chunk[-1][1], "".join(w[2] for w in chunk).strip()))
+        i += len(chunk)
+    return segments
+
+def cps_violations(cues) -> float:
+    fast = sum(1 for start, end, text in cues if len(text) / max(end - start, 1e-3) > MAX_CPS)
+    return fast / max(len(cues), 1)
+
+def run(words, batch_words: int, overlap: int):
+    segmenter = Segmenter()
+    cues = []
+    started = time.perf_counter()
+    for i in range(0, len(words), batch_words):
+        # 이전 배치 끝 단어를 다시 넣어 경계 중복을 흉내 냄
+        cues.extend(segmenter.push(words[max(i - overlap, 0):i + batch_words]))
+    cues.extend(segmenter.flush())
+    wall = time.perf_counter() - started
+    return cues, wall
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", default="10000,100000,1000000")
+    parser.add_argument("--batch-words", type=int, default=600, help="배치 하나(윈도우 8개)의 단어 수")
+    parser.add_argument("--overlap", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for count in (int(n) for n in args.words.split(",")):
+        words = synthetic_words(count)
+        cues, wall = run(words, args.batch_words, args.overlap)
+        text_out = " ".join(text for _, _, text in cues).split()
+        segments = whisper_like_segments(words)
+        results.append({
+            "words": count,
+            "wallSeconds": round(wall, 3),
+            "microsecondsPerWord": round(wall / count * 1e6, 2),
+            "subtitles": len(cues),
+            "whisperSegments": len(segments),
+            "cpsViolations": round(cps_violations(cues), 3),
+            "whisperCpsViolations": round(cps_violations(segments), 3),
+            "droppedOrDuplicatedWords": count - len(text_out),
+        })
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
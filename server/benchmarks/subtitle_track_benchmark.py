@@ -0,0 +1,91 @@
+"""자막 직렬화 벤치마크: Subtitle 객체 + to_dict 경로 대비 SubtitleTrack.
+
+서버 디렉터리에서 실행합니다:
+    python -m benchmarks.subtitle_track_benchmark --lines 20000
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from models.video import Subtitle
+from models.subtitle_track import SubtitleTrack
+
+def synthetic_columns(lines: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    durations = rng.uniform(1.0, 6.0, lines)
+    gaps = rng.uniform(0.0, 1.5, lines)
+    starts = np.cumsum(durations + gaps) - durations
+    words = ["안녕하세요", "오늘은", "자막", "테스트", "hello", "world", "subtitle", "라이브"]
+    texts = [" ".join(rng.choice(words, rng.integers(3, 12))) for _ in range(lines)]
+    ids = [str(i) for i in range(lines)]
+    return ids, starts.tolist(), (starts + durations).tolist(), texts
+
+def _bench(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def _peak_memory(fn) -> int:
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ids, starts, ends, texts = synthetic_columns(args.lines)
+    dicts = [{"id": i, "startTime": s, "endTime": e, "text": t} for i, s, e, t in zip(ids, starts, ends, texts)]
+    subtitles = [Subtitle.from_dict(dict(d)) for d in dicts]
+    track = SubtitleTrack.from_columns(ids, starts, ends, texts)
+
+    rows = [
+        ("build: Subtitle.from_dict", lambda: [Subtitle.from_dict(dict(d)) for d in dicts]),
+        ("build: SubtitleTrack", lambda: SubtitleTrack.from_columns(ids, starts, ends, texts)),
+        ("json: to_dict + json.dumps", lambda: json.dumps([s.to_dict() for s in subtitles], ensure_ascii=False).encode("utf-8")),
+        ("json: to_dicts + json.dumps", lambda: json.dumps(track.to_dicts(), ensure_ascii=False).encode("utf-8")),
+        ("json: SubtitleTrack.to_json", track.to_json),
+        ("range: list filter", lambda: [s for s in subtitles if s.endTime > 600 and s.startTime < 660]),
+        ("range: SubtitleTrack.time_range", lambda: track.time_range(600, 660)),
+        ("srt: SubtitleTrack.to_srt", track.to_srt),
+        ("vtt: SubtitleTrack.to_vtt", track.to_vtt),
+    ]
+    print(f"lines: {args.lines}")
+    for name, fn in rows:
+        elapsed, _ = _bench(fn, args.repeat)
+        print(f"{name:34s}: {elapsed * 1000:9.2f} ms  ({args.lines / elapsed:12.0f} lines/s)")
+
+    legacy_bytes = _peak_memory(lambda: [Subtitle.from_dict(dict(d)) for d in dicts])
+    track_bytes = _peak_memory(lambda: SubtitleTrack.from_columns(ids, starts, ends, texts))
+    print(f"resident: Subtitle list  ~{legacy_bytes / 1024:9.0f} KiB")
+    print(f"resident: SubtitleTrack  ~{track_bytes / 1024:9.0f} KiB")
+
+    legacy_json = json.loads(json.dumps([s.to_dict() for s in subtitles], ensure_ascii=False))
+    # 이스케이프가 필요한 문자열과 슬라이스(버퍼 일부만 쓰는 뷰)도 같은 결과인지 확인
+    escaped = ['따옴표 "인용"', "역슬래시 \\ 경로", "줄\n바꿈\t탭", "제어\x01문자", "plain"]
+    tricky = SubtitleTrack.from_columns([f'id"{i}' for i in range(len(escaped))], list(range(len(escaped))),
+                                        [i + 0.5 for i in range(len(escaped))], escaped)
+    checks = [
+        (track.to_json(), legacy_json),
+        (tricky.to_json(), tricky.to_dicts()),
+        (tricky.slice(1, 4).to_json(), tricky.to_dicts()[1:4]),
+        (track.slice(10, 20).to_json(), legacy_json[10:20]),
+        (SubtitleTrack.empty().to_json(), []),
+    ]
+    if any(json.loads(output) != expected for output, expected in checks):
+        print("JSON output mismatch", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
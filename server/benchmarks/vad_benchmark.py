@@ -0,0 +1,73 @@
+"""VAD 마이크로 벤치마크.
+
+서버 디렉터리에서 실행합니다:
+    python -m benchmarks.vad_benchmark --seconds 600
+"""
+import argparse
+import time
+import numpy as np
+import webrtcvad
+
+from services.vad_service import ENERGY_THRESHOLD, speech_mask, to_pcm16
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+def synthetic_audio(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """발화(변조된 톤+노이즈)와 무음이 번갈아 나오는 합성 오디오를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n, dtype=np.float32) / sample_rate
+    voiced = (np.sin(2 * np.pi * 2 * t) > 0.3).astype(np.float32)  # 약 2Hz로 켜졌다 꺼짐
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    noise = 0.05 * rng.standard_normal(n).astype(np.float32)
+    return ((tone + noise) * voiced).astype(np.float32)
+
+def legacy_mask(audio_array, sample_rate, frame_duration_ms=FRAME_MS):
+    """기존 방식: 호출마다 Vad 생성, bytes 슬라이스로 프레임 순회."""
+    vad = webrtcvad.Vad(3)
+    audio_pcm = (audio_array * 32767).astype(np.int16).tobytes()
+    frame_size = int(sample_rate * frame_duration_ms / 1000) * 2
+    mask = []
+    for i in range(0, len(audio_pcm), frame_size):
+        frame = audio_pcm[i:i + frame_size]
+        if len(frame) < frame_size:
+            break
+        mask.append(vad.is_speech(frame, sample_rate))
+    return np.array(mask, dtype=bool)
+
+def _bench(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    audio = synthetic_audio(args.seconds)
+    n_frames = int(len(audio) / (SAMPLE_RATE * FRAME_MS / 1000))
+
+    legacy_time, legacy = _bench(lambda: legacy_mask(audio, SAMPLE_RATE), args.repeat)
+    new_time, new = _bench(lambda: speech_mask(to_pcm16(audio), SAMPLE_RATE), args.repeat)
+    gated_time, gated = _bench(
+        lambda: speech_mask(to_pcm16(audio), SAMPLE_RATE, energy_threshold=ENERGY_THRESHOLD), args.repeat
+    )
+    rerun = speech_mask(to_pcm16(audio), SAMPLE_RATE)
+
+    print(f"audio: {args.seconds:.0f}s, frames: {n_frames}")
+    print(f"legacy            : {n_frames / legacy_time:12.0f} frames/s, speech {np.mean(legacy):.3f}")
+    print(f"vad_service       : {n_frames / new_time:12.0f} frames/s, speech {np.mean(new):.3f} (default)")
+    print(f"vad_service       : {n_frames / gated_time:12.0f} frames/s, speech {np.mean(gated):.3f} "
+          f"(energy prefilter {ENERGY_THRESHOLD})")
+    print(f"mask agreement    : {np.mean(legacy[:len(new)] == new):.4f} (default)")
+    print(f"mask agreement    : {np.mean(legacy[:len(gated)] == gated):.4f} (energy prefilter)")
+    print(f"rerun agreement   : {np.mean(rerun == new):.4f}")
+
+if __name__ == "__main__":
+    main()
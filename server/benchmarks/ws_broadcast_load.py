@@ -0,0 +1,114 @@
+"""WebSocket 브로드캐스트 부하 테스트.
+
+로컬 uvicorn(websocket_service만 마운트)을 별도 프로세스로 띄우고 모의 클라이언트를
+연결한 뒤, 서버가 보낸 진행률 메시지가 클라이언트에 도착하기까지의 지연을 측정합니다.
+서버 디렉터리에서 실행합니다 (파일 디스크립터 한도를 먼저 올려야 합니다):
+
+    ulimit -n 20000
+    python -m benchmarks.ws_broadcast_load --clients 5000
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+
+BENCH_VIDEO_ID = "bench"
+
+def build_app(interval: float, rounds: int):
+    from fastapi import FastAPI
+    from services.websocket_service import broadcast_progress, broadcaster, websocket_endpoint
+
+    app = FastAPI()
+    app.websocket("/ws/progress")(websocket_endpoint)
+
+    @app.post("/bench/start")
+    async def start():
+        async def run():
+            for i in range(rounds):
+                # 구독자 + 전체 토픽 클라이언트 모두에게 전송
+                broadcaster.publish(BENCH_VIDEO_ID, {
+                    "type": "bench",
+                    "videoId": BENCH_VIDEO_ID,
+                    "round": i,
+                    "sentAt": time.time(),
+                })
+                await broadcast_progress(BENCH_VIDEO_ID, i)
+                await asyncio.sleep(interval)
+        asyncio.create_task(run())
+        return {"connections": len(broadcaster.connections)}
+
+    return app
+
+def serve(port: int, interval: float, rounds: int):
+    import uvicorn
+    uvicorn.run(build_app(interval, rounds), host="127.0.0.1", port=port, log_level="warning")
+
+async def _client(url: str, subscribe: bool, rounds: int, latencies: list, ready: asyncio.Event, connected: list):
+    import websockets
+    async with websockets.connect(url, max_queue=None) as ws:
+        if subscribe:
+            await ws.send(json.dumps({"type": "subscribe", "videoId": BENCH_VIDEO_ID}))
+        connected.append(1)
+        await ready.wait()
+        received = 0
+        while received < rounds:
+            message = json.loads(await ws.recv())
+            if message.get("type") == "bench":
+                latencies.append(time.time() - message["sentAt"])
+                received += 1
+
+async def run_clients(port: int, clients: int, rounds: int, timeout: float):
+    import httpx
+    url = f"ws://127.0.0.1:{port}/ws/progress"
+    latencies, connected = [], []
+    ready = asyncio.Event()
+    tasks = [
+        asyncio.create_task(_client(url, i % 2 == 0, rounds, latencies, ready, connected))
+        for i in range(clients)
+    ]
+    while len(connected) < clients:
+        await asyncio.sleep(0.1)
+    ready.set()
+    async with httpx.AsyncClient() as http:
+        await http.post(f"http://127.0.0.1:{port}/bench/start")
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    return np.array(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--serve", action="store_true", help="서버 프로세스로 실행")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.interval, args.rounds)
+        return
+
+    server = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.ws_broadcast_load", "--serve",
+        "--port", str(args.port), "--interval", str(args.interval), "--rounds", str(args.rounds),
+    ])
+    try:
+        time.sleep(2)
+        latencies = asyncio.run(run_clients(args.port, args.clients, args.rounds, args.timeout))
+    finally:
+        server.terminate()
+        server.wait()
+
+    expected = args.clients * args.rounds
+    print(f"clients: {args.clients}, rounds: {args.rounds}, delivered: {len(latencies)}/{expected}")
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"latency ms  p50: {p50:.1f}  p95: {p95:.1f}  p99: {p99:.1f}  max: {latencies.max():.1f}")
+
+if __name__ == "__main__":
+    main()
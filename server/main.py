@@ -1,9 +1,8 @@
 import os
-from fastapi import FastAPI, WebSocket, UploadFile, File, WebSocketDisconnect, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, WebSocket, UploadFile, File, WebSocketDisconnect, HTTPException, BackgroundTasks, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from fastapi.websockets import WebSocketState
-import whisper
 import tempfile
 import wave
 import numpy as np
@@ -16,12 +15,13 @@ from pydantic import BaseModel
 from datetime import datetime
 import yt_dlp
 import uuid
-import torch
 from concurrent.futures import ThreadPoolExecutor
 import httpx
 import time
+import hashlib
 
 from models.video import Video, Subtitle
+from models.subtitle_track import SubtitleTrack
 from services.firebase_service import (
     get_video_from_firebase,
     save_video_to_firebase,
@@ -30,13 +30,44 @@ from services.firebase_service import (
     delete_video_from_firebase,
     get_cached_videos,
     update_video_cache,
+    list_video_summaries,
+    ensure_video_summaries,
+    get_subtitle_range,
+    ORIGINAL_LANGUAGE,
     db
 )
 from services.video_service import process_video
+from services.job_service import (
+    DEFAULT_JOB_COST,
+    AdmissionRejected,
+    JobManager,
+    SQLiteJobStore,
+    resolve_client_id,
+    run_in_stage,
+    stage_pools
+)
+from services.download_service import fetch_metadata
+from services.artifact_service import (
+    ARTIFACT_FORMATS,
+    artifact_path,
+    ensure_subtitle_artifacts,
+    invalidate_subtitle_artifacts,
+    negotiate_encoding,
+    parse_range
+)
+from services.cache_service import transcription_cache
+from services.model_service import QUALITY_TIERS, WARMUP_MODELS, model_manager
+from services.inference_service import get_inference_pool, shutdown_inference_pool
+from services.transcription_service import DecodingConfig
+from services.translation_service import close_translation_backend
+from services.live_service import live_transcription_endpoint
+from services.checkpoint_service import run_maintenance
+from services.metrics_service import CONTENT_TYPE as METRICS_CONTENT_TYPE, JOB_QUEUE_DEPTH, JOBS_RUNNING, render_metrics
 from services.websocket_service import (
     websocket_endpoint,
     broadcast_progress,
     connected_clients,
+    publish_queue_position,
     send_heartbeat
 )
 
@@ -61,35 +92,92 @@ app.add_middleware(
 # WebSocket 엔드포인트
 app.websocket("/ws")(websocket_endpoint)
 app.websocket("/ws/progress")(websocket_endpoint)
+app.websocket("/ws/live")(live_transcription_endpoint)
+
+# 비디오 처리 작업 관리자 (SQLite에 작업을 저장하고 짧은 작업부터 단계별 풀에서 실행)
+job_manager = JobManager(SQLiteJobStore(), process_video, on_position=publish_queue_position)
+JOB_QUEUE_DEPTH.set_function(job_manager.queue_depth)
+JOBS_RUNNING.set_function(job_manager.running_count)
+
+async def warm_up_inference_pool(pool):
+    """추론 워커마다 모델을 미리 올립니다 (첫 작업이 모델 로드를 기다리지 않도록)."""
+    for name in WARMUP_MODELS:
+        try:
+            pids = await pool.warm_up(name)
+            logger.info(f"Warmed up {name} in inference workers {pids}")
+        except Exception as e:
+            logger.error(f"추론 워커 모델 워밍업 실패 ({name}): {str(e)}")
 
 # 하트비트 태스크 시작
 @app.on_event("startup")
 async def startup_event():
     asyncio.create_task(send_heartbeat())
+    asyncio.create_task(ensure_video_summaries())
+    await job_manager.start()
+    # 중단된 작업 확인(체크포인트에서 재개), 남은 임시 파일과 오래된 체크포인트 정리
+    asyncio.create_task(run_maintenance(job_manager.active_video_ids))
+    # 모델은 처음 사용할 때 로드되며, 여기서는 백그라운드로 미리 올려 둠.
+    # 추론 워커 풀을 쓰면 전사는 워커에서만 하므로 API 프로세스 대신 워커에 올림
+    pool = get_inference_pool()
+    if pool is not None:
+        asyncio.create_task(warm_up_inference_pool(pool))
+    else:
+        asyncio.create_task(model_manager.warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_manager.stop()
+    await close_translation_backend()
+    shutdown_inference_pool()
+    stage_pools.shutdown()
 
 class VideoUploadRequest(BaseModel):
     youtubeUrl: str
     targetLangs: list[str]
+    quality: Optional[str] = None  # fast | balanced | best (없으면 오디오 길이로 결정)
+    decoding: Optional[DecodingConfig] = None  # 디코딩 전략과 품질 기준 (없으면 서버 기본값)
 
 # 비디오 업로드 엔드포인트
 @app.post("/api/videos")
-async def upload_video(
-    req: VideoUploadRequest,
-    background_tasks: BackgroundTasks
-):
+async def upload_video(req: VideoUploadRequest, request: Request):
+    if req.quality and req.quality not in QUALITY_TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown quality tier: {req.quality}")
+    # 프록시 뒤에서는 LIVESUB_TRUSTED_PROXIES를 설정해야 클라이언트별 상한이 프록시 하나로 묶이지 않음
+    client_id = resolve_client_id(request.client.host if request.client else None,
+                                  request.headers.get("x-forwarded-for"))
     try:
+        options = {"quality": req.quality} if req.quality else {}
+        if req.decoding:
+            options["decoding"] = req.decoding.model_dump(exclude_unset=True)
+        duplicate = job_manager.find_duplicate(client_id, req.youtubeUrl, req.targetLangs, options)
+        if duplicate:
+            return {"videoId": duplicate.video_id, "jobId": duplicate.id,
+                    "queuePosition": job_manager.queue_position(duplicate.id),
+                    "message": "Video is already being processed"}
+        # 메타데이터 조회 전에 상한부터 확인해 몰린 요청을 빠르게 거절
+        job_manager.check_admission(client_id)
+        try:
+            info = await run_in_stage("download", fetch_metadata, req.youtubeUrl)
+            cost = float(info.get('duration') or DEFAULT_JOB_COST)
+        except Exception as e:
+            # 처리 단계에서 다시 조회하며 오류도 그때 기록됨
+            logger.warning(f"Could not estimate job cost for {req.youtubeUrl}: {e}")
+            cost = DEFAULT_JOB_COST
         video_id = str(uuid.uuid4())
-        background_tasks.add_task(process_video, video_id, req.youtubeUrl, req.targetLangs)
-        return {"videoId": video_id, "message": "Video processing started"}
+        job = await job_manager.submit(video_id, req.youtubeUrl, req.targetLangs, options, cost, client_id)
+        return {"videoId": video_id, "jobId": job.id, "queuePosition": job_manager.queue_position(job.id),
+                "message": "Video processing started"}
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"비디오 업로드 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # 비디오 정보 가져오기 엔드포인트
 @app.get("/api/videos/{video_id}")
-async def get_video(video_id: str):
+async def get_video(video_id: str, include_subtitles: bool = Query(True, alias="subtitles")):
     try:
-        video = await get_video_from_firebase(video_id)
+        video = await get_video_from_firebase(video_id, include_subtitles=include_subtitles)
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         return video.to_dict()
@@ -97,12 +185,143 @@ async def get_video(video_id: str):
         logger.error(f"비디오 정보 가져오기 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# 캐시된 비디오 목록 가져오기 엔드포인트
+def _subtitle_response(meta: Dict[str, Any], track: SubtitleTrack) -> Response:
+    """메타데이터와 트랙 JSON을 이어 붙여 응답합니다 (자막 줄마다 dict를 만들지 않음)."""
+    head = json.dumps({**meta, "subtitles": None}, ensure_ascii=False)[:-len("null}")]
+    body = head.encode("utf-8") + track.to_json() + b"}"
+    return Response(content=body, media_type="application/json")
+
+SUBTITLE_FORMATS = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+}
+
+# 자막 구간 조회 엔드포인트 (재생 위치 주변만 가져옴)
+@app.get("/api/videos/{video_id}/subtitles")
+async def get_video_subtitles(
+    video_id: str,
+    start: float = Query(0.0, alias="from", ge=0),
+    end: Optional[float] = Query(None, alias="to", ge=0),
+    language: str = ORIGINAL_LANGUAGE
+):
+    track = await get_subtitle_range(video_id, start, end, language)
+    if track is None:
+        raise HTTPException(status_code=404, detail="Subtitles not found")
+    return _subtitle_response({"videoId": video_id, "language": language, "from": start, "to": end}, track)
+
+# 자막 전체 내보내기 엔드포인트 (format=json|msgpack|srt|vtt)
+@app.get("/api/videos/{video_id}/subtitles/export")
+async def export_video_subtitles(video_id: str, language: str = ORIGINAL_LANGUAGE, format: str = "json"):
+    if format not in SUBTITLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    track = await get_subtitle_range(video_id, language=language)
+    if track is None:
+        raise HTTPException(status_code=404, detail="Subtitles not found")
+    if format == "json":
+        return _subtitle_response({"videoId": video_id, "language": language}, track)
+    if format == "msgpack":
+        try:
+            content = track.to_msgpack()
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+    else:
+        content = track.to_srt() if format == "srt" else track.to_vtt()
+    return Response(content=content, media_type=SUBTITLE_FORMATS[format])
+
+ARTIFACT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+# 자막 파일 엔드포인트: 현재 버전의 불변 URL로 리디렉션 (<track src> 등에서 사용)
+@app.get("/api/videos/{video_id}/captions/{language}.{fmt}")
+async def get_caption_file(video_id: str, language: str, fmt: str):
+    if fmt not in ARTIFACT_FORMATS:
+        raise HTTPException(status_code=404, detail="Unsupported caption format")
+    try:
+        version = await ensure_subtitle_artifacts(video_id, language)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if version is None:
+        raise HTTPException(status_code=404, detail="Subtitles not found")
+    return RedirectResponse(
+        url=f"/api/videos/{video_id}/captions/{language}/{version}.{fmt}",
+        status_code=307,
+        headers={"Cache-Control": "public, max-age=60"}
+    )
+
+# 버전별 자막 파일 엔드포인트 (강한 ETag, immutable, 사전 압축, Range 지원)
+@app.get("/api/videos/{video_id}/captions/{language}/{version}.{fmt}")
+async def get_caption_artifact(request: Request, video_id: str, language: str, version: str, fmt: str):
+    if fmt not in ARTIFACT_FORMATS:
+        raise HTTPException(status_code=404, detail="Unsupported caption format")
+    try:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        path = artifact_path(video_id, language, version, fmt, encoding)
+        if encoding and not os.path.exists(path):
+            encoding = None
+            path = artifact_path(video_id, language, version, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Caption artifact not found")
+
+    etag = f'"{version}-{fmt}{"-" + encoding if encoding else ""}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": ARTIFACT_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    body = await run_in_stage("persist", _read_bytes, path)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, len(body))
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{len(body)}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            return Response(content=body[start:end + 1], status_code=206,
+                            media_type=ARTIFACT_FORMATS[fmt], headers=headers)
+    return Response(content=body, media_type=ARTIFACT_FORMATS[fmt], headers=headers)
+
+# 비디오 목록 엔드포인트 (요약 문서 기반 커서 페이지네이션, 자막 제외)
 @app.get("/api/videos")
-async def get_videos():
+async def get_videos(
+    request: Request,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None
+):
     try:
-        videos = await get_cached_videos()
-        return [video.to_dict() for video in videos]
+        page = await list_video_summaries(
+            limit=max(1, min(limit, 100)),
+            cursor=cursor,
+            status=status,
+            fields=fields.split(",") if fields else None
+        )
+        body = json.dumps(page, ensure_ascii=False).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"비디오 목록 가져오기 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,6 +333,7 @@ async def delete_video(video_id: str):
         success = await delete_video_from_firebase(video_id)
         if not success:
             raise HTTPException(status_code=404, detail="Video not found")
+        invalidate_subtitle_artifacts(video_id, delete=True)
         return {"message": "Video deleted successfully"}
     except Exception as e:
         logger.error(f"비디오 삭제 중 오류 발생: {str(e)}")
@@ -123,14 +343,44 @@ async def delete_video(video_id: str):
 @app.get("/api/videos/{video_id}/translations/{language}")
 async def get_video_translation(video_id: str, language: str):
     try:
-        translation = await get_translation(video_id, language)
+        translation = await get_subtitle_range(video_id, language=language)
         if not translation:
             raise HTTPException(status_code=404, detail="Translation not found")
-        return [sub.to_dict() for sub in translation]
+        return Response(content=translation.to_json(), media_type="application/json")
     except Exception as e:
         logger.error(f"번역 가져오기 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# 전사 캐시 적중률 엔드포인트
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return transcription_cache.metrics()
+
+# Whisper 모델 풀 상태 (로드된 모델, 로드 시간)
+@app.get("/api/models")
+async def get_models():
+    return model_manager.metrics()
+
+# Prometheus 수집 엔드포인트 (단계별 시간, 실시간 배율, 큐 길이, 모델 로드, WebSocket/Firestore 지연)
+@app.get("/metrics")
+async def get_metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+# 작업 상태 조회 엔드포인트
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+# 작업 취소 엔드포인트
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Job not found or already finished")
+    return {"message": "Job cancelled"}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8081) 
\ No newline at end of file
@@ -0,0 +1,219 @@
+import re
+import numpy as np
+from json.encoder import encode_basestring
+from typing import Iterable, List, Optional, Sequence
+from models.video import Subtitle
+
+try:
+    import msgpack
+except ImportError:  # requirements.txt에 포함. 없으면 msgpack 형식만 쓸 수 없음
+    msgpack = None
+
+def _pack_strings(values: Iterable[str]):
+    """문자열들을 UTF-8 버퍼 하나와 오프셋 배열로 묶습니다."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+# JSON 문자열에서 이스케이프가 필요한 바이트. UTF-8 다중 바이트 문자에는 ASCII 바이트가 없으므로 바이트 단위로 찾아도 됨
+_JSON_ESCAPE = re.compile(rb'["\\\x00-\x1f]')
+
+def _json_string_bodies(buffer: bytes, offsets: np.ndarray) -> List[bytes]:
+    """버퍼의 문자열들을 따옴표 없는 JSON 문자열 본문(UTF-8)으로 반환합니다.
+
+    이스케이프할 문자가 없는 문자열은 디코딩하지 않고 바이트 슬라이스를 그대로 씁니다.
+    """
+    bounds = offsets.tolist()
+    items = [buffer[a:b] for a, b in zip(bounds, bounds[1:])]
+    if _JSON_ESCAPE.search(buffer, bounds[0], bounds[-1]):
+        items = [encode_basestring(item.decode("utf-8"))[1:-1].encode("utf-8") if _JSON_ESCAPE.search(item) else item
+                 for item in items]
+    return items
+
+# 큐 안의 빈 줄은 큐를 끝내고 "-->"가 든 줄은 타이밍 줄로 읽히므로 SRT/VTT에 쓰기 전에 정리함
+_BLANK_LINES = re.compile(r"\n(?:[^\S\n]*\n)+")
+_VTT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_SRT_SPECIAL = re.compile(rb"[\r\n]|-->")
+_VTT_SPECIAL = re.compile(rb"[\r\n&<>]")
+
+def _cue_text(text: str, vtt: bool) -> str:
+    text = _BLANK_LINES.sub("\n", text.replace("\r\n", "\n").replace("\r", "\n").strip())
+    # VTT는 &, < 를 엔티티로 써야 하며 > 도 바꾸면 "-->"가 남지 않음
+    return text.translate(_VTT_ESCAPES) if vtt else text.replace("-->", "->")
+
+def _format_timestamps(seconds: np.ndarray, separator: str) -> List[str]:
+    ms = np.round(seconds * 1000).astype(np.int64)
+    hours, ms = np.divmod(ms, 3_600_000)
+    minutes, ms = np.divmod(ms, 60_000)
+    secs, ms = np.divmod(ms, 1000)
+    return [
+        f"{h:02d}:{m:02d}:{s:02d}{separator}{x:03d}"
+        for h, m, s, x in zip(hours.tolist(), minutes.tolist(), secs.tolist(), ms.tolist())
+    ]
+
+class SubtitleTrack:
+    """한 언어의 자막 트랙을 병렬 배열로 보관합니다.
+
+    시작/끝 시각은 float64 배열, id와 텍스트는 UTF-8 버퍼 하나와 오프셋 배열에 저장하므로
+    줄마다 pydantic 객체를 만들지 않고 슬라이스와 직렬화를 할 수 있습니다.
+    슬라이스는 같은 버퍼를 공유하는 뷰입니다 (복사 없음).
+    """
+    __slots__ = ("starts", "ends", "_id_buffer", "_id_offsets", "_text_buffer", "_text_offsets")
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, id_buffer: bytes, id_offsets: np.ndarray,
+                 text_buffer: bytes, text_offsets: np.ndarray):
+        self.starts = starts
+        self.ends = ends
+        self._id_buffer = id_buffer
+        self._id_offsets = id_offsets
+        self._text_buffer = text_buffer
+        self._text_offsets = text_offsets
+
+    @classmethod
+    def from_columns(cls, ids: Sequence[str], starts: Sequence[float], ends: Sequence[float],
+                     texts: Sequence[str]) -> "SubtitleTrack":
+        id_buffer, id_offsets = _pack_strings(ids)
+        text_buffer, text_offsets = _pack_strings(texts)
+        return cls(np.asarray(starts, dtype=np.float64), np.asarray(ends, dtype=np.float64),
+                   id_buffer, id_offsets, text_buffer, text_offsets)
+
+    @classmethod
+    def from_dicts(cls, items: Sequence[dict]) -> "SubtitleTrack":
+        return cls.from_columns(
+            [item["id"] for item in items],
+            [item["startTime"] for item in items],
+            [item["endTime"] for item in items],
+            [item["text"] for item in items]
+        )
+
+    @classmethod
+    def from_subtitles(cls, subtitles: Sequence[Subtitle]) -> "SubtitleTrack":
+        return cls.from_columns(
+            [sub.id for sub in subtitles],
+            [sub.startTime for sub in subtitles],
+            [sub.endTime for sub in subtitles],
+            [sub.text for sub in subtitles]
+        )
+
+    @classmethod
+    def empty(cls) -> "SubtitleTrack":
+        return cls.from_columns([], [], [], [])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _strings(self, buffer: bytes, offsets: np.ndarray) -> List[str]:
+        bounds = offsets.tolist()
+        view = memoryview(buffer)
+        return [str(view[a:b], "utf-8") for a, b in zip(bounds, bounds[1:])]
+
+    def ids(self) -> List[str]:
+        return self._strings(self._id_buffer, self._id_offsets)
+
+    def texts(self) -> List[str]:
+        return self._strings(self._text_buffer, self._text_offsets)
+
+    def slice(self, start: int, stop: int) -> "SubtitleTrack":
+        """[start, stop) 줄을 복사 없이 잘라냅니다."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        return SubtitleTrack(self.starts[start:stop], self.ends[start:stop],
+                             self._id_buffer, self._id_offsets[start:stop + 1],
+                             self._text_buffer, self._text_offsets[start:stop + 1])
+
+    def time_range(self, start: float, end: Optional[float] = None) -> "SubtitleTrack":
+        """[start, end) 구간에 보이는 줄을 반환합니다. 시작 시각 순으로 정렬되어 있어야 합니다."""
+        if not len(self):
+            return self
+        max_duration = float(np.max(self.ends - self.starts))
+        lo = int(np.searchsorted(self.starts, start - max_duration, side="left"))
+        hi = int(np.searchsorted(self.starts, end, side="left")) if end is not None else len(self)
+        # 긴 줄 때문에 앞쪽으로 넓힌 범위에서 이미 끝난 줄을 건너뜀
+        while lo < hi and self.ends[lo] <= start:
+            lo += 1
+        edge = int(np.searchsorted(self.starts, start, side="left"))
+        ended = np.flatnonzero(self.ends[lo:min(edge, hi)] <= start)
+        if not len(ended):
+            return self.slice(lo, hi)
+        # 보이는 줄 사이에 이미 끝난 줄이 섞인 경우에만 복사해서 골라냄
+        keep = np.setdiff1d(np.arange(lo, hi), ended + lo)
+        return self.take(keep)
+
+    def take(self, indices: Sequence[int]) -> "SubtitleTrack":
+        """지정한 줄만 모아 새 트랙을 만듭니다 (복사)."""
+        ids, texts = self.ids(), self.texts()
+        indices = np.asarray(indices, dtype=np.int64)
+        return SubtitleTrack.from_columns(
+            [ids[i] for i in indices.tolist()],
+            self.starts[indices],
+            self.ends[indices],
+            [texts[i] for i in indices.tolist()]
+        )
+
+    def to_subtitles(self) -> List[Subtitle]:
+        return [
+            Subtitle(id=i, startTime=s, endTime=e, text=t)
+            for i, s, e, t in zip(self.ids(), self.starts.tolist(), self.ends.tolist(), self.texts())
+        ]
+
+    def to_dicts(self) -> List[dict]:
+        return [
+            {"id": i, "startTime": s, "endTime": e, "text": t}
+            for i, s, e, t in zip(self.ids(), self.starts.tolist(), self.ends.tolist(), self.texts())
+        ]
+
+    def to_json(self) -> bytes:
+        """Subtitle.to_dict() 목록과 같은 내용의 JSON 배열을 UTF-8 바이트로 바로 만듭니다.
+
+        문자열을 str로 디코딩하지 않고 버퍼 슬라이스를 그대로 이어 붙입니다.
+        """
+        row = b'{"id":"%s","startTime":%r,"endTime":%r,"text":"%s"}'
+        parts = [
+            row % line
+            for line in zip(_json_string_bodies(self._id_buffer, self._id_offsets), self.starts.tolist(),
+                            self.ends.tolist(), _json_string_bodies(self._text_buffer, self._text_offsets))
+        ]
+        return b"[" + b",".join(parts) + b"]"
+
+    def to_msgpack(self) -> bytes:
+        """컬럼형 msgpack으로 직렬화합니다 (msgpack 패키지 필요)."""
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.packb({
+            "id": self.ids(),
+            "startTime": self.starts.tolist(),
+            "endTime": self.ends.tolist(),
+            "text": self.texts()
+        })
+
+    @classmethod
+    def from_msgpack(cls, data: bytes) -> "SubtitleTrack":
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        columns = msgpack.unpackb(data)
+        return cls.from_columns(columns["id"], columns["startTime"], columns["endTime"], columns["text"])
+
+    def _cue_texts(self, vtt: bool) -> List[str]:
+        """SRT/VTT 큐 본문. 정리할 문자가 없는 줄(대부분)은 그대로 씁니다."""
+        special = _VTT_SPECIAL if vtt else _SRT_SPECIAL
+        texts = self.texts()
+        if not special.search(self._text_buffer, int(self._text_offsets[0]), int(self._text_offsets[-1])):
+            return texts
+        return [_cue_text(text, vtt) if special.search(text.encode("utf-8")) else text for text in texts]
+
+    def to_srt(self) -> str:
+        starts = _format_timestamps(self.starts, ",")
+        ends = _format_timestamps(self.ends, ",")
+        blocks = [
+            f"{n}\n{s} --> {e}\n{t}\n"
+            for n, (s, e, t) in enumerate(zip(starts, ends, self._cue_texts(vtt=False)), start=1)
+        ]
+        return "\n".join(blocks)
+
+    def to_vtt(self) -> str:
+        starts = _format_timestamps(self.starts, ".")
+        ends = _format_timestamps(self.ends, ".")
+        blocks = [f"{s} --> {e}\n{t}\n" for s, e, t in zip(starts, ends, self._cue_texts(vtt=True))]
+        return "WEBVTT\n\n" + "\n".join(blocks)
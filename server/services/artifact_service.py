@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import re
+import shutil
+from typing import Dict, Optional, Tuple
+from services.firebase_service import get_subtitle_range
+from services.job_service import run_in_stage
+
+try:
+    import brotli
+except ImportError:  # requirements.txt에 포함. 설치되지 않은 환경에서는 gzip 변형만 만듦
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 자막 파일(.vtt/.srt)을 한 번만 렌더링해 버전별 불변 파일로 저장합니다.
+# 버전은 트랙 내용 해시이므로 같은 URL의 내용은 절대 바뀌지 않습니다.
+ARTIFACT_DIR = os.getenv("LIVESUB_ARTIFACT_DIR", os.path.join(os.path.dirname(__file__), "..", "artifacts"))
+ARTIFACT_FORMATS = {
+    "vtt": "text/vtt; charset=utf-8",
+    "srt": "application/x-subrip; charset=utf-8",
+}
+# SRT/VTT 렌더링 방식이 바뀌면 올림 (버전 해시에 들어가 이전 방식으로 만든 파일을 다시 쓰지 않음)
+RENDER_VERSION = b"2"
+# Accept-Encoding 협상 시 선호 순서
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+_rendering: Dict[Tuple[str, str], asyncio.Task] = {}
+# 무효화할 때마다 올리는 비디오별 세대. 렌더링 중에 무효화되면 옛 트랙으로 current를 쓰지 않음
+_generations: Dict[str, int] = {}
+
+def _check_name(value: str) -> str:
+    if not _SAFE_NAME.match(value):
+        raise ValueError(f"Invalid path component: {value}")
+    return value
+
+def _track_dir(video_id: str, language: str) -> str:
+    return os.path.join(ARTIFACT_DIR, _check_name(video_id), _check_name(language))
+
+def artifact_path(video_id: str, language: str, version: str, fmt: str, encoding: Optional[str] = None) -> str:
+    suffix = dict(ENCODINGS).get(encoding, "")
+    return os.path.join(_track_dir(video_id, language), f"{_check_name(version)}.{fmt}{suffix}")
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def current_version(video_id: str, language: str) -> Optional[str]:
+    try:
+        with open(os.path.join(_track_dir(video_id, language), "current"), "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def _store_artifacts(video_id: str, language: str, track) -> str:
+    """모든 형식과 압축 변형을 기록하고 버전을 반환합니다. current 포인터는 호출한 쪽에서 바꿉니다."""
+    version = hashlib.sha256(RENDER_VERSION + track.to_json()).hexdigest()[:16]
+    directory = _track_dir(video_id, language)
+    os.makedirs(directory, exist_ok=True)
+    rendered = {"vtt": track.to_vtt(), "srt": track.to_srt()}
+    for fmt, text in rendered.items():
+        if os.path.exists(artifact_path(video_id, language, version, fmt)):
+            continue
+        body = text.encode("utf-8")
+        _write_atomic(artifact_path(video_id, language, version, fmt, "gzip"), gzip.compress(body, 9, mtime=0))
+        if brotli is not None:
+            _write_atomic(artifact_path(video_id, language, version, fmt, "br"), brotli.compress(body, quality=11))
+        # 비압축 파일을 마지막에 써서 존재 여부로 변형이 모두 준비되었는지 판단
+        _write_atomic(artifact_path(video_id, language, version, fmt), body)
+    return version
+
+async def _render(video_id: str, language: str) -> Optional[str]:
+    while True:
+        generation = _generations.get(video_id, 0)
+        track = await get_subtitle_range(video_id, language=language)
+        if not track:
+            return None
+        version = await run_in_stage("persist", _store_artifacts, video_id, language, track)
+        # 무효화와 같은 이벤트 루프에서 확인하고 바로 쓰므로 그 사이에 무효화될 수 없음
+        if _generations.get(video_id, 0) == generation:
+            _write_atomic(os.path.join(_track_dir(video_id, language), "current"), version.encode())
+            logger.info(f"Rendered subtitle artifacts: {video_id}/{language} v{version}")
+            return version
+        logger.info(f"Subtitles changed while rendering {video_id}/{language}, rendering again")
+
+async def ensure_subtitle_artifacts(video_id: str, language: str) -> Optional[str]:
+    """현재 버전을 반환합니다. 아직 없으면 한 번만 렌더링합니다 (동시 요청은 같은 작업을 기다림)."""
+    version = current_version(video_id, language)
+    if version is not None:
+        return version
+    key = (video_id, language)
+    task = _rendering.get(key)
+    if task is None:
+        task = asyncio.create_task(_render(video_id, language))
+        _rendering[key] = task
+        task.add_done_callback(lambda done: _rendering.pop(key) if _rendering.get(key) is done else None)
+    return await asyncio.shield(task)
+
+def invalidate_subtitle_artifacts(video_id: str, delete: bool = False):
+    """자막이 바뀌면 current 포인터만 지웁니다. 이미 배포된 버전 파일은 불변이므로 그대로 둡니다.
+
+    진행 중인 렌더링은 세대가 바뀐 것을 보고 새 트랙으로 다시 렌더링합니다.
+    """
+    directory = os.path.join(ARTIFACT_DIR, _check_name(video_id))
+    _generations[video_id] = _generations.get(video_id, 0) + 1
+    if delete:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    if not os.path.isdir(directory):
+        return
+    for language in os.listdir(directory):
+        try:
+            os.remove(os.path.join(directory, language, "current"))
+        except FileNotFoundError:
+            pass
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """q=0 으로 거부되지 않은 압축 방식 중 선호 순서가 가장 높은 것을 고릅니다."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding, _ in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """단일 바이트 범위 "bytes=a-b" 를 [start, end] 로 해석합니다.
+
+    여러 범위나 형식이 잘못된 헤더(끝이 시작보다 앞인 범위 포함, RFC 7233 2.1)는 무시하고
+    None (전체 응답)을 반환하며, 시작이 파일 크기를 넘는 범위는 ValueError 를 발생시킵니다.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if start is None:
+        if end is None:
+            return None
+        if end == 0:
+            raise ValueError(f"Unsatisfiable range: {header}")
+        return max(size - end, 0), size - 1
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, size - 1 if end is None else min(end, size - 1)
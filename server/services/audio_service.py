@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import struct
+import wave
+import numpy as np
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+BLOCK_SECONDS = 10  # 파이프에서 한 번에 읽는 오디오 길이
+FINGERPRINT_SECONDS = 60  # 오디오 지문에 사용하는 앞부분 길이
+
+class FfmpegAudioSource:
+    """ffmpeg 출력(16kHz mono float32)을 파이프에서 고정 크기 블록으로 읽는 스트리밍 소스."""
+
+    def __init__(self, source: str, sample_rate: int = SAMPLE_RATE,
+                 block_seconds: float = BLOCK_SECONDS, headers: Optional[Dict[str, str]] = None):
+        self.source = source
+        self.sample_rate = sample_rate
+        self.block_samples = int(sample_rate * block_seconds)
+        self.headers = headers or {}
+        self.samples_read = 0
+        self._process = None
+
+    def _command(self):
+        cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+        if self.headers:
+            cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in self.headers.items())]
+        cmd += ["-i", self.source, "-vn", "-ac", "1", "-ar", str(self.sample_rate), "-f", "f32le", "pipe:1"]
+        return cmd
+
+    async def blocks(self) -> AsyncIterator[np.ndarray]:
+        """float32 블록을 순서대로 반환합니다. 마지막 블록은 더 짧을 수 있습니다."""
+        self._process = await asyncio.create_subprocess_exec(
+            *self._command(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        block_bytes = self.block_samples * 4
+        try:
+            while True:
+                try:
+                    data = await self._process.stdout.readexactly(block_bytes)
+                except asyncio.IncompleteReadError as e:
+                    data = e.partial[:len(e.partial) // 4 * 4]
+                    if data:
+                        self.samples_read += len(data) // 4
+                        yield np.frombuffer(data, dtype=np.float32)
+                    break
+                self.samples_read += self.block_samples
+                yield np.frombuffer(data, dtype=np.float32)
+            stderr = await self._process.stderr.read()
+            if await self._process.wait() != 0:
+                raise RuntimeError(f"ffmpeg decode failed: {stderr.decode(errors='ignore').strip()}")
+        finally:
+            self.close()
+
+    def close(self):
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+
+class FfmpegPipeDecoder:
+    """stdin으로 받은 인코딩된 오디오(Opus/WebM, 다른 샘플레이트의 PCM 등)를 16kHz mono float32로 변환합니다.
+
+    write()는 stdin drain을 기다리므로 ffmpeg가 밀리면 호출자도 같이 느려집니다 (백프레셔).
+    """
+
+    def __init__(self, input_args: List[str], sample_rate: int = SAMPLE_RATE, read_seconds: float = 0.1):
+        self.input_args = input_args
+        self.sample_rate = sample_rate
+        self.read_bytes = int(sample_rate * read_seconds) * 4
+        self._process = None
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-loglevel", "error", *self.input_args, "-i", "pipe:0",
+            "-vn", "-ac", "1", "-ar", str(self.sample_rate), "-f", "f32le", "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+    async def write(self, data: bytes):
+        self._process.stdin.write(data)
+        await self._process.stdin.drain()
+
+    async def finish(self):
+        """입력을 닫아 ffmpeg가 남은 출력을 내보내도록 합니다."""
+        if self._process.stdin and not self._process.stdin.is_closing():
+            self._process.stdin.close()
+
+    async def blocks(self) -> AsyncIterator[np.ndarray]:
+        """디코딩되는 대로 float32 블록을 반환합니다 (길이는 일정하지 않음)."""
+        remainder = b""
+        while True:
+            data = await self._process.stdout.read(self.read_bytes)
+            if not data:
+                break
+            data = remainder + data
+            usable = len(data) // 4 * 4
+            remainder = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.float32)
+        await self._process.wait()
+
+    def close(self):
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+
+def design_lowpass(up: int, down: int, zero_crossings: int = 10, beta: float = 5.0) -> np.ndarray:
+    """업샘플 비율 up에서 동작하는 Kaiser 윈도우 sinc 저역 통과 필터 (scipy resample_poly와 같은 설계)."""
+    max_rate = max(up, down)
+    half = zero_crossings * max_rate
+    n = np.arange(-half, half + 1, dtype=np.float64)
+    h = np.sinc(n / max_rate) * np.kaiser(len(n), beta)
+    return h * (up / h.sum())
+
+class PolyphaseResampler:
+    """유리수 비율(up/down) 폴리페이즈 FIR 리샘플러. 블록 단위로 입력을 받아 스트리밍으로 동작합니다.
+
+    출력 k는 y[k] = sum_i x[i] * h[k*down + delay - i*up] 이며, delay로 필터 지연을 보정해
+    입력과 시간이 맞도록 합니다. 필요한 과거 입력(taps-1개)만 보관합니다.
+    """
+    CHUNK_OUTPUTS = 16384  # 한 번에 만드는 출력 수 (임시 배열 크기 제한)
+
+    def __init__(self, rate_in: int, rate_out: int):
+        g = math.gcd(rate_in, rate_out)
+        self.up, self.down = rate_out // g, rate_in // g
+        h = design_lowpass(self.up, self.down)
+        self.delay = (len(h) - 1) // 2
+        self.taps = -(-len(h) // self.up)
+        bank = np.zeros((self.up, self.taps), dtype=np.float32)
+        for phase in range(self.up):
+            coeffs = h[phase::self.up]
+            bank[phase, :len(coeffs)] = coeffs
+        # 슬라이딩 윈도우(과거→현재 순서)와 바로 곱할 수 있도록 탭 순서를 뒤집어 둠
+        self._bank = np.ascontiguousarray(bank[:, ::-1])
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._history_start = -(self.taps - 1)  # _history[0]의 입력 인덱스 (음수 구간은 0으로 채움)
+        self._next_out = 0
+        self._n_in = 0
+
+    def _input_index(self, k):
+        return (k * self.down + self.delay) // self.up
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        buf = np.concatenate((self._history, np.asarray(block, dtype=np.float32)))
+        start = self._history_start
+        end = start + len(buf)
+        self._n_in += len(block)
+        k_end = (end * self.up - 1 - self.delay) // self.down + 1
+        out = np.empty(max(k_end - self._next_out, 0), dtype=np.float32)
+        if len(out):
+            windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)
+            for c in range(0, len(out), self.CHUNK_OUTPUTS):
+                ks = np.arange(self._next_out + c, min(self._next_out + c + self.CHUNK_OUTPUTS, k_end), dtype=np.int64)
+                n = ks * self.down + self.delay
+                rows = n // self.up - start - (self.taps - 1)
+                phases = n % self.up
+                if self.up == 1:
+                    out[c:c + len(ks)] = windows[rows] @ self._bank[0]
+                else:
+                    for phase in np.unique(phases):
+                        sel = phases == phase
+                        out[c:c + len(ks)][sel] = windows[rows[sel]] @ self._bank[phase]
+            self._next_out = k_end
+        keep = min(max(self._input_index(self._next_out) - (self.taps - 1), start), end)
+        self._history = buf[keep - start:].copy()
+        self._history_start = keep
+        return out
+
+    def flush(self) -> np.ndarray:
+        """남은 출력을 0으로 채운 입력으로 밀어내고, 전체 출력 길이를 ceil(n_in * up / down)에 맞춥니다."""
+        total = -(-self._n_in * self.up // self.down)
+        produced = self._next_out
+        n_in = self._n_in
+        tail = self.process(np.zeros(self.delay // self.up + self.taps + 1, dtype=np.float32))
+        self._n_in = n_in
+        return tail[:max(total - produced, 0)]
+
+class AudioPreprocessor:
+    """다운믹스, 리샘플, DC 제거, 정규화, 노이즈 게이트를 블록마다 한 번에 처리합니다.
+
+    입력 블록은 (samples,) 또는 (samples, channels) 형태의 float/int16 배열입니다.
+    전체 길이의 최대값을 미리 알 수 없으므로, 지금까지 본 최대 진폭이 1을 넘으면 그 값으로 나눠 정규화합니다.
+    """
+
+    def __init__(self, sample_rate: int, target_rate: int = SAMPLE_RATE, noise_gate: float = 0.0):
+        self.resampler = PolyphaseResampler(sample_rate, target_rate) if sample_rate != target_rate else None
+        self.noise_gate = noise_gate
+        self.peak = 1.0
+
+    @staticmethod
+    def _downmix(block: np.ndarray) -> np.ndarray:
+        block = np.asarray(block)
+        scale = 1.0 / 32768.0 if block.dtype == np.int16 else 1.0
+        if block.ndim == 2:
+            mono = block.mean(axis=1, dtype=np.float32)
+        else:
+            mono = np.array(block, dtype=np.float32)  # 호출자 배열을 바꾸지 않도록 블록 단위로 복사
+        if scale != 1.0:
+            mono *= scale
+        return mono
+
+    def _finish(self, block: np.ndarray) -> np.ndarray:
+        if not len(block):
+            return block
+        block -= block.mean()
+        peak = float(np.max(np.abs(block)))
+        if peak > self.peak:
+            self.peak = peak
+        if self.peak > 1.0:
+            block *= 1.0 / self.peak
+        if self.noise_gate > 0:
+            block[np.abs(block) < self.noise_gate] = 0
+        return block
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        mono = self._downmix(block)
+        if self.resampler is not None:
+            mono = self.resampler.process(mono)
+        return self._finish(mono)
+
+    def flush(self) -> np.ndarray:
+        if self.resampler is None:
+            return np.zeros(0, dtype=np.float32)
+        return self._finish(self.resampler.flush())
+
+def _wav_data_offset(path: str) -> int:
+    """RIFF 청크를 따라가 data 청크의 시작 위치를 찾습니다."""
+    with open(path, "rb") as f:
+        riff, _, fmt = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or fmt != b"WAVE":
+            raise ValueError(f"Not a WAV file: {path}")
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"WAV data chunk not found: {path}")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"data":
+                return f.tell()
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+class WavMmapSource:
+    """16kHz mono 16bit WAV 파일을 메모리 맵으로 열어 블록 단위로 읽는 소스."""
+
+    def __init__(self, path: str, block_seconds: float = BLOCK_SECONDS):
+        with wave.open(path, "rb") as wf:
+            self.sample_rate = wf.getframerate()
+            n_frames = wf.getnframes()
+        self.path = path
+        self.block_samples = int(self.sample_rate * block_seconds)
+        self.samples_read = 0
+        self._pcm = np.memmap(path, dtype=np.int16, mode="r", offset=_wav_data_offset(path), shape=(n_frames,))
+
+    async def blocks(self) -> AsyncIterator[np.ndarray]:
+        for start in range(0, len(self._pcm), self.block_samples):
+            block = self._pcm[start:start + self.block_samples]
+            self.samples_read = start + len(block)
+            yield block.astype(np.float32) / 32768.0
+
+    def close(self):
+        self._pcm = None
+
+def is_pcm16_mono_wav(path: str, sample_rate: int = SAMPLE_RATE) -> bool:
+    try:
+        with wave.open(path, "rb") as wf:
+            return (wf.getnchannels() == 1 and wf.getsampwidth() == 2
+                    and wf.getframerate() == sample_rate)
+    except (wave.Error, EOFError):
+        return False
+
+def open_audio_source(path: str, block_seconds: float = BLOCK_SECONDS):
+    """바로 쓸 수 있는 WAV는 메모리 맵으로, 그 외 파일은 ffmpeg 파이프로 엽니다."""
+    if path.endswith(".wav") and is_pcm16_mono_wav(path):
+        logger.info(f"Memory-mapping WAV: {path}")
+        return WavMmapSource(path, block_seconds)
+    logger.info(f"Decoding through ffmpeg pipe: {path}")
+    return FfmpegAudioSource(path, block_seconds=block_seconds)
+
+async def _chain_blocks(head, rest):
+    for block in head:
+        yield block
+    async for block in rest:
+        yield block
+
+async def peek_fingerprint(blocks: AsyncIterator[np.ndarray], sample_rate: int = SAMPLE_RATE,
+                           seconds: float = FINGERPRINT_SECONDS) -> Tuple[str, AsyncIterator[np.ndarray]]:
+    """앞부분 블록을 읽어 오디오 지문을 계산하고, 읽은 블록을 포함한 스트림을 그대로 돌려줍니다.
+
+    지문은 앞 seconds초만 보므로 캐시 키로 쓸 때는 전체 길이와 함께 써야 합니다.
+    """
+    blocks = blocks.__aiter__()
+    digest = hashlib.blake2b(digest_size=16)
+    head = []
+    needed = int(sample_rate * seconds)
+    async for block in blocks:
+        head.append(block)
+        take = min(len(block), needed)
+        digest.update(np.ascontiguousarray(block[:take], dtype=np.float32).tobytes())
+        needed -= take
+        if needed <= 0:
+            break
+    return digest.hexdigest(), _chain_blocks(head, blocks)
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("LIVESUB_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "cache"))
+CACHE_MAX_BYTES = int(os.getenv("LIVESUB_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+def cache_key(kind: str, identifier: str, params: dict) -> str:
+    """식별자(YouTube ID 또는 오디오 해시)와 모델/디코딩 파라미터로 캐시 키를 만듭니다."""
+    payload = json.dumps({"kind": kind, "id": identifier, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class TranscriptionCache:
+    """디스크에 저장되는 내용 기반 전사 결과 캐시.
+
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제하고,
+    같은 키를 계산 중인 요청이 있으면 그 결과를 기다리도록 합니다.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "inflight_joins": 0}
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        os.makedirs(directory, exist_ok=True)
+        # 마지막 사용 시각(mtime) 순으로 LRU 순서 복원
+        files = [f for f in os.listdir(directory) if f.endswith(".json")]
+        files.sort(key=lambda f: os.path.getmtime(self._path(f[:-5])))
+        for name in files:
+            size = os.path.getsize(os.path.join(directory, name))
+            self._entries[name[:-5]] = size
+            self._total_bytes += size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            if key not in self._entries:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(self._path(key))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache entry unreadable, dropping {key}: {e}")
+            self._remove(key)
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return value
+
+    def put(self, key: str, value: dict):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest, _ = next(iter(self._entries.items()))
+                self._remove_locked(oldest)
+                self.stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key: str):
+        self._total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def inflight(self, key: str) -> Optional[asyncio.Future]:
+        """같은 키를 계산 중인 요청이 있으면 그 결과 Future를 반환합니다."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["inflight_joins"] += 1
+        return future
+
+    def claim(self, key: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    def release(self, key: str, value: Optional[dict] = None):
+        """계산을 마치고 기다리던 요청에 결과를 전달합니다. 실패 시 None을 전달합니다."""
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+                "inflight": len(self._inflight),
+            }
+
+transcription_cache = TranscriptionCache()
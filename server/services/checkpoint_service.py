@@ -0,0 +1,190 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Set
+from pydantic import BaseModel
+from models.video import Subtitle
+from services.download_service import TEMP_DIR
+from services.firebase_service import list_video_summaries, update_video_fields
+from services.job_service import JOB_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# 체크포인트는 작업과 같은 SQLite 파일에 저장해 재시작 후에도 작업과 함께 남도록 함
+CHECKPOINT_DB_PATH = os.getenv("LIVESUB_CHECKPOINT_DB", JOB_DB_PATH)
+TEMP_MAX_AGE_SECONDS = int(os.getenv("LIVESUB_TEMP_MAX_AGE", str(6 * 3600)))
+CHECKPOINT_MAX_AGE_SECONDS = int(os.getenv("LIVESUB_CHECKPOINT_MAX_AGE", str(7 * 24 * 3600)))
+GC_INTERVAL_SECONDS = 3600
+
+class Checkpoint(BaseModel):
+    video_id: str
+    signature: str  # 영상 ID + 모델/디코딩 파라미터 (다르면 이어서 처리하지 않음)
+    offset_seconds: float  # 이 시점 이전의 윈도우는 모두 디코딩됨
+    language: Optional[str] = None
+    subtitles: List[Subtitle] = []
+    updated_at: datetime
+
+class CheckpointStore:
+    """전사 진행 상황(끝난 자막과 오디오 위치)을 배치마다 SQLite에 기록합니다.
+
+    자막은 배치 단위 행으로 덧붙이기만 하므로 긴 영상에서도 기록 비용이 배치 크기에 비례합니다.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    video_id TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL,
+                    offset_seconds REAL NOT NULL,
+                    language TEXT,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoint_segments (
+                    video_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    subtitles TEXT NOT NULL,
+                    PRIMARY KEY (video_id, seq)
+                )
+            """)
+
+    def load(self, video_id: str, signature: str) -> Optional[Checkpoint]:
+        """같은 조건으로 저장된 체크포인트를 반환합니다. 조건이 다르면 지우고 None을 반환합니다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT signature, offset_seconds, language, updated_at FROM checkpoints WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] != signature:
+                self._delete_locked(video_id)
+                return None
+            rows = self._conn.execute(
+                "SELECT subtitles FROM checkpoint_segments WHERE video_id = ? ORDER BY seq", (video_id,)
+            ).fetchall()
+        subtitles = [Subtitle.from_dict(sub) for (payload,) in rows for sub in json.loads(payload)]
+        return Checkpoint(video_id=video_id, signature=row[0], offset_seconds=row[1], language=row[2],
+                          subtitles=subtitles, updated_at=datetime.fromisoformat(row[3]))
+
+    def start(self, video_id: str, signature: str):
+        """처음부터 처리할 때 이전 기록을 지우고 빈 체크포인트를 만듭니다."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM checkpoint_segments WHERE video_id = ?", (video_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, 0, NULL, ?)",
+                (video_id, signature, datetime.now().isoformat())
+            )
+
+    def append(self, video_id: str, subtitles: List[Subtitle], offset_seconds: float, language: Optional[str]):
+        """배치 하나의 자막과 새 오디오 위치를 한 트랜잭션으로 기록합니다."""
+        with self._lock, self._conn:
+            if subtitles:
+                self._conn.execute(
+                    "INSERT INTO checkpoint_segments VALUES (?, "
+                    "(SELECT COALESCE(MAX(seq), 0) + 1 FROM checkpoint_segments WHERE video_id = ?), ?)",
+                    (video_id, video_id, json.dumps([sub.to_dict() for sub in subtitles]))
+                )
+            self._conn.execute(
+                "UPDATE checkpoints SET offset_seconds = ?, language = ?, updated_at = ? WHERE video_id = ?",
+                (offset_seconds, language, datetime.now().isoformat(), video_id)
+            )
+
+    def delete(self, video_id: str):
+        with self._lock, self._conn:
+            self._delete_locked(video_id)
+
+    def _delete_locked(self, video_id: str):
+        self._conn.execute("DELETE FROM checkpoint_segments WHERE video_id = ?", (video_id,))
+        self._conn.execute("DELETE FROM checkpoints WHERE video_id = ?", (video_id,))
+
+    def list(self) -> List[tuple]:
+        """(video_id, offset_seconds, updated_at) 목록."""
+        with self._lock:
+            rows = self._conn.execute("SELECT video_id, offset_seconds, updated_at FROM checkpoints").fetchall()
+        return [(video_id, offset, datetime.fromisoformat(updated)) for video_id, offset, updated in rows]
+
+checkpoint_store = CheckpointStore()
+
+def collect_temp_files(active_video_ids: Set[str], max_age: float = TEMP_MAX_AGE_SECONDS,
+                       directory: str = TEMP_DIR) -> int:
+    """진행 중인 작업의 파일이 아니고 max_age보다 오래된 임시 파일(다운로드 조각, 이전 WAV)을 지웁니다."""
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    now = time.time()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        # 파일 이름은 <video_id>.<ext> (yt-dlp의 .part 등 포함)
+        if name.split(".", 1)[0] in active_video_ids or not os.path.isfile(path):
+            continue
+        try:
+            if now - os.path.getmtime(path) >= max_age:
+                os.remove(path)
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove temp file {path}: {e}")
+    return removed
+
+def collect_checkpoints(active_video_ids: Set[str], max_age: float = CHECKPOINT_MAX_AGE_SECONDS) -> int:
+    """더 이상 이어서 처리할 작업이 없는 오래된 체크포인트를 지웁니다."""
+    removed = 0
+    now = datetime.now()
+    for video_id, _, updated_at in checkpoint_store.list():
+        if video_id not in active_video_ids and (now - updated_at).total_seconds() >= max_age:
+            checkpoint_store.delete(video_id)
+            removed += 1
+    return removed
+
+async def reconcile_interrupted_videos(active_video_ids: Callable[[], Iterable[str]]) -> int:
+    """재시작 후 processing 상태로 남았지만 이어서 처리할 작업이 없는 비디오를 error로 바꿉니다.
+
+    대기/실행 중이던 작업은 JobManager.start()가 다시 큐에 넣고, process_video가 체크포인트에서 이어서 처리합니다.
+    """
+    active = set(active_video_ids())
+    for video_id, offset, _ in checkpoint_store.list():
+        if video_id in active:
+            logger.info(f"Job for {video_id} will resume from {offset:.1f}s")
+    stuck = 0
+    cursor = None
+    while True:
+        page = await list_video_summaries(limit=100, cursor=cursor, status="processing", fields=["id", "status"])
+        # 정리 중에 새로 제출된 작업도 있으므로 페이지마다 다시 확인
+        active = set(active_video_ids())
+        for item in page["items"]:
+            if item["id"] not in active:
+                logger.warning(f"Video {item['id']} was left processing without a job, marking as error")
+                await update_video_fields(item["id"], {"status": "error"})
+                checkpoint_store.delete(item["id"])
+                stuck += 1
+        cursor = page["nextCursor"]
+        if not cursor:
+            return stuck
+
+async def run_maintenance(active_video_ids: Callable[[], Iterable[str]], interval: float = GC_INTERVAL_SECONDS):
+    """시작 시 중단된 작업을 정리하고, 이후 interval마다 임시 파일과 체크포인트를 정리합니다."""
+    try:
+        # 시작 직후에는 진행 중인 다운로드가 없으므로 나이와 상관없이 정리
+        removed = collect_temp_files(set(active_video_ids()), max_age=0)
+        stuck = await reconcile_interrupted_videos(active_video_ids)
+        logger.info(f"Startup reconcile: {removed} temp files removed, {stuck} stuck videos marked as error")
+    except Exception as e:
+        logger.error(f"중단된 작업 정리 실패: {str(e)}")
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            active = set(active_video_ids())
+            collect_temp_files(active)
+            collect_checkpoints(active)
+        except Exception as e:
+            logger.error(f"임시 파일 정리 실패: {str(e)}")
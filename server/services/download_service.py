@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+import yt_dlp
+from services.audio_service import FfmpegPipeDecoder, open_audio_source
+from services.job_service import run_in_stage
+from services.metrics_service import DOWNLOAD_BYTES, stage_timer
+
+logger = logging.getLogger(__name__)
+
+YDL_OPTS = {
+    'format': 'bestaudio/best',
+    'noplaylist': True,
+    'quiet': False,
+    'nocheckcertificate': True,
+    'http_headers': {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+}
+# 다운로드 설정 (LIVESUB_DOWNLOAD_* 환경 변수로 변경)
+DOWNLOAD_CONCURRENCY = int(os.getenv("LIVESUB_DOWNLOAD_CONCURRENCY", "4"))  # 동시에 받는 구간/조각 수
+DOWNLOAD_CHUNK_BYTES = int(os.getenv("LIVESUB_DOWNLOAD_CHUNK_BYTES", str(2 * 1024 * 1024)))
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_TIMEOUT = 30.0
+# 음성 인식에 충분한 최소 오디오 비트레이트 (kbps). 이보다 큰 것 중 가장 작은 포맷을 고름
+MIN_AUDIO_KBPS = float(os.getenv("LIVESUB_MIN_AUDIO_KBPS", "48"))
+# 구간 요청으로 직접 받아 ffmpeg에 바로 넣을 수 있는 프로토콜 (그 외 HLS/DASH 조각은 yt-dlp로 받음)
+STREAMABLE_PROTOCOLS = {"http", "https"}
+TEMP_DIR = "temp"
+# 제출 시 작업 비용 추정용으로 조회한 메타데이터를 처리 시작 때 재사용 (스트림 URL 만료보다 충분히 짧게)
+METADATA_TTL_SECONDS = 600
+
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+_metadata_cache: Dict[str, Tuple[float, dict]] = {}
+
+def fetch_metadata(youtube_url: str) -> dict:
+    """다운로드 없이 메타데이터만 가져옵니다. info['id']가 캐시 키의 기준이 됩니다.
+
+    METADATA_TTL_SECONDS 안에 같은 URL을 다시 조회하면 저장된 결과를 반환합니다.
+    """
+    now = time.monotonic()
+    cached = _metadata_cache.get(youtube_url)
+    if cached and now - cached[0] < METADATA_TTL_SECONDS:
+        return cached[1]
+    with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
+        info = ydl.extract_info(youtube_url, download=False)
+    for url, (fetched_at, _) in list(_metadata_cache.items()):
+        if now - fetched_at >= METADATA_TTL_SECONDS:
+            _metadata_cache.pop(url, None)
+    _metadata_cache[youtube_url] = (now, info)
+    return info
+
+def _estimated_size(fmt: dict, duration: Optional[float]) -> float:
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return float(size)
+    bitrate = fmt.get('abr') or fmt.get('tbr')
+    if bitrate and duration:
+        return bitrate * 125 * duration
+    return float("inf")
+
+def _has_audio(fmt: dict) -> bool:
+    return fmt.get('acodec') != 'none'
+
+def _is_audio_only(fmt: dict) -> bool:
+    return _has_audio(fmt) and fmt.get('vcodec') == 'none'
+
+def select_audio_format(info: dict) -> dict:
+    """음성 인식에 충분한 오디오 전용 포맷 중 가장 작은 것을 고릅니다.
+
+    비트레이트를 모르는 포맷은 충분한 것으로 보고, 직접 받을 수 있는 프로토콜을 우선합니다.
+    오디오 전용 포맷이 없을 때만 오디오가 있는 가장 작은 영상 포맷으로 대체합니다.
+    """
+    formats: List[dict] = info.get('formats') or [info]
+    duration = info.get('duration')
+
+    def rank(fmt):
+        return (fmt.get('protocol', 'https') not in STREAMABLE_PROTOCOLS, _estimated_size(fmt, duration))
+
+    audio_only = [f for f in formats if f.get('url') and _is_audio_only(f)]
+    adequate = [f for f in audio_only if (f.get('abr') or MIN_AUDIO_KBPS) >= MIN_AUDIO_KBPS]
+    candidates = adequate or audio_only
+    if not candidates:
+        candidates = [f for f in formats if f.get('url') and _has_audio(f)]
+        if not candidates:
+            raise Exception("No format with audio available")
+        logger.warning(f"No audio-only format for {info.get('id')}, falling back to the smallest muxed format")
+    chosen = min(candidates, key=rank)
+    logger.info(f"Selected format {chosen.get('format_id')} ({chosen.get('ext')}, "
+                f"{chosen.get('abr') or chosen.get('tbr') or '?'}kbps, protocol {chosen.get('protocol', 'https')})")
+    return chosen
+
+def _content_range_total(header: Optional[str]) -> Optional[int]:
+    # "bytes 0-1023/4096"
+    if header and "/" in header:
+        total = header.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+    return None
+
+class RangeDownloader:
+    """HTTP 구간(Range) 요청을 여러 개 동시에 보내고, 받은 데이터는 원래 순서대로 내보냅니다.
+
+    메모리에는 동시에 받는 구간(concurrency * chunk_bytes)만 둡니다. 서버가 구간 요청을
+    지원하지 않으면 응답 본문을 그대로 스트리밍합니다.
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 concurrency: int = DOWNLOAD_CONCURRENCY, chunk_bytes: int = DOWNLOAD_CHUNK_BYTES):
+        self.url = url
+        self.headers = headers or {}
+        self.concurrency = max(1, concurrency)
+        self.chunk_bytes = chunk_bytes
+        self.downloaded = 0
+        self.total: Optional[int] = None
+
+    async def _fetch_range(self, client: httpx.AsyncClient, start: int, end: int) -> bytes:
+        for attempt in range(DOWNLOAD_RETRIES):
+            try:
+                response = await client.get(self.url, headers={"Range": f"bytes={start}-{end}"})
+                response.raise_for_status()
+                if response.status_code != 206 or len(response.content) != end - start + 1:
+                    raise httpx.HTTPError(f"Unexpected range response {response.status_code} for bytes {start}-{end}")
+                return response.content
+            except httpx.HTTPError as e:
+                if attempt == DOWNLOAD_RETRIES - 1:
+                    raise
+                logger.warning(f"Range {start}-{end} failed ({e}), retrying")
+                await asyncio.sleep(0.5 * (attempt + 1))
+
+    async def chunks(self, on_progress: Optional[ProgressCallback] = None) -> AsyncIterator[bytes]:
+        async with httpx.AsyncClient(headers=self.headers, follow_redirects=True,
+                                     timeout=DOWNLOAD_TIMEOUT) as client:
+            async with client.stream("GET", self.url, headers={"Range": f"bytes=0-{self.chunk_bytes - 1}"}) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    # 구간 요청 미지원: 한 연결로 순서대로 받음
+                    length = response.headers.get("Content-Length")
+                    self.total = int(length) if length and length.isdigit() else None
+                    async for data in response.aiter_bytes(self.chunk_bytes):
+                        self.downloaded += len(data)
+                        if on_progress:
+                            on_progress(self.downloaded, self.total)
+                        yield data
+                    return
+                self.total = _content_range_total(response.headers.get("Content-Range"))
+                first = await response.aread()
+            self.downloaded = len(first)
+            if on_progress:
+                on_progress(self.downloaded, self.total)
+            yield first
+            if self.total is None:
+                raise Exception("Server did not report the content length")
+
+            pending = deque()
+            next_start = len(first)
+            try:
+                while pending or next_start < self.total:
+                    while next_start < self.total and len(pending) < self.concurrency:
+                        end = min(next_start + self.chunk_bytes, self.total) - 1
+                        pending.append(asyncio.create_task(self._fetch_range(client, next_start, end)))
+                        next_start = end + 1
+                    data = await pending.popleft()
+                    self.downloaded += len(data)
+                    if on_progress:
+                        on_progress(self.downloaded, self.total)
+                    yield data
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+class DownloadAudioSource:
+    """선택한 포맷을 구간 다운로드하면서 ffmpeg stdin으로 바로 넣어 디코딩하는 소스.
+
+    임시 파일 없이 다운로드와 디코딩이 겹쳐 진행됩니다. blocks()/close()는 FfmpegAudioSource와 같습니다.
+    """
+
+    def __init__(self, fmt: dict, on_progress: Optional[ProgressCallback] = None,
+                 concurrency: int = DOWNLOAD_CONCURRENCY, chunk_bytes: int = DOWNLOAD_CHUNK_BYTES):
+        self.downloader = RangeDownloader(fmt['url'], fmt.get('http_headers'), concurrency, chunk_bytes)
+        self.on_progress = on_progress
+        self._decoder: Optional[FfmpegPipeDecoder] = None
+        self._feeder: Optional[asyncio.Task] = None
+
+    async def _feed(self):
+        try:
+            # 디코딩과 겹쳐 진행되므로 다운로드 시작부터 마지막 바이트를 ffmpeg에 넣을 때까지를 기록
+            with stage_timer("download"):
+                async for data in self.downloader.chunks(self.on_progress):
+                    DOWNLOAD_BYTES.inc(len(data))
+                    await self._decoder.write(data)
+        finally:
+            await self._decoder.finish()
+
+    async def blocks(self) -> AsyncIterator[np.ndarray]:
+        self._decoder = FfmpegPipeDecoder([])
+        await self._decoder.start()
+        self._feeder = asyncio.create_task(self._feed())
+        try:
+            async for block in self._decoder.blocks():
+                yield block
+            # 다운로드 오류는 디코딩이 끝난 뒤 여기서 전달됨
+            await self._feeder
+        finally:
+            self.close()
+
+    def close(self):
+        if self._feeder and not self._feeder.done():
+            self._feeder.cancel()
+        if self._decoder:
+            self._decoder.close()
+
+def download_fragments(video_id: str, info: dict, fmt: dict, on_progress: Optional[ProgressCallback] = None) -> str:
+    """HLS/DASH 조각 포맷은 yt-dlp로 조각을 동시에 받아 파일로 저장합니다. download 단계 풀에서 실행합니다."""
+    def hook(status):
+        if on_progress and status.get('status') in ('downloading', 'finished'):
+            on_progress(status.get('downloaded_bytes') or 0,
+                        status.get('total_bytes') or status.get('total_bytes_estimate'))
+
+    ydl_opts = {
+        **YDL_OPTS,
+        'format': fmt['format_id'],
+        'outtmpl': os.path.join(TEMP_DIR, f'{video_id}.%(ext)s'),
+        'concurrent_fragment_downloads': DOWNLOAD_CONCURRENCY,
+        'progress_hooks': [hook],
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.process_ie_result(info, download=True)
+        downloads = info.get('requested_downloads') or [{}]
+        return downloads[0].get('filepath') or ydl.prepare_filename(info)
+
+class _FileAudioSource:
+    """조각 다운로드로 만든 임시 파일을 디코딩하고, 닫을 때 파일을 지웁니다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._source = open_audio_source(path)
+
+    async def blocks(self) -> AsyncIterator[np.ndarray]:
+        try:
+            async for block in self._source.blocks():
+                yield block
+        finally:
+            self.close()
+
+    def close(self):
+        self._source.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def open_download(video_id: str, info: dict, on_progress: Optional[ProgressCallback] = None):
+    """가장 작은 적합한 오디오 포맷을 골라 디코딩 가능한 소스(blocks()/close())를 반환합니다.
+
+    on_progress(받은 바이트, 전체 바이트 또는 None)는 이벤트 루프 스레드에서 호출됩니다.
+    """
+    fmt = select_audio_format(info)
+    if fmt.get('protocol', 'https') in STREAMABLE_PROTOCOLS:
+        return DownloadAudioSource(fmt, on_progress)
+    loop = asyncio.get_running_loop()
+
+    def threadsafe_progress(downloaded, total):
+        loop.call_soon_threadsafe(on_progress, downloaded, total)
+
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    with stage_timer("download"):
+        path = await run_in_stage("download", download_fragments, video_id, info, fmt,
+                                  threadsafe_progress if on_progress else None)
+    DOWNLOAD_BYTES.inc(os.path.getsize(path))
+    return _FileAudioSource(path)
@@ -1,39 +1,161 @@
+import asyncio
+import base64
+import json
 import logging
 import time
 from datetime import datetime
-from typing import List, Dict, Optional
-import firebase_admin
-from firebase_admin import credentials, firestore
+from typing import Any, List, Dict, Optional, Set, Tuple
 from pydantic import BaseModel
 from models.video import Video, Subtitle
+from models.subtitle_track import SubtitleTrack
+from services.job_service import run_in_stage
+from services.metrics_service import FIRESTORE_SECONDS
 import os
 
 logger = logging.getLogger(__name__)
 
+STORE_BACKEND = os.getenv("LIVESUB_STORE", "firestore")  # firestore | memory
+PROGRESS_FLUSH_SECONDS = 2.0  # 진행률은 비디오당 이 간격에 최대 한 번만 기록
+# 목록 조회용 요약 문서(video_summaries)에 유지하는 필드 (자막 제외)
+SUMMARY_FIELDS = [
+    "id", "title", "youtubeUrl", "thumbnailUrl", "uploadDate",
+    "duration", "progress", "status", "detected_language"
+]
+# 자막은 비디오 문서와 분리해 시간 구간(bucket)별 컬럼형 문서로 저장
+SUBTITLE_BUCKET_SECONDS = 300
+ORIGINAL_LANGUAGE = "original"
+
 # Firebase 초기화
 try:
-    # 이미 초기화된 앱이 있는지 확인
-    if not firebase_admin._apps:
-        cred_path = os.path.join(os.path.dirname(__file__), "..", "firebase-credentials.json")
-        logger.info(f"Loading Firebase credentials from: {cred_path}")
-        if not os.path.exists(cred_path):
-            raise FileNotFoundError(f"Firebase credentials file not found at: {cred_path}")
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-    db = firestore.client()
-    logger.info("Firebase 초기화 성공")
+    if STORE_BACKEND == "memory":
+        from services.memory_store import MemoryFirestore
+        db = MemoryFirestore()
+        logger.info("인메모리 저장소 사용 (LIVESUB_STORE=memory)")
+    else:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        # 이미 초기화된 앱이 있는지 확인
+        if not firebase_admin._apps:
+            cred_path = os.path.join(os.path.dirname(__file__), "..", "firebase-credentials.json")
+            logger.info(f"Loading Firebase credentials from: {cred_path}")
+            if not os.path.exists(cred_path):
+                raise FileNotFoundError(f"Firebase credentials file not found at: {cred_path}")
+            cred = credentials.Certificate(cred_path)
+            firebase_admin.initialize_app(cred)
+        db = firestore.client()
+        logger.info("Firebase 초기화 성공")
 except Exception as e:
     logger.error(f"Firebase 초기화 실패: {str(e)}")
     raise
 
-async def get_video_from_firebase(video_id: str) -> Optional[Video]:
+def _timed(fn, *args, **kwargs):
+    # 풀 대기 시간을 빼고 호출 자체의 지연만 기록
+    with FIRESTORE_SECONDS.time(operation=getattr(fn, "__name__", "call").lstrip("_")):
+        return fn(*args, **kwargs)
+
+async def _run(fn, *args, **kwargs):
+    """블로킹 Firestore 호출을 persist 단계 풀에서 실행합니다."""
+    return await run_in_stage("persist", _timed, fn, *args, **kwargs)
+
+def _track_id(video_id: str, language: str) -> str:
+    return f"{video_id}_{language}"
+
+def _write_subtitle_track(batch, video_id: str, language: str, subtitles: List[Subtitle]) -> int:
+    """자막을 bucket별 컬럼형 문서(id/start/end/text 배열)와 매니페스트로 나눠 배치에 추가합니다."""
+    track_id = _track_id(video_id, language)
+    buckets: Dict[int, Dict[str, list]] = {}
+    max_duration = 0.0
+    for sub in sorted(subtitles, key=lambda sub: sub.startTime):
+        columns = buckets.setdefault(int(sub.startTime // SUBTITLE_BUCKET_SECONDS),
+                                     {"id": [], "start": [], "end": [], "text": []})
+        columns["id"].append(sub.id)
+        columns["start"].append(sub.startTime)
+        columns["end"].append(sub.endTime)
+        columns["text"].append(sub.text)
+        max_duration = max(max_duration, sub.endTime - sub.startTime)
+    # 이전에 저장된 bucket 중 더 이상 쓰지 않는 문서는 삭제
+    previous = db.collection('subtitle_manifests').document(track_id).get()
+    if previous.exists:
+        for bucket in set(previous.to_dict().get("buckets", [])) - set(buckets):
+            batch.delete(db.collection('subtitle_chunks').document(f"{track_id}_{bucket:05d}"))
+    for bucket, columns in buckets.items():
+        batch.set(db.collection('subtitle_chunks').document(f"{track_id}_{bucket:05d}"), {
+            "videoId": video_id,
+            "language": language,
+            "bucket": bucket,
+            **columns
+        })
+    batch.set(db.collection('subtitle_manifests').document(track_id), {
+        "videoId": video_id,
+        "language": language,
+        "count": len(subtitles),
+        "buckets": sorted(buckets),
+        "bucketSeconds": SUBTITLE_BUCKET_SECONDS,
+        "maxDuration": max_duration,
+        "updated_at": datetime.now().isoformat()
+    })
+    return len(subtitles)
+
+def _read_subtitle_track(video_id: str, language: str, start: float = 0.0,
+                         end: Optional[float] = None) -> Optional[SubtitleTrack]:
+    """[start, end) 구간에 보이는 자막만 읽습니다. 저장된 트랙이 없으면 None을 반환합니다."""
+    track_id = _track_id(video_id, language)
+    manifest_doc = db.collection('subtitle_manifests').document(track_id).get()
+    if not manifest_doc.exists:
+        return None
+    manifest = manifest_doc.to_dict()
+    bucket_seconds = manifest.get("bucketSeconds", SUBTITLE_BUCKET_SECONDS)
+    max_duration = manifest.get("maxDuration", 0.0)
+    # 앞 bucket에서 시작해 start 이후까지 이어지는 자막도 포함
+    first = int(max(start - max_duration, 0.0) // bucket_seconds)
+    last = int(end // bucket_seconds) if end is not None else None
+    ids, starts, ends, texts = [], [], [], []
+    for bucket in manifest.get("buckets", []):
+        if bucket < first or (last is not None and bucket > last):
+            continue
+        chunk = db.collection('subtitle_chunks').document(f"{track_id}_{bucket:05d}").get()
+        if chunk.exists:
+            columns = chunk.to_dict()
+            ids += columns["id"]
+            starts += columns["start"]
+            ends += columns["end"]
+            texts += columns["text"]
+    # 컬럼을 그대로 트랙으로 옮기고, 정렬된 시작 시각에서 이분 탐색으로 보이는 범위만 자름
+    return SubtitleTrack.from_columns(ids, starts, ends, texts).time_range(start, end)
+
+async def get_subtitle_range(video_id: str, start: float = 0.0, end: Optional[float] = None,
+                             language: str = ORIGINAL_LANGUAGE) -> Optional[SubtitleTrack]:
+    """시간 구간의 자막을 가져옵니다. 분리 저장 이전의 비디오는 문서 안의 자막에서 자릅니다."""
+    try:
+        track = await _run(_read_subtitle_track, video_id, language, start, end)
+        if track is not None:
+            return track
+        if language == ORIGINAL_LANGUAGE:
+            video = await get_video_from_firebase(video_id)
+            legacy = video.subtitles if video else None
+        else:
+            legacy = await get_translation(video_id, language)
+        if legacy is None:
+            return None
+        legacy = sorted(legacy, key=lambda sub: sub.startTime)
+        return SubtitleTrack.from_subtitles(legacy).time_range(start, end)
+    except Exception as e:
+        logger.error(f"Firebase에서 자막 구간 가져오기 실패: {str(e)}")
+        return None
+
+async def get_video_from_firebase(video_id: str, include_subtitles: bool = True) -> Optional[Video]:
     """Firebase에서 비디오 정보를 가져옵니다."""
     try:
         logger.info(f"Fetching video from Firebase: {video_id}")
-        doc = db.collection('videos').document(video_id).get()
+        doc = await _run(db.collection('videos').document(video_id).get)
         if doc.exists:
             data = doc.to_dict()
-            logger.info(f"Video data retrieved: {data}")
+            if logger.isEnabledFor(logging.DEBUG):
+                # 문서 전체(자막 포함)를 문자열로 만드는 비용이 크므로 DEBUG일 때만
+                logger.debug(f"Video data retrieved: {data}")
+            if include_subtitles and not data.get("subtitles"):
+                track = await _run(_read_subtitle_track, video_id, ORIGINAL_LANGUAGE)
+                data["subtitles"] = track.to_dicts() if track is not None else None
             return Video.from_dict(data)
         logger.warning(f"Video not found in Firebase: {video_id}")
         return None
@@ -41,26 +163,134 @@ async def get_video_from_firebase(video_id: str) -> Optional[Video]:
         logger.error(f"Firebase에서 비디오 가져오기 실패: {str(e)}")
         return None
 
+def _write_video(video: Video):
+    """비디오 문서와 요약 문서를 한 번의 배치로 기록합니다."""
+    data = video.to_dict()
+    batch = db.batch()
+    if video.subtitles:
+        _write_subtitle_track(batch, video.id, ORIGINAL_LANGUAGE, video.subtitles)
+        data["subtitles"] = None
+    batch.set(db.collection('videos').document(video.id), data)
+    batch.set(db.collection('video_summaries').document(video.id), {k: data.get(k) for k in SUMMARY_FIELDS})
+    batch.commit()
+
 async def save_video_to_firebase(video: Video) -> bool:
     """비디오 정보를 Firebase에 저장합니다."""
     try:
         logger.info(f"Saving video to Firebase: {video.id}")
-        db.collection('videos').document(video.id).set(video.to_dict())
+        await _run(_write_video, video)
         return True
     except Exception as e:
         logger.error(f"Firebase에 비디오 저장 실패: {str(e)}")
         return False
 
+def _update_fields(video_id: str, fields: Dict):
+    batch = db.batch()
+    batch.update(db.collection('videos').document(video_id), fields)
+    summary_fields = {k: v for k, v in fields.items() if k in SUMMARY_FIELDS}
+    if summary_fields:
+        batch.update(db.collection('video_summaries').document(video_id), summary_fields)
+    batch.commit()
+
+async def update_video_fields(video_id: str, fields: Dict) -> bool:
+    """문서 전체를 다시 쓰지 않고 지정한 필드만 갱신합니다."""
+    try:
+        await _run(_update_fields, video_id, fields)
+        return True
+    except Exception as e:
+        logger.error(f"Firebase 비디오 필드 업데이트 실패: {str(e)}")
+        return False
+
+class ProgressCoalescer:
+    """짧은 간격으로 들어오는 진행률 갱신을 비디오별로 모아 interval마다 한 번만 기록합니다."""
+
+    def __init__(self, interval: float = PROGRESS_FLUSH_SECONDS):
+        self.interval = interval
+        self._pending: Dict[str, Dict] = {}
+        self._last_write: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._inflight: Dict[str, Set[asyncio.Future]] = {}  # persist 풀에서 실행 중인 기록
+
+    async def update(self, video_id: str, fields: Dict):
+        self._pending.setdefault(video_id, {}).update(fields)
+        wait = self._last_write.get(video_id, 0.0) + self.interval - time.monotonic()
+        if wait <= 0:
+            await self.flush(video_id)
+        elif video_id not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[video_id] = loop.call_later(wait, lambda: asyncio.ensure_future(self.flush(video_id)))
+
+    async def flush(self, video_id: str):
+        timer = self._timers.pop(video_id, None)
+        if timer:
+            timer.cancel()
+        fields = self._pending.pop(video_id, None)
+        if fields:
+            self._last_write[video_id] = time.monotonic()
+            write = asyncio.ensure_future(update_video_fields(video_id, fields))
+            inflight = self._inflight.setdefault(video_id, set())
+            inflight.add(write)
+            try:
+                await write
+            finally:
+                inflight.discard(write)
+                if not inflight and self._inflight.get(video_id) is inflight:
+                    del self._inflight[video_id]
+
+    async def discard(self, video_id: str):
+        """최종 상태를 기록하기 전에 남은 진행률 갱신을 버리고, 이미 시작된 기록이 끝나기를 기다립니다.
+
+        기다리지 않으면 풀에서 늦게 끝난 진행률 기록이 최종 문서를 덮어쓸 수 있습니다.
+        """
+        timer = self._timers.pop(video_id, None)
+        if timer:
+            timer.cancel()
+        self._pending.pop(video_id, None)
+        self._last_write.pop(video_id, None)
+        inflight = self._inflight.pop(video_id, None)
+        if inflight:
+            await asyncio.gather(*inflight, return_exceptions=True)
+
+progress_coalescer = ProgressCoalescer()
+
+async def update_video_progress(video_id: str, progress: int, status: Optional[str] = None):
+    """진행률(과 상태)을 합쳐서 기록합니다."""
+    fields = {"progress": progress}
+    if status:
+        fields["status"] = status
+    await progress_coalescer.update(video_id, fields)
+
+def _add_translation(batch, video_id: str, language: str, subtitles: List[Subtitle]):
+    count = _write_subtitle_track(batch, video_id, language, subtitles)
+    batch.set(db.collection('translations').document(f"{video_id}_{language}"), {
+        "language": language,
+        "count": count,
+        "updated_at": datetime.now().isoformat()
+    })
+
 async def save_translation(video_id: str, language: str, subtitles: List[Subtitle]) -> bool:
     """번역된 자막을 Firebase에 저장합니다."""
     try:
         logger.info(f"Saving translation to Firebase: {video_id} - {language}")
-        translation_data = {
-            "language": language,
-            "subtitles": [sub.to_dict() for sub in subtitles],
-            "updated_at": datetime.now().isoformat()
-        }
-        db.collection('translations').document(f"{video_id}_{language}").set(translation_data)
+        await _run(_commit_translations, video_id, {language: subtitles})
+        return True
+    except Exception as e:
+        logger.error(f"Firebase에 번역 저장 실패: {str(e)}")
+        return False
+
+def _commit_translations(video_id: str, translations: Dict[str, List[Subtitle]]):
+    batch = db.batch()
+    for language, subtitles in translations.items():
+        _add_translation(batch, video_id, language, subtitles)
+    batch.commit()
+
+async def save_translations(video_id: str, translations: Dict[str, List[Subtitle]]) -> bool:
+    """여러 언어의 번역을 한 번의 배치 쓰기로 저장합니다."""
+    if not translations:
+        return True
+    try:
+        logger.info(f"Saving {len(translations)} translations to Firebase: {video_id}")
+        await _run(_commit_translations, video_id, translations)
         return True
     except Exception as e:
         logger.error(f"Firebase에 번역 저장 실패: {str(e)}")
@@ -70,7 +300,10 @@ async def get_translation(video_id: str, language: str) -> Optional[List[Subtitl
     """Firebase에서 번역된 자막을 가져옵니다."""
     try:
         logger.info(f"Fetching translation from Firebase: {video_id} - {language}")
-        doc = db.collection('translations').document(f"{video_id}_{language}").get()
+        track = await _run(_read_subtitle_track, video_id, language)
+        if track is not None:
+            return track.to_subtitles()
+        doc = await _run(db.collection('translations').document(f"{video_id}_{language}").get)
         if doc.exists:
             data = doc.to_dict()
             return [Subtitle.from_dict(sub) for sub in data.get("subtitles", [])]
@@ -80,28 +313,40 @@ async def get_translation(video_id: str, language: str) -> Optional[List[Subtitl
         logger.error(f"Firebase에서 번역 가져오기 실패: {str(e)}")
         return None
 
+def _delete_video(video_id: str):
+    batch = db.batch()
+    batch.delete(db.collection('videos').document(video_id))
+    batch.delete(db.collection('video_summaries').document(video_id))
+    for collection in ('subtitle_manifests', 'subtitle_chunks'):
+        for doc in db.collection(collection).where('videoId', '==', video_id).stream():
+            batch.delete(db.collection(collection).document(doc.id))
+    batch.commit()
+
 async def delete_video_from_firebase(video_id: str) -> bool:
     """Firebase에서 비디오 정보를 삭제합니다."""
     try:
         logger.info(f"Deleting video from Firebase: {video_id}")
-        db.collection('videos').document(video_id).delete()
+        await _run(_delete_video, video_id)
         return True
     except Exception as e:
         logger.error(f"Firebase에서 비디오 삭제 실패: {str(e)}")
         return False
 
+def _load_videos() -> List[Video]:
+    videos = []
+    for doc in db.collection('videos').stream():
+        data = doc.to_dict()
+        # id 필드가 없으면 doc.id로 보완
+        if "id" not in data:
+            data["id"] = doc.id
+        videos.append(Video.from_dict(data))
+    return videos
+
 async def get_cached_videos() -> List[Video]:
     """Firebase에서 캐시된 비디오 목록을 가져옵니다."""
     try:
         logger.info("Fetching cached videos from Firebase")
-        videos = []
-        docs = db.collection('videos').stream()
-        for doc in docs:
-            data = doc.to_dict()
-            # id 필드가 없으면 doc.id로 보완
-            if "id" not in data:
-                data["id"] = doc.id
-            videos.append(Video.from_dict(data))
+        videos = await _run(_load_videos)
         logger.info(f"Retrieved {len(videos)} videos from Firebase")
         return videos
     except Exception as e:
@@ -112,8 +357,78 @@ async def update_video_cache(video: Video) -> bool:
     """비디오 캐시를 업데이트합니다."""
     try:
         logger.info(f"Updating video cache in Firebase: {video.id}")
-        db.collection('videos').document(video.id).set(video.to_dict())
+        # 남아 있던 진행률 갱신이 최종 문서를 덮어쓰지 않도록 먼저 버리고 진행 중인 기록을 기다림
+        await progress_coalescer.discard(video.id)
+        await _run(_write_video, video)
         return True
     except Exception as e:
         logger.error(f"Firebase 비디오 캐시 업데이트 실패: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """목록 커서를 해석합니다. 형식이 잘못되면 ValueError를 던집니다."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, dict) or "uploadDate" not in values or "id" not in values:
+        raise ValueError("Invalid cursor")
+    return values
+
+def _query_summaries(limit: int, cursor: Optional[Dict], status: Optional[str],
+                     fields: Optional[List[str]]) -> Tuple[List[Dict], Optional[str]]:
+    query = db.collection('video_summaries')
+    if status:
+        query = query.where('status', '==', status)
+    query = query.order_by('uploadDate', direction="DESCENDING").order_by('id', direction="DESCENDING")
+    if cursor:
+        query = query.start_after(cursor)
+    if fields:
+        # 커서 계산에 필요한 필드는 항상 포함
+        query = query.select(sorted(set(fields) | {"id", "uploadDate"}))
+    docs = [doc.to_dict() for doc in query.limit(limit + 1).stream()]
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor({"uploadDate": last["uploadDate"], "id": last["id"]})
+    if fields:
+        docs = [{k: v for k, v in doc.items() if k in fields} for doc in docs]
+    return docs, next_cursor
+
+async def list_video_summaries(limit: int = 20, cursor: Optional[str] = None, status: Optional[str] = None,
+                               fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """요약 문서에서 uploadDate 내림차순으로 한 페이지를 가져옵니다."""
+    cursor_values = decode_cursor(cursor) if cursor else None
+    if fields:
+        fields = [f for f in fields if f in SUMMARY_FIELDS]
+    items, next_cursor = await _run(_query_summaries, limit, cursor_values, status, fields)
+    return {"items": items, "nextCursor": next_cursor}
+
+def _backfill_summaries() -> int:
+    if list(db.collection('video_summaries').limit(1).stream()):
+        return 0
+    count = 0
+    batch = db.batch()
+    for doc in db.collection('videos').select(SUMMARY_FIELDS).stream():
+        data = doc.to_dict()
+        data.setdefault("id", doc.id)
+        batch.set(db.collection('video_summaries').document(doc.id), {k: data.get(k) for k in SUMMARY_FIELDS})
+        count += 1
+        if count % 400 == 0:  # Firestore 배치 최대 500건
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return count
+
+async def ensure_video_summaries():
+    """요약 문서가 하나도 없으면 기존 비디오 문서로부터 한 번 채웁니다."""
+    try:
+        count = await _run(_backfill_summaries)
+        if count:
+            logger.info(f"Backfilled {count} video summaries")
+    except Exception as e:
+        logger.error(f"비디오 요약 생성 실패: {str(e)}")
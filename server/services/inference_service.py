@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import AsyncIterator, List, Optional, Tuple
+import numpy as np
+from services.model_service import DEFAULT_MODEL
+
+logger = logging.getLogger(__name__)
+
+# 추론 워커 프로세스 수. 0이면 API 프로세스 안의 transcribe 단계 풀에서 디코딩합니다.
+INFERENCE_WORKERS = int(os.getenv("LIVESUB_INFERENCE_WORKERS", "0"))
+# 워커당 torch intra-op 스레드 수 (기본: 코어 수를 워커 수로 나눈 값)
+TORCH_THREADS = int(os.getenv("LIVESUB_TORCH_THREADS", "0"))
+
+def _init_worker(threads: int):
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # 이미 병렬 작업이 시작된 경우
+    logger.info(f"Inference worker {os.getpid()} started ({threads} torch threads)")
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """부모가 만든 공유 메모리에 붙습니다. 해제(unlink)는 부모가 담당하므로 워커에서는 추적하지 않습니다."""
+    shm = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+def _shared_audio_call(fn_name: str, shm_name: str, length: int, *args):
+    """공유 메모리의 float32 오디오를 복사 없이 numpy 배열로 보고 transcription_service 함수를 호출합니다."""
+    from services import transcription_service
+
+    shm = _attach(shm_name)
+    audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+    try:
+        return getattr(transcription_service, fn_name)(audio, *args)
+    finally:
+        del audio
+        try:
+            shm.close()
+        except BufferError:
+            pass  # 예외 traceback이 아직 배열을 참조하는 경우, 매핑은 GC 때 해제됨
+
+def _warm_worker(model_name: str) -> int:
+    from services.model_service import get_model
+
+    get_model(model_name)
+    return os.getpid()
+
+class SharedAudio:
+    """오디오 버퍼를 공유 메모리에 한 번 복사해 워커들이 이름으로 접근하도록 합니다."""
+
+    def __init__(self, audio: np.ndarray):
+        self.length = len(audio)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        np.ndarray((self.length,), dtype=np.float32, buffer=self.shm.buf)[:] = audio
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def release(self):
+        self.shm.close()
+        self.shm.unlink()
+
+class InferencePool:
+    """각자 Whisper 모델을 가진 워커 프로세스 풀.
+
+    오디오는 공유 메모리로 넘기고 (pickle 없음), 윈도우 배치를 워커 수에 맞게 잘라 나눠 주므로
+    긴 영상 하나도 모든 워커를 사용합니다.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, torch_threads: int = TORCH_THREADS):
+        self.workers = workers
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // workers)
+        # torch는 fork 이후 안전하지 않으므로 spawn 사용
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.torch_threads,),
+        )
+
+    async def _call(self, fn_name: str, shared: SharedAudio, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _shared_audio_call, fn_name, shared.name, shared.length, *args)
+
+    async def warm_up(self, model_name: str = DEFAULT_MODEL) -> List[int]:
+        """모든 워커에 모델을 미리 올립니다 (로드가 오래 걸려 작업이 워커마다 하나씩 분배됨)."""
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _warm_worker, model_name) for _ in range(self.workers)
+        ))
+        return sorted(set(pids))
+
+    async def detect_language(self, audio: np.ndarray, windows, model_name: str = DEFAULT_MODEL) -> Tuple[str, float]:
+        shared = SharedAudio(audio)
+        try:
+            return await self._call("_detect_windows_language", shared, windows, model_name)
+        finally:
+            shared.release()
+
+    async def decode_windows(self, audio: np.ndarray, windows, language, sample_rate: int, base_offset: int,
+                             max_batch: int, model_name: str = DEFAULT_MODEL,
+                             config=None) -> AsyncIterator[Tuple[list, Optional[list]]]:
+        """윈도우를 워커들에 나눠 동시에 디코딩하고, 결과는 원래 순서대로 (배치, 구간 또는 실패 시 None)으로 내보냅니다."""
+        if not windows:
+            return
+        batch_size = max(1, min(max_batch, math.ceil(len(windows) / self.workers)))
+        batches = [windows[i:i + batch_size] for i in range(0, len(windows), batch_size)]
+        shared = SharedAudio(audio)
+        tasks = [
+            asyncio.ensure_future(self._call("_decode_batch", shared, batch, language, sample_rate, base_offset, model_name, config))
+            for batch in batches
+        ]
+        try:
+            for batch, task in zip(batches, tasks):
+                try:
+                    yield batch, await task
+                except Exception as e:
+                    logger.error(f"Inference worker error at {(base_offset + batch[0][0]) / sample_rate:.2f}s: {e}")
+                    yield batch, None
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # 이미 붙어 있는 워커의 매핑은 unlink 후에도 유지되므로 바로 해제해도 안전
+            shared.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_pool: Optional[InferencePool] = None
+
+def get_inference_pool() -> Optional[InferencePool]:
+    """LIVESUB_INFERENCE_WORKERS > 0 이면 워커 풀을, 아니면 None을 반환합니다."""
+    global _pool
+    if _pool is None and INFERENCE_WORKERS > 0:
+        _pool = InferencePool()
+    return _pool
+
+def set_inference_pool(pool: Optional[InferencePool]):
+    """워커 풀을 교체합니다 (벤치마크 등)."""
+    global _pool
+    _pool = pool
+
+def shutdown_inference_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
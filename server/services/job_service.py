@@ -0,0 +1,488 @@
+import asyncio
+import functools
+import heapq
+import ipaddress
+import itertools
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pydantic import BaseModel
+from services.metrics_service import STAGE_POOL_ACTIVE, STAGE_POOL_WAIT_SECONDS, STAGE_POOL_WAITING
+
+logger = logging.getLogger(__name__)
+
+# 단계별 기본 동시 실행 수 (LIVESUB_<STAGE>_WORKERS 환경 변수로 변경)
+DEFAULT_STAGE_WORKERS = {
+    "download": 2,
+    "decode": 2,
+    "transcribe": 1,  # Whisper 모델 하나를 공유하므로 1
+    "translate": 4,
+    "persist": 8,  # Firestore 호출
+}
+MAX_CONCURRENT_JOBS = int(os.getenv("LIVESUB_MAX_CONCURRENT_JOBS", "4"))
+MAX_ATTEMPTS = int(os.getenv("LIVESUB_JOB_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF_SECONDS = 5
+# 수락 제어: 대기+실행 중 작업 수 상한 (전체/클라이언트별). 넘으면 429 + Retry-After
+MAX_ACTIVE_JOBS = int(os.getenv("LIVESUB_MAX_ACTIVE_JOBS", "64"))
+MAX_JOBS_PER_CLIENT = int(os.getenv("LIVESUB_MAX_JOBS_PER_CLIENT", "4"))
+# 클라이언트별 상한은 접속 주소 기준. 리버스 프록시 뒤에서는 모든 요청이 프록시 주소로 보이므로
+# 프록시 주소/대역을 쉼표로 지정하면 그 프록시가 붙인 X-Forwarded-For의 주소를 씀
+TRUSTED_PROXIES = [ipaddress.ip_network(value.strip(), strict=False)
+                   for value in os.getenv("LIVESUB_TRUSTED_PROXIES", "").split(",") if value.strip()]
+# 스케줄링: 비용(오디오 초)이 작은 작업 먼저. 대기 1초마다 비용을 이만큼 깎아 긴 작업도 결국 실행됨.
+# 1.0이면 대기 시간이 비용과 같은 단위로 쌓여 과부하에서 FIFO에 가까워짐 (benchmarks/scheduler_simulation.py)
+AGING_RATE = float(os.getenv("LIVESUB_SCHEDULER_AGING_RATE", "0.05"))
+DEFAULT_JOB_COST = 600.0  # 길이를 모를 때 (10분 영상으로 봄)
+DEFAULT_SECONDS_PER_COST = 0.5  # 오디오 1초 처리에 걸리는 시간 초기 추정치 (완료된 작업으로 갱신)
+RETRY_AFTER_MAX_SECONDS = 600
+JOB_DB_PATH = os.getenv("LIVESUB_JOB_DB", os.path.join(os.path.dirname(__file__), "..", "jobs.db"))
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def resolve_client_id(peer: Optional[str], forwarded_for: Optional[str] = None) -> Optional[str]:
+    """수락 제어에 쓸 클라이언트 주소를 정합니다.
+
+    접속 주소가 신뢰하는 프록시일 때만 X-Forwarded-For를 오른쪽부터 읽어 신뢰하는 프록시가 아닌
+    첫 주소를 씁니다 (왼쪽 값은 클라이언트가 마음대로 넣을 수 있음). 그 외에는 접속 주소를 그대로 씁니다.
+    """
+    if not peer or not forwarded_for or not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+class Job(BaseModel):
+    id: str
+    video_id: str
+    youtube_url: str
+    target_langs: List[str]
+    options: Dict[str, Any] = {}  # 처리 함수에 키워드 인자로 전달 (예: quality)
+    cost: float = DEFAULT_JOB_COST  # 예상 비용 (오디오 길이, 초)
+    client_id: Optional[str] = None
+    status: str  # queued | running | completed | failed | cancelled
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "videoId": self.video_id,
+            "youtubeUrl": self.youtube_url,
+            "targetLangs": self.target_langs,
+            "options": self.options,
+            "cost": self.cost,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "createdAt": self.created_at.isoformat(),
+            "updatedAt": self.updated_at.isoformat()
+        }
+
+class JobStore(ABC):
+    """작업을 영구 저장하는 백엔드 인터페이스."""
+
+    @abstractmethod
+    def add(self, job: Job) -> None: ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]: ...
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> None: ...
+
+    @abstractmethod
+    def list_by_status(self, statuses: List[str]) -> List[Job]: ...
+
+class SQLiteJobStore(JobStore):
+    """로컬 실행용 SQLite 작업 저장소."""
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    youtube_url TEXT NOT NULL,
+                    target_langs TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "options" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN options TEXT NOT NULL DEFAULT '{}'")
+            if "cost" not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN cost REAL NOT NULL DEFAULT {DEFAULT_JOB_COST}")
+            if "client_id" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN client_id TEXT")
+
+    @staticmethod
+    def _row_to_job(row) -> Job:
+        data = dict(row)
+        data["target_langs"] = json.loads(data["target_langs"])
+        data["options"] = json.loads(data.get("options") or "{}")
+        return Job(**data)
+
+    def add(self, job: Job) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, video_id, youtube_url, target_langs, status, attempts, error,"
+                " created_at, updated_at, options, cost, client_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.video_id, job.youtube_url, json.dumps(job.target_langs), job.status,
+                 job.attempts, job.error, job.created_at.isoformat(), job.updated_at.isoformat(),
+                 json.dumps(job.options), job.cost, job.client_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = datetime.now().isoformat()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def list_by_status(self, statuses: List[str]) -> List[Job]:
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at", statuses
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+class StagePools:
+    """파이프라인 단계별 실행기와 동시 실행 제한을 관리합니다.
+
+    LIVESUB_<STAGE>_EXECUTOR=process 로 설정하면 프로세스 풀을 사용합니다.
+    이 경우 해당 단계에 넘기는 함수와 인자는 pickle 가능해야 합니다.
+    """
+
+    def __init__(self, workers: Dict[str, int] = DEFAULT_STAGE_WORKERS):
+        self._executors: Dict[str, Executor] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        for stage, default in workers.items():
+            n = int(os.getenv(f"LIVESUB_{stage.upper()}_WORKERS", str(default)))
+            kind = os.getenv(f"LIVESUB_{stage.upper()}_EXECUTOR", "thread")
+            if kind == "process":
+                self._executors[stage] = ProcessPoolExecutor(max_workers=n)
+            else:
+                self._executors[stage] = ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"livesub-{stage}")
+            self._semaphores[stage] = asyncio.Semaphore(n)
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs):
+        """블로킹 함수를 해당 단계의 풀에서 실행합니다."""
+        loop = asyncio.get_running_loop()
+        queued = time.perf_counter()
+        STAGE_POOL_WAITING.inc(pool=stage)
+        try:
+            await self._semaphores[stage].acquire()
+        finally:
+            STAGE_POOL_WAITING.dec(pool=stage)
+        STAGE_POOL_WAIT_SECONDS.observe(time.perf_counter() - queued, pool=stage)
+        STAGE_POOL_ACTIVE.inc(pool=stage)
+        try:
+            return await loop.run_in_executor(self._executors[stage], functools.partial(fn, *args, **kwargs))
+        finally:
+            STAGE_POOL_ACTIVE.dec(pool=stage)
+            self._semaphores[stage].release()
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+stage_pools = StagePools()
+
+async def run_in_stage(stage: str, fn: Callable, *args, **kwargs):
+    return await stage_pools.run(stage, fn, *args, **kwargs)
+
+JobHandler = Callable[..., Awaitable[object]]  # (video_id, youtube_url, target_langs, **options)
+PositionCallback = Callable[[str, int, int], None]  # (video_id, 대기 순번 (0이면 시작됨), 대기 작업 수)
+
+class AdmissionRejected(Exception):
+    """동시 작업 상한에 걸려 작업을 받지 않을 때. retry_after는 다시 시도할 때까지 기다릴 초."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class JobQueue:
+    """비용이 작은 작업을 먼저 꺼내되 오래 기다린 작업일수록 앞당깁니다 (SJF + aging).
+
+    우선순위 cost - aging_rate * (now - enqueued_at)에서 now 항은 모든 작업에 같으므로
+    cost + aging_rate * enqueued_at으로 힙에 넣으면 시간이 지나도 순서를 다시 계산할 필요가 없습니다.
+    넣기/꺼내기는 O(log n)이고, 취소된 작업은 꺼낼 때 건너뜁니다.
+    """
+
+    def __init__(self, aging_rate: float = AGING_RATE, clock: Callable[[], float] = time.time):
+        self.aging_rate = aging_rate
+        self.clock = clock
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._seq = itertools.count()
+        self._nonempty = asyncio.Event()
+
+    def put(self, job_id: str, cost: float, enqueued_at: Optional[float] = None):
+        self.remove(job_id)
+        enqueued_at = self.clock() if enqueued_at is None else enqueued_at
+        entry = [cost + self.aging_rate * enqueued_at, next(self._seq), job_id]
+        self._entries[job_id] = entry
+        heapq.heappush(self._heap, entry)
+        self._nonempty.set()
+
+    def remove(self, job_id: str) -> bool:
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return False
+        entry[2] = None
+        return True
+
+    async def get(self) -> str:
+        while True:
+            while self._heap and self._heap[0][2] is None:
+                heapq.heappop(self._heap)
+            if self._heap:
+                job_id = heapq.heappop(self._heap)[2]
+                del self._entries[job_id]
+                return job_id
+            self._nonempty.clear()
+            await self._nonempty.wait()
+
+    def positions(self) -> Dict[str, int]:
+        """작업별 대기 순번 (1부터). 대기 작업 수 n에 대해 O(n log n)."""
+        ordered = sorted(self._entries.values())
+        return {entry[2]: position for position, entry in enumerate(ordered, 1)}
+
+    def qsize(self) -> int:
+        return len(self._entries)
+
+class JobManager:
+    """저장된 작업을 동시 실행 수 제한 안에서 짧은 작업부터 처리하고, 실패 시 재시도합니다.
+
+    대기+실행 중 작업 수가 전체/클라이언트별 상한을 넘으면 submit()이 AdmissionRejected를 던집니다.
+    대기 순번이 바뀌면 on_position(video_id, 순번, 대기 작업 수)으로 알립니다.
+    """
+
+    def __init__(self, store: JobStore, handler: JobHandler,
+                 max_concurrent: int = MAX_CONCURRENT_JOBS, max_attempts: int = MAX_ATTEMPTS,
+                 max_active: int = MAX_ACTIVE_JOBS, max_per_client: int = MAX_JOBS_PER_CLIENT,
+                 aging_rate: float = AGING_RATE, on_position: Optional[PositionCallback] = None,
+                 clock: Callable[[], float] = time.time):
+        self.store = store
+        self.handler = handler
+        self.max_attempts = max_attempts
+        self.max_active = max_active
+        self.max_per_client = max_per_client
+        self.on_position = on_position
+        self._clock = clock  # 시뮬레이션에서는 가상 시계를 넣음
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._queue = JobQueue(aging_rate, clock)
+        self._running: Dict[str, asyncio.Task] = {}
+        self._active: Dict[str, Job] = {}  # 대기/실행 중 (수락 제어와 중복 확인용)
+        self._enqueued_at: Dict[str, float] = {}  # 재시도해도 처음 넣은 시각 기준으로 aging
+        self._started: Dict[str, float] = {}
+        self._positions: Dict[str, int] = {}
+        self._seconds_per_cost = DEFAULT_SECONDS_PER_COST
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """중단된 작업을 다시 큐에 넣고 디스패처를 시작합니다."""
+        for job in self.store.list_by_status(["queued", "running"]):
+            if job.status == "running":
+                self.store.update(job.id, status="queued")
+            logger.info(f"Re-queueing job {job.id} ({job.status})")
+            self._active[job.id] = job
+            # 처음 제출한 시각 기준으로 aging을 이어감
+            self._enqueued_at[job.id] = job.created_at.timestamp()
+            self._queue.put(job.id, job.cost, self._enqueued_at[job.id])
+        self._publish_positions()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+
+    def find_duplicate(self, client_id: Optional[str], youtube_url: str, target_langs: List[str],
+                       options: Optional[Dict[str, Any]] = None) -> Optional[Job]:
+        """같은 클라이언트가 같은 조건으로 이미 제출해 대기/실행 중인 작업."""
+        for job in self._active.values():
+            if (job.client_id == client_id and job.youtube_url == youtube_url
+                    and job.target_langs == target_langs and job.options == (options or {})):
+                return job
+        return None
+
+    def check_admission(self, client_id: Optional[str]):
+        """상한에 걸리면 AdmissionRejected를 던집니다. 메타데이터 조회 전에 빠르게 거절할 때 씁니다."""
+        if len(self._active) >= self.max_active:
+            raise AdmissionRejected("Server is at capacity", self._retry_after(list(self._running)))
+        if client_id is not None:
+            mine = [job_id for job_id, job in self._active.items() if job.client_id == client_id]
+            if len(mine) >= self.max_per_client:
+                raise AdmissionRejected("Too many jobs in progress for this client", self._retry_after(mine))
+
+    def _remaining(self, job_id: str) -> float:
+        """작업이 끝날 때까지 남은 예상 시간. 대기 중이면 실행 시간 전체."""
+        estimate = self._active[job_id].cost * self._seconds_per_cost
+        started = self._started.get(job_id)
+        return estimate - (self._clock() - started) if started is not None else estimate
+
+    def _retry_after(self, blocking: List[str]) -> int:
+        """막고 있는 작업 중 가장 먼저 끝날 작업의 예상 남은 시간."""
+        remaining = [self._remaining(job_id) for job_id in blocking if job_id in self._active]
+        if not remaining:
+            return 1
+        return int(min(max(math.ceil(min(remaining)), 1), RETRY_AFTER_MAX_SECONDS))
+
+    async def submit(self, video_id: str, youtube_url: str, target_langs: List[str],
+                     options: Optional[Dict[str, Any]] = None, cost: Optional[float] = None,
+                     client_id: Optional[str] = None) -> Job:
+        self.check_admission(client_id)
+        now = datetime.now()
+        job = Job(
+            id=str(uuid.uuid4()),
+            video_id=video_id,
+            youtube_url=youtube_url,
+            target_langs=target_langs,
+            options=options or {},
+            cost=DEFAULT_JOB_COST if cost is None else cost,
+            client_id=client_id,
+            status="queued",
+            created_at=now,
+            updated_at=now
+        )
+        self.store.add(job)
+        self._active[job.id] = job
+        self._enqueued_at[job.id] = self._clock()
+        self._queue.put(job.id, job.cost, self._enqueued_at[job.id])
+        self._publish_positions()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def queue_position(self, job_id: str) -> int:
+        """대기 순번 (1부터). 실행 중이거나 대기 중이 아니면 0."""
+        return self._queue.positions().get(job_id, 0)
+
+    def running_count(self) -> int:
+        return len(self._running)
+
+    def active_video_ids(self) -> List[str]:
+        """대기 중이거나 실행 중인 작업의 비디오 ID."""
+        return [job.video_id for job in self.store.list_by_status(["queued", "running"])]
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.store.get(job_id)
+        if not job or job.status not in ("queued", "running"):
+            return False
+        self.store.update(job_id, status="cancelled")
+        self._active.pop(job_id, None)
+        self._enqueued_at.pop(job_id, None)
+        if self._queue.remove(job_id):
+            self._publish_positions()
+        task = self._running.get(job_id)
+        if task:
+            task.cancel()
+        return True
+
+    def _publish_positions(self):
+        """순번이 바뀐 대기 작업에만 알립니다 (시작된 작업은 순번 0)."""
+        if self.on_position is None:
+            return
+        positions = self._queue.positions()
+        queued = len(positions)
+        for job_id, position in positions.items():
+            if self._positions.get(job_id) != position:
+                self.on_position(self._active[job_id].video_id, position, queued)
+        for job_id in self._positions.keys() - positions.keys():
+            if job_id in self._active:
+                self.on_position(self._active[job_id].video_id, 0, queued)
+        self._positions = positions
+
+    async def _dispatch(self):
+        while True:
+            # 슬롯이 빈 뒤에 꺼내야 그 사이 들어온 짧은 작업이 먼저 선택됨
+            await self._slots.acquire()
+            job_id = await self._queue.get()
+            job = self.store.get(job_id)
+            if not job or job.status != "queued":
+                self._slots.release()
+                self._publish_positions()
+                continue
+            self._started[job_id] = self._clock()
+            self._running[job_id] = asyncio.create_task(self._run(job))
+            self._publish_positions()
+
+    def _observe_duration(self, job: Job):
+        """완료된 작업의 처리 시간으로 오디오 1초당 처리 시간 추정치를 갱신합니다 (Retry-After 계산용)."""
+        started = self._started.get(job.id)
+        if started is not None and job.cost > 0:
+            observed = (self._clock() - started) / job.cost
+            self._seconds_per_cost = 0.8 * self._seconds_per_cost + 0.2 * observed
+
+    async def _run(self, job: Job):
+        attempts = job.attempts + 1
+        requeued = False
+        try:
+            self.store.update(job.id, status="running", attempts=attempts)
+            result = await self.handler(job.video_id, job.youtube_url, job.target_langs, **job.options)
+            if result is None:
+                raise RuntimeError("Video processing failed")
+            self.store.update(job.id, status="completed", error=None)
+            self._observe_duration(job)
+        except asyncio.CancelledError:
+            logger.info(f"Job cancelled: {job.id}")
+        except Exception as e:
+            logger.error(f"작업 실패 ({job.id}, {attempts}/{self.max_attempts}): {str(e)}")
+            if attempts < self.max_attempts:
+                self.store.update(job.id, status="queued", error=str(e))
+                requeued = True
+                asyncio.get_running_loop().call_later(
+                    RETRY_BACKOFF_SECONDS * attempts, self._requeue, job
+                )
+            else:
+                self.store.update(job.id, status="failed", error=str(e))
+        finally:
+            self._running.pop(job.id, None)
+            self._started.pop(job.id, None)
+            if not requeued:
+                self._active.pop(job.id, None)
+                self._enqueued_at.pop(job.id, None)
+            self._slots.release()
+
+    def _requeue(self, job: Job):
+        if job.id in self._active:
+            self._queue.put(job.id, job.cost, self._enqueued_at[job.id])
+            self._publish_positions()
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from fastapi import WebSocket
+from services.audio_service import FfmpegPipeDecoder
+from services.job_service import run_in_stage
+from services.model_service import QUALITY_TIERS
+from services.transcription_service import (
+    BEAM_SIZE,
+    SAMPLE_RATE,
+    VAD_PADDING_MS,
+    WINDOW_SECONDS,
+    decode_window,
+    preprocess_block,
+)
+from services.vad_service import create_vad, speech_mask, to_pcm16
+
+logger = logging.getLogger(__name__)
+
+# 실시간 전사 세션 설정 (LIVESUB_LIVE_* 환경 변수로 변경)
+LATENCY_BUDGET_MS = int(os.getenv("LIVESUB_LIVE_LATENCY_BUDGET_MS", "2000"))
+PARTIAL_INTERVAL_MS = int(os.getenv("LIVESUB_LIVE_PARTIAL_INTERVAL_MS", "500"))
+ENDPOINT_SILENCE_MS = int(os.getenv("LIVESUB_LIVE_ENDPOINT_SILENCE_MS", "600"))
+MAX_PENDING_CHUNKS = int(os.getenv("LIVESUB_LIVE_MAX_PENDING_CHUNKS", "32"))
+LIVE_MODEL = os.getenv("LIVESUB_LIVE_MODEL", QUALITY_TIERS["balanced"])
+FRAME_MS = 30
+MIN_UTTERANCE_MS = 300
+PROMPT_CHARS = 200  # 이전 확정 자막을 다음 디코딩의 문맥으로 넘기는 길이
+PCM_ENCODINGS = {"pcm_s16le": (np.int16, 32768.0), "pcm_f32le": (np.float32, 1.0)}
+
+def _common_prefix(a: List[int], b: List[int]) -> List[int]:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return a[:n]
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 1) if values else None
+
+class LiveSession:
+    """한 WebSocket 연결의 실시간 전사 상태.
+
+    들어온 오디오에 대해 VAD를 프레임 단위로 이어서 실행하고, 발화 중에는 발화 시작부터 현재까지의
+    윈도우를 주기적으로 빠르게(greedy) 디코딩해 partial을, 발화가 끝나면 beam으로 다시 디코딩해 final을 보냅니다.
+    연속된 두 partial이 일치하는 토큰은 확정된 prefix로 다음 디코딩에 넘겨 다시 생성하지 않습니다.
+    """
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]], language: Optional[str] = None,
+                 latency_budget_ms: int = LATENCY_BUDGET_MS):
+        self.id = str(uuid.uuid4())
+        self.send = send
+        self.language = language
+        self.latency_budget = latency_budget_ms / 1000
+        self.frame_len = SAMPLE_RATE * FRAME_MS // 1000
+        self.padding = SAMPLE_RATE * VAD_PADDING_MS // 1000
+        self.endpoint_silence = SAMPLE_RATE * ENDPOINT_SILENCE_MS // 1000
+        self.max_utterance = SAMPLE_RATE * (WINDOW_SECONDS - 1)
+        self.partial_interval = SAMPLE_RATE * PARTIAL_INTERVAL_MS // 1000
+        # buffer[0]은 세션 전체 기준 buffer_offset 번째 샘플
+        self.buffer = np.zeros(0, dtype=np.int16)
+        self.buffer_offset = 0
+        self.vad_position = 0  # VAD를 마친 샘플 위치 (세션 기준)
+        self.vad = create_vad(3)  # 세션 전체가 하나의 스트림이므로 상태를 이어감
+        self.arrivals = deque()  # (세션 기준 끝 샘플, 도착 시각)
+        self.speech_start: Optional[int] = None
+        self.last_speech_end = 0
+        self.last_final_end = 0
+        self.last_partial_at = 0
+        self.hypothesis: List[int] = []
+        self.committed: List[int] = []
+        self.context = ""
+        self.next_id = 0
+        self.latencies = {"partial": [], "final": []}
+        self.skipped_partials = 0
+
+    @property
+    def total_samples(self) -> int:
+        return self.buffer_offset + len(self.buffer)
+
+    def _arrival_time(self, sample: int) -> float:
+        for end, arrived_at in self.arrivals:
+            if end >= sample:
+                return arrived_at
+        return time.monotonic()
+
+    def _lag(self) -> float:
+        """가장 최근에 받은 오디오가 도착한 뒤 흐른 시간 (처리가 밀린 정도)."""
+        return time.monotonic() - self.arrivals[-1][1] if self.arrivals else 0.0
+
+    def _audio(self, start: int, end: int) -> np.ndarray:
+        return self.buffer[start - self.buffer_offset:end - self.buffer_offset].astype(np.float32) / 32767
+
+    async def feed(self, samples: np.ndarray, arrived_at: float):
+        """16kHz float32 샘플을 추가하고 필요한 partial/final을 보냅니다."""
+        self.buffer = np.concatenate((self.buffer, to_pcm16(preprocess_block(samples))))
+        self.arrivals.append((self.total_samples, arrived_at))
+        await self._advance_vad()
+        if self.speech_start is None:
+            return
+        if self.total_samples - self.last_partial_at < self.partial_interval:
+            return
+        if self._lag() > self.latency_budget / 2:
+            # 처리가 밀리면 partial을 건너뛰고 final에 집중
+            self.skipped_partials += 1
+            return
+        await self._partial()
+
+    async def _advance_vad(self):
+        frames_end = self.vad_position + (self.total_samples - self.vad_position) // self.frame_len * self.frame_len
+        if frames_end <= self.vad_position:
+            return
+        pcm = self.buffer[self.vad_position - self.buffer_offset:frames_end - self.buffer_offset]
+        mask = await run_in_stage("decode", speech_mask, pcm, SAMPLE_RATE, vad=self.vad)
+        for i, is_speech in enumerate(mask.tolist()):
+            frame_start = self.vad_position + i * self.frame_len
+            frame_end = frame_start + self.frame_len
+            if is_speech:
+                if self.speech_start is None:
+                    self.speech_start = max(frame_start - self.padding, self.buffer_offset, self.last_final_end)
+                    self.last_partial_at = frame_start
+                self.last_speech_end = frame_end
+            elif self.speech_start is not None and frame_end - self.last_speech_end >= self.endpoint_silence:
+                await self._finalize(min(self.last_speech_end + self.padding, frame_end))
+            if self.speech_start is not None and frame_end - self.speech_start >= self.max_utterance:
+                await self._finalize(frame_end)
+        self.vad_position = frames_end
+        if self.speech_start is None:
+            self._trim(max(self.vad_position - self.padding, self.buffer_offset))
+
+    def _trim(self, keep_from: int):
+        """더 이상 필요 없는 앞부분 오디오와 도착 기록을 버립니다."""
+        drop = keep_from - self.buffer_offset
+        if drop > 0:
+            self.buffer = self.buffer[drop:]
+            self.buffer_offset = keep_from
+        while len(self.arrivals) > 1 and self.arrivals[0][0] < self.buffer_offset:
+            self.arrivals.popleft()
+
+    async def _partial(self):
+        start, end = self.speech_start, self.total_samples
+        self.last_partial_at = end
+        started = time.monotonic()
+        result = await run_in_stage(
+            "transcribe", decode_window, self._audio(start, end), self.language,
+            None, self.committed, self.context[-PROMPT_CHARS:], False, LIVE_MODEL
+        )
+        elapsed = time.monotonic() - started
+        # 디코딩이 오래 걸리면 partial 간격을 넓혀 예산 안에 머무름
+        self.partial_interval = max(SAMPLE_RATE * PARTIAL_INTERVAL_MS // 1000, int(2 * elapsed * SAMPLE_RATE))
+        if self.speech_start != start:
+            return  # 디코딩하는 동안 발화가 확정됨
+        tokens = self.committed + result["tokens"]
+        # LocalAgreement: 연속된 두 가설이 일치하는 앞부분만 확정
+        self.committed = _common_prefix(self.hypothesis, tokens)
+        self.hypothesis = tokens
+        latency = (time.monotonic() - self._arrival_time(end)) * 1000
+        self.latencies["partial"].append(latency)
+        await self.send({
+            "type": "partial",
+            "startTime": start / SAMPLE_RATE,
+            "endTime": end / SAMPLE_RATE,
+            "text": result["text"],
+            "stableTokens": len(self.committed),
+            "latencyMs": round(latency, 1),
+        })
+
+    async def _finalize(self, end: int):
+        start = self.speech_start
+        self.speech_start = None
+        self.last_final_end = end
+        self.hypothesis, self.committed = [], []
+        if end - start < SAMPLE_RATE * MIN_UTTERANCE_MS // 1000:
+            return
+        result = await run_in_stage(
+            "transcribe", decode_window, self._audio(start, end), self.language,
+            BEAM_SIZE, None, self.context[-PROMPT_CHARS:], True, LIVE_MODEL
+        )
+        if self.language is None:
+            self.language = result["language"]
+        if result["no_speech_prob"] > 0.6 and result["avg_logprob"] < -1.0:
+            return
+        latency = (time.monotonic() - self._arrival_time(end)) * 1000
+        offset = start / SAMPLE_RATE
+        for seg_start, seg_end, text in result["segments"] or [(0.0, (end - start) / SAMPLE_RATE, result["text"])]:
+            if not text:
+                continue
+            self.latencies["final"].append(latency)
+            await self.send({
+                "type": "final",
+                "id": str(self.next_id),
+                "startTime": offset + seg_start,
+                "endTime": offset + seg_end,
+                "text": text,
+                "language": self.language,
+                "latencyMs": round(latency, 1),
+            })
+            self.next_id += 1
+            self.context += " " + text
+
+    async def flush(self):
+        """스트림이 끝나면 진행 중인 발화를 확정합니다."""
+        if self.speech_start is not None:
+            await self._finalize(self.total_samples)
+
+    def stats(self) -> Dict:
+        return {
+            "type": "stats",
+            "session": self.id,
+            "audioSeconds": round(self.total_samples / SAMPLE_RATE, 2),
+            "captions": self.next_id,
+            "skippedPartials": self.skipped_partials,
+            **{
+                f"{kind}LatencyMs": {"p50": _percentile(v, 50), "p90": _percentile(v, 90), "p99": _percentile(v, 99)}
+                for kind, v in self.latencies.items()
+            },
+        }
+
+async def _receive_audio(websocket: WebSocket, config: dict, queue: asyncio.Queue):
+    """소켓에서 오디오를 받아 큐에 넣습니다. 큐가 차면 수신을 멈춰 클라이언트 쪽으로 백프레셔를 전달합니다."""
+    encoding = config.get("encoding", "pcm_s16le")
+    sample_rate = int(config.get("sampleRate", SAMPLE_RATE))
+    channels = int(config.get("channels", 1))
+    decoder = None
+    pump = None
+    if encoding not in PCM_ENCODINGS or sample_rate != SAMPLE_RATE or channels != 1:
+        # 압축 오디오나 16kHz mono가 아닌 PCM은 ffmpeg 파이프로 변환
+        if encoding in PCM_ENCODINGS:
+            input_args = ["-f", encoding[4:], "-ar", str(sample_rate), "-ac", str(channels)]
+        else:
+            input_args = []  # webm/ogg 컨테이너는 ffmpeg가 판별
+        decoder = FfmpegPipeDecoder(input_args)
+        await decoder.start()
+
+        async def pump_decoded():
+            async for block in decoder.blocks():
+                await queue.put((block, time.monotonic()))
+        pump = asyncio.create_task(pump_decoded())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                data = message["bytes"]
+                if decoder:
+                    await decoder.write(data)
+                else:
+                    dtype, scale = PCM_ENCODINGS[encoding]
+                    usable = len(data) // np.dtype(dtype).itemsize * np.dtype(dtype).itemsize
+                    samples = np.frombuffer(data[:usable], dtype=dtype).astype(np.float32) / scale
+                    await queue.put((samples, time.monotonic()))
+            elif message.get("text"):
+                try:
+                    if json.loads(message["text"]).get("type") == "stop":
+                        break
+                except json.JSONDecodeError:
+                    logger.error("Invalid JSON received")
+        if decoder:
+            await decoder.finish()
+            await pump
+    finally:
+        if decoder:
+            decoder.close()
+        if pump and not pump.done():
+            pump.cancel()
+        await queue.put(None)
+
+async def live_transcription_endpoint(websocket: WebSocket):
+    """실시간 전사 WebSocket.
+
+    첫 메시지로 {"type": "start", "encoding": "pcm_s16le"|"pcm_f32le"|"webm"|"ogg",
+    "sampleRate": 16000, "channels": 1, "language": null, "latencyBudgetMs": 2000}를 보낸 뒤
+    바이너리 오디오 청크를 보내고, 끝나면 {"type": "stop"}을 보냅니다.
+    서버는 partial/final 자막과 마지막에 지연 시간 통계(stats)를 보냅니다.
+    """
+    await websocket.accept()
+    receiver = None
+    try:
+        config = json.loads(await websocket.receive_text())
+        if config.get("type") != "start":
+            await websocket.send_json({"type": "error", "message": "First message must be a start message"})
+            await websocket.close()
+            return
+        session = LiveSession(
+            websocket.send_json,
+            language=config.get("language"),
+            latency_budget_ms=int(config.get("latencyBudgetMs", LATENCY_BUDGET_MS)),
+        )
+        await websocket.send_json({"type": "ready", "session": session.id, "sampleRate": SAMPLE_RATE})
+        logger.info(f"Live session started: {session.id} ({config.get('encoding', 'pcm_s16le')})")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_CHUNKS)
+        receiver = asyncio.create_task(_receive_audio(websocket, config, queue))
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            await session.feed(*item)
+        await session.flush()
+        stats = session.stats()
+        logger.info(f"Live session finished: {stats}")
+        await websocket.send_json(stats)
+        await websocket.close()
+    except Exception as e:
+        logger.error(f"실시간 전사 세션 오류: {str(e)}")
+    finally:
+        if receiver and not receiver.done():
+            receiver.cancel()
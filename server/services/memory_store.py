@@ -0,0 +1,159 @@
+import copy
+import threading
+from typing import Any, Dict, List, Optional
+
+# Firestore 클라이언트 중 이 서비스가 사용하는 부분만 흉내 내는 인메모리 대체 구현.
+# 네트워크 없이 벤치마크/로컬 실행을 하기 위해 사용합니다 (LIVESUB_STORE=memory).
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+}
+
+class MemoryDocumentSnapshot:
+    def __init__(self, doc_id: str, data: Optional[dict]):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field: str):
+        return (self._data or {}).get(field)
+
+class MemoryDocument:
+    def __init__(self, store: "MemoryFirestore", collection: str, doc_id: str):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self, field_paths: Optional[List[str]] = None) -> MemoryDocumentSnapshot:
+        with self._store.lock:
+            data = self._store.data.get(self._collection, {}).get(self.id)
+            if data is not None and field_paths is not None:
+                data = {k: v for k, v in data.items() if k in field_paths}
+            return MemoryDocumentSnapshot(self.id, copy.deepcopy(data))
+
+    def set(self, data: dict, merge: bool = False):
+        with self._store.lock:
+            docs = self._store.data.setdefault(self._collection, {})
+            if merge and self.id in docs:
+                docs[self.id].update(copy.deepcopy(data))
+            else:
+                docs[self.id] = copy.deepcopy(data)
+            self._store.writes += 1
+
+    def update(self, fields: dict):
+        with self._store.lock:
+            docs = self._store.data.setdefault(self._collection, {})
+            if self.id not in docs:
+                raise KeyError(f"No document to update: {self._collection}/{self.id}")
+            docs[self.id].update(copy.deepcopy(fields))
+            self._store.writes += 1
+
+    def delete(self):
+        with self._store.lock:
+            self._store.data.get(self._collection, {}).pop(self.id, None)
+            self._store.writes += 1
+
+class MemoryQuery:
+    DESCENDING = "DESCENDING"
+    ASCENDING = "ASCENDING"
+
+    def __init__(self, store: "MemoryFirestore", collection: str, filters=None, orders=None,
+                 limit_count: Optional[int] = None, cursor: Optional[dict] = None, fields=None):
+        self._store = store
+        self._collection = collection
+        self._filters = filters or []
+        self._orders = orders or []
+        self._limit = limit_count
+        self._cursor = cursor
+        self._fields = fields
+
+    def _copy(self, **changes) -> "MemoryQuery":
+        params = dict(filters=self._filters, orders=self._orders, limit_count=self._limit,
+                      cursor=self._cursor, fields=self._fields)
+        params.update(changes)
+        return MemoryQuery(self._store, self._collection, **params)
+
+    def where(self, field: str, op: str, value: Any) -> "MemoryQuery":
+        return self._copy(filters=self._filters + [(field, _OPERATORS[op], value)])
+
+    def order_by(self, field: str, direction: str = ASCENDING) -> "MemoryQuery":
+        return self._copy(orders=self._orders + [(field, direction)])
+
+    def limit(self, count: int) -> "MemoryQuery":
+        return self._copy(limit_count=count)
+
+    def start_after(self, values: dict) -> "MemoryQuery":
+        return self._copy(cursor=values)
+
+    def select(self, field_paths: List[str]) -> "MemoryQuery":
+        return self._copy(fields=list(field_paths))
+
+    def stream(self):
+        with self._store.lock:
+            items = [(doc_id, copy.deepcopy(data))
+                     for doc_id, data in self._store.data.get(self._collection, {}).items()]
+        items = [(i, d) for i, d in items if all(op(d.get(f), v) for f, op, v in self._filters)]
+        for field, direction in reversed(self._orders):
+            items.sort(key=lambda item: item[1].get(field) or "", reverse=direction == self.DESCENDING)
+        if self._cursor is not None and self._orders:
+            def after_cursor(data):
+                for field, direction in self._orders:
+                    a, b = data.get(field), self._cursor.get(field)
+                    if a != b:
+                        return a < b if direction == self.DESCENDING else a > b
+                return False
+            items = [(i, d) for i, d in items if after_cursor(d)]
+        if self._limit is not None:
+            items = items[:self._limit]
+        for doc_id, data in items:
+            if self._fields is not None:
+                data = {k: v for k, v in data.items() if k in self._fields}
+            yield MemoryDocumentSnapshot(doc_id, data)
+
+class MemoryCollection(MemoryQuery):
+    def __init__(self, store: "MemoryFirestore", name: str):
+        super().__init__(store, name)
+
+    def document(self, doc_id: str) -> MemoryDocument:
+        return MemoryDocument(self._store, self._collection, doc_id)
+
+class MemoryWriteBatch:
+    def __init__(self):
+        self._ops = []
+
+    def set(self, ref: MemoryDocument, data: dict, merge: bool = False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref: MemoryDocument, fields: dict):
+        self._ops.append(lambda: ref.update(fields))
+
+    def delete(self, ref: MemoryDocument):
+        self._ops.append(ref.delete)
+
+    def commit(self):
+        for op in self._ops:
+            op()
+        self._ops = []
+
+class MemoryFirestore:
+    """firestore.Client 대체용 인메모리 저장소."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.data: Dict[str, Dict[str, dict]] = {}
+        self.writes = 0
+
+    def collection(self, name: str) -> MemoryCollection:
+        return MemoryCollection(self, name)
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch()
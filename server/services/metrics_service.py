@@ -0,0 +1,214 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus 텍스트 형식(0.0.4)으로 내보내는 가벼운 지표 레지스트리.
+# 값은 스레드 풀에서도 기록되므로 지표마다 잠금을 둡니다. 프로세스 풀 워커의 값은 모이지 않으므로
+# 워커에서 실행되는 작업은 API 프로세스에서 await 구간을 잽니다.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# 초 단위 기본 구간 (수 ms의 Firestore 호출부터 수 분짜리 다운로드까지)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+class Gauge(_Metric):
+    """현재 값. set_function으로 수집 시점에 값을 읽는 콜백을 등록할 수 있습니다."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], object]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], object]):
+        """레이블이 없으면 숫자를, 있으면 {레이블 값 튜플: 숫자}를 반환하는 콜백."""
+        self._function = function
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        if self._function is not None:
+            current = self._function()
+            if isinstance(current, dict):
+                values.update({key if isinstance(key, tuple) else (key,): value for key, value in current.items()})
+            else:
+                values[()] = current
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(float(value))}"
+                for key, value in values.items()]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        lines = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+def counter(name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labels))
+
+def gauge(name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, documentation, labels))
+
+def histogram(name: str, documentation: str, labels: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labels, buckets))
+
+# 파이프라인 지표 (레이블 값은 아래 stage 이름 참고)
+STAGE_SECONDS = histogram(
+    "livesub_stage_seconds",
+    "Wall time per pipeline stage call (metadata, download, audio_decode, preprocess, vad, "
+    "language_detection, window_decode, translation, persist)",
+    ["stage"],
+)
+STAGE_POOL_WAIT_SECONDS = histogram("livesub_stage_pool_wait_seconds", "Time spent waiting for a stage pool slot", ["pool"])
+STAGE_POOL_WAITING = gauge("livesub_stage_pool_waiting", "Calls waiting for a stage pool slot", ["pool"])
+STAGE_POOL_ACTIVE = gauge("livesub_stage_pool_active", "Calls running in a stage pool", ["pool"])
+JOB_QUEUE_DEPTH = gauge("livesub_job_queue_depth", "Jobs waiting to be dispatched")
+JOBS_RUNNING = gauge("livesub_jobs_running", "Jobs currently running")
+REAL_TIME_FACTOR = histogram(
+    "livesub_real_time_factor",
+    "Audio seconds transcribed per wall-clock second, per video",
+    ["model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128),
+)
+AUDIO_SECONDS = counter("livesub_audio_seconds_total", "Audio seconds transcribed", ["model"])
+DOWNLOAD_BYTES = counter("livesub_download_bytes_total", "Media bytes downloaded")
+MODEL_LOAD_SECONDS = histogram("livesub_model_load_seconds", "Whisper model load time", ["model"],
+                               buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300))
+WEBSOCKET_FANOUT_SECONDS = histogram(
+    "livesub_websocket_fanout_seconds",
+    "Time from enqueueing a WebSocket message to finishing the send",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+WEBSOCKET_DROPPED = counter("livesub_websocket_dropped_total", "WebSocket messages dropped from full client queues")
+FIRESTORE_SECONDS = histogram("livesub_firestore_seconds", "Firestore call latency", ["operation"])
+
+def stage_timer(stage: str):
+    """with stage_timer("vad"): ... 형태로 단계 시간을 기록합니다."""
+    return STAGE_SECONDS.time(stage=stage)
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from services.metrics_service import MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Whisper 모델 설정 (LIVESUB_MODEL_* 환경 변수로 변경)
+DEFAULT_MODEL = os.getenv("LIVESUB_MODEL", "medium")
+MODEL_DIR = os.getenv("LIVESUB_MODEL_DIR") or None  # None이면 whisper 기본 캐시 (~/.cache/whisper)
+MODEL_DEVICE = os.getenv("LIVESUB_MODEL_DEVICE") or None
+MODEL_MEMORY_BUDGET = int(os.getenv("LIVESUB_MODEL_MEMORY_BUDGET", str(8 * 1024 ** 3)))
+# 시작 후 백그라운드에서 미리 올려 둘 모델 (쉼표 구분, 비우면 워밍업 안 함)
+WARMUP_MODELS = [m for m in os.getenv("LIVESUB_WARMUP_MODELS", DEFAULT_MODEL).split(",") if m]
+
+QUALITY_TIERS = {
+    "fast": "base",
+    "balanced": "small",
+    "best": DEFAULT_MODEL,
+}
+# 긴 오디오는 한 단계 작은 모델로 처리 (초 기준, 내림차순)
+DURATION_TIERS = [
+    (3 * 3600, "base"),
+    (3600, "small"),
+]
+# 로드된 모델이 차지하는 대략적인 메모리 (fp32 가중치 + 여유)
+MODEL_MEMORY_BYTES = {
+    "tiny": 200 * 1024 ** 2,
+    "base": 400 * 1024 ** 2,
+    "small": 1200 * 1024 ** 2,
+    "medium": 3 * 1024 ** 3,
+    "large": 6 * 1024 ** 3,
+}
+
+def _model_bytes(name: str) -> int:
+    base = name.split(".")[0].split("-")[0]
+    return MODEL_MEMORY_BYTES.get(base, MODEL_MEMORY_BYTES["large"])
+
+def choose_model(quality: Optional[str] = None, duration: Optional[float] = None) -> str:
+    """품질 등급이 있으면 그에 맞는 모델을, 없으면 오디오 길이로 모델 크기를 고릅니다."""
+    if quality:
+        if quality not in QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier: {quality}")
+        return QUALITY_TIERS[quality]
+    if duration:
+        for min_seconds, name in DURATION_TIERS:
+            if duration >= min_seconds:
+                return name
+    return DEFAULT_MODEL
+
+class ModelManager:
+    """Whisper 모델을 처음 사용할 때 로드하고, 메모리 예산 안에서 LRU로 유지합니다.
+
+    get()은 블로킹 함수이므로 transcribe 단계 풀(또는 별도 스레드)에서 호출해야 합니다.
+    """
+
+    def __init__(self, memory_budget: int = MODEL_MEMORY_BUDGET, download_root: Optional[str] = MODEL_DIR,
+                 device: Optional[str] = MODEL_DEVICE):
+        self.memory_budget = memory_budget
+        self.download_root = download_root
+        self.device = device
+        self.load_seconds: Dict[str, float] = {}
+        self.stats = {"loads": 0, "hits": 0, "evictions": 0}
+        self._models: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._models)
+
+    def get(self, name: str = DEFAULT_MODEL):
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                self._models.move_to_end(name)
+                self.stats["hits"] += 1
+                return model
+            loading = self._loading.setdefault(name, threading.Lock())
+        # 같은 모델을 동시에 두 번 로드하지 않도록 모델별 잠금
+        with loading:
+            with self._lock:
+                model = self._models.get(name)
+                if model is not None:
+                    self._models.move_to_end(name)
+                    return model
+            model = self._load(name)
+            with self._lock:
+                self._models[name] = model
+                self._evict_locked(keep=name)
+            return model
+
+    def _load(self, name: str):
+        import whisper
+
+        started = time.perf_counter()
+        model = whisper.load_model(name, device=self.device, download_root=self.download_root)
+        elapsed = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.observe(elapsed, model=name)
+        with self._lock:
+            self.load_seconds[name] = elapsed
+            self.stats["loads"] += 1
+        logger.info(f"Whisper 모델 로드 성공 ({name}, {elapsed:.1f}s)")
+        return model
+
+    def _evict_locked(self, keep: str):
+        total = sum(_model_bytes(name) for name in self._models)
+        while total > self.memory_budget and len(self._models) > 1:
+            oldest = next(name for name in self._models if name != keep)
+            self._models.pop(oldest)
+            total -= _model_bytes(oldest)
+            self.stats["evictions"] += 1
+            logger.info(f"Unloaded Whisper model {oldest} (memory budget {self.memory_budget / 1024 ** 3:.1f} GiB)")
+        if total > self.memory_budget:
+            logger.warning(f"Model {keep} alone exceeds the memory budget")
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    async def warm_up(self, names: List[str] = WARMUP_MODELS):
+        """서버 시작 후 백그라운드에서 모델을 미리 로드합니다."""
+        for name in names:
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception as e:
+                logger.error(f"Whisper 모델 워밍업 실패 ({name}): {str(e)}")
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "loaded": list(self._models),
+                "loadSeconds": {name: round(s, 2) for name, s in self.load_seconds.items()},
+                "memoryBudget": self.memory_budget,
+                "estimatedBytes": sum(_model_bytes(name) for name in self._models),
+            }
+
+model_manager = ModelManager()
+
+def get_model(name: str = DEFAULT_MODEL):
+    return model_manager.get(name)
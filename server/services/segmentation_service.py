@@ -0,0 +1,149 @@
+import os
+import re
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+# 자막 분할 기준 (LIVESUB_SUBTITLE_* 환경 변수로 변경)
+MAX_CHARS = int(os.getenv("LIVESUB_SUBTITLE_MAX_CHARS", "84"))  # 자막 하나의 최대 글자 수 (42자 x 2줄)
+MIN_CHARS = int(os.getenv("LIVESUB_SUBTITLE_MIN_CHARS", "15"))  # 이보다 짧으면 문장 끝에서도 나누지 않음
+MAX_CPS = float(os.getenv("LIVESUB_SUBTITLE_MAX_CPS", "17"))  # 초당 읽을 수 있는 글자 수
+MIN_DURATION = float(os.getenv("LIVESUB_SUBTITLE_MIN_DURATION", "0.8"))
+MAX_DURATION = float(os.getenv("LIVESUB_SUBTITLE_MAX_DURATION", "7.0"))
+PAUSE_GAP = float(os.getenv("LIVESUB_SUBTITLE_PAUSE_GAP", "0.6"))  # 이보다 긴 쉼에서 나눔
+LONG_PAUSE_GAP = 1.5  # 짧은 자막이라도 이보다 긴 쉼에서는 나눔
+MIN_CUE_GAP = 0.08  # 앞 자막을 늘릴 때 다음 자막과 띄울 간격
+OVERLAP_TOLERANCE = 0.2  # 이미 내보낸 구간과 이만큼 넘게 겹치면 중복 후보로 봄
+DEDUPE_HISTORY = 8  # 중복 확인에 쓰는 최근 단어 수
+
+SENTENCE_END = tuple(".?!。？！…")
+CLAUSE_END = tuple(",;:、，；：")
+
+Word = Tuple[float, float, str]  # (start, end, text). text는 앞 공백을 포함해 그대로 이어 붙임
+
+def segmentation_signature() -> dict:
+    """결과에 영향을 주는 분할 기준 (캐시 키에 사용)."""
+    return {
+        "max_chars": MAX_CHARS,
+        "min_chars": MIN_CHARS,
+        "max_cps": MAX_CPS,
+        "min_duration": MIN_DURATION,
+        "max_duration": MAX_DURATION,
+        "pause_gap": PAUSE_GAP,
+    }
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w]", "", text.lower())
+
+class Segmenter:
+    """단어 스트림을 읽기 좋은 자막 (start, end, text)으로 다시 나눕니다.
+
+    쉼, 문장 끝, 최대 글자 수/길이를 기준으로 나누고, 윈도우/배치 경계와 상관없이 단어를 이어 붙입니다.
+    각 단어는 한 번 들어와 한 번 나가므로 전체 비용은 단어 수에 비례하며, push()마다 끝난 자막만 돌려줘
+    스트리밍 중에도 쓸 수 있습니다. 마지막 자막은 다음 단어의 시작을 알아야 표시 시간을 늘릴 수 있으므로
+    다음 자막이 시작될 때까지 보류합니다.
+    """
+
+    def __init__(self, max_chars: int = MAX_CHARS, min_chars: int = MIN_CHARS, max_cps: float = MAX_CPS,
+                 min_duration: float = MIN_DURATION, max_duration: float = MAX_DURATION,
+                 pause_gap: float = PAUSE_GAP):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self.max_cps = max_cps
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.pause_gap = pause_gap
+        self._words: List[Word] = []  # 아직 자막이 되지 않은 단어
+        self._chars = 0
+        self._held: Optional[Tuple[float, float, str]] = None  # 끝 시간을 아직 정하지 않은 자막
+        self._recent: Deque[Tuple[float, str]] = deque(maxlen=DEDUPE_HISTORY)  # (end, 정규화한 텍스트)
+        self._last_end = 0.0
+
+    @property
+    def pending_start(self) -> Optional[float]:
+        """아직 내보내지 않은 가장 이른 시간. 이 시점부터 다시 디코딩하면 잃는 자막이 없습니다."""
+        if self._held is not None:
+            return self._held[0]
+        if self._words:
+            return self._words[0][0]
+        return None
+
+    def _is_duplicate(self, word: Word) -> bool:
+        """윈도우가 겹치거나 같은 말이 경계에서 반복 디코딩된 단어인지 확인합니다."""
+        start, end, text = word
+        if start >= self._last_end - OVERLAP_TOLERANCE:
+            return False
+        key = _normalize(text)
+        if not key or end <= self._last_end:
+            # 이미 내보낸 구간 안쪽에 완전히 들어가는 단어
+            return not key or any(key == seen for _, seen in self._recent)
+        return any(key == seen and start < seen_end for seen_end, seen in self._recent)
+
+    def _text(self, words: List[Word]) -> str:
+        return "".join(text for _, _, text in words).strip()
+
+    def _split_index(self) -> int:
+        """현재 단어들 중 자막을 끊을 위치. 뒤쪽 절반의 구두점을 우선하고, 없으면 전부를 씁니다."""
+        chars = 0
+        best = 0
+        half = self._chars / 2
+        for i, (_, _, text) in enumerate(self._words):
+            chars += len(text)
+            if chars >= half and text.rstrip().endswith(SENTENCE_END + CLAUSE_END):
+                best = i + 1
+                break
+        return best or len(self._words)
+
+    def _cut(self, count: int) -> List[Tuple[float, float, str]]:
+        words, self._words = self._words[:count], self._words[count:]
+        self._chars = sum(len(text) for _, _, text in self._words)
+        text = self._text(words)
+        if not text:
+            return []
+        return self._emit((words[0][0], words[-1][1], text))
+
+    def _emit(self, cue: Tuple[float, float, str]) -> List[Tuple[float, float, str]]:
+        """새 자막을 보류하고, 이전에 보류한 자막은 읽기 속도에 맞게 끝 시간을 늘려 내보냅니다."""
+        done = []
+        if self._held is not None:
+            done.append(self._finalize(self._held, cue[0]))
+        self._held = cue
+        return done
+
+    def _finalize(self, cue, next_start: Optional[float]):
+        start, end, text = cue
+        readable = start + max(len(text) / self.max_cps, self.min_duration)
+        if readable > end:
+            limit = next_start - MIN_CUE_GAP if next_start is not None else readable
+            end = max(end, min(readable, limit))
+        return start, end, text
+
+    def push(self, words: List[Word]) -> List[Tuple[float, float, str]]:
+        """단어(또는 단어 타임스탬프가 없을 때는 구간)를 넣고 끝난 자막을 반환합니다."""
+        done = []
+        for word in words:
+            start, end, text = word
+            if self._is_duplicate(word):
+                continue
+            if self._words:
+                gap = start - self._words[-1][1]
+                long_enough = self._chars >= self.min_chars
+                if gap >= LONG_PAUSE_GAP or (gap >= self.pause_gap and long_enough):
+                    done.extend(self._cut(len(self._words)))
+                elif (self._chars + len(text) > self.max_chars
+                      or end - self._words[0][0] > self.max_duration):
+                    done.extend(self._cut(self._split_index()))
+            self._words.append(word)
+            self._chars += len(text)
+            self._recent.append((end, _normalize(text)))
+            self._last_end = max(self._last_end, end)
+            if text.rstrip().endswith(SENTENCE_END) and self._chars >= self.min_chars:
+                done.extend(self._cut(len(self._words)))
+        return done
+
+    def flush(self) -> List[Tuple[float, float, str]]:
+        """남은 단어와 보류한 자막을 모두 내보냅니다 (스트림 끝)."""
+        done = self._cut(len(self._words)) if self._words else []
+        if self._held is not None:
+            done.append(self._finalize(self._held, None))
+            self._held = None
+        return done
@@ -1,171 +1,526 @@
 import logging
-import whisper
 import numpy as np
-from typing import List, Optional
+import os
+import time
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel
 from models.video import Subtitle
-import webrtcvad
+from services.vad_service import speech_intervals, to_pcm16
+from services.audio_service import AudioPreprocessor
+from services.job_service import run_in_stage
+from services.model_service import DEFAULT_MODEL, get_model
+from services.inference_service import get_inference_pool
+from services.metrics_service import STAGE_SECONDS, stage_timer
+from services.segmentation_service import Segmenter, segmentation_signature
+
+# whisper/torch는 가져오는 데만 수 초가 걸리므로 실제로 디코딩할 때 가져옵니다 (API 프로세스 시작 시간 단축)
 
 logger = logging.getLogger(__name__)
 
-# Whisper 모델 로드
-try:
-    model = whisper.load_model("medium", download_root="/Users/gyuminkang/.cache/whisper")
-    logger.info("Whisper 모델 로드 성공 (medium)")
-except Exception as e:
-    logger.error(f"Whisper 모델 로드 실패: {str(e)}")
-    raise
+def _voiced_audio(pcm, intervals):
+    if not len(intervals):
+        return np.zeros(0, dtype=np.float32)
+    voiced = np.concatenate([pcm[start:end] for start, end in intervals])
+    # 다시 float32로 변환
+    return voiced.astype(np.float32) / 32767
 
 def apply_vad(audio_array, sample_rate, frame_duration_ms=30):
-    vad = webrtcvad.Vad(2)  # 0~3 (3이 가장 민감)
-    # 16bit PCM 변환
-    audio_pcm = (audio_array * 32767).astype(np.int16).tobytes()
-    frame_size = int(sample_rate * frame_duration_ms / 1000) * 2  # 2 bytes per sample
-    voiced_audio = bytearray()
-    for i in range(0, len(audio_pcm), frame_size):
-        frame = audio_pcm[i:i+frame_size]
-        if len(frame) < frame_size:
-            break
-        if vad.is_speech(frame, sample_rate):
-            voiced_audio.extend(frame)
-    # 다시 float32로 변환
-    voiced_np = np.frombuffer(voiced_audio, dtype=np.int16).astype(np.float32) / 32767
-    return voiced_np
+    pcm = to_pcm16(audio_array)
+    intervals = speech_intervals(pcm, sample_rate, mode=2, frame_duration_ms=frame_duration_ms)
+    return _voiced_audio(pcm, intervals)
 
 def apply_vad_with_offsets(audio_array, sample_rate, frame_duration_ms=30):
-    vad = webrtcvad.Vad(3)  # 더 민감하게
-    audio_pcm = (audio_array * 32767).astype(np.int16).tobytes()
-    frame_size = int(sample_rate * frame_duration_ms / 1000) * 2
-    voiced_audio = bytearray()
-    voiced_offsets = []  # (start_sample, end_sample)
-    in_voiced = False
-    voiced_start = 0
-    for i in range(0, len(audio_pcm), frame_size):
-        frame = audio_pcm[i:i+frame_size]
-        if len(frame) < frame_size:
-            break
-        is_speech = vad.is_speech(frame, sample_rate)
-        if is_speech and not in_voiced:
-            voiced_start = i // 2  # byte to sample
-            in_voiced = True
-        if not is_speech and in_voiced:
-            voiced_end = i // 2
-            voiced_offsets.append((voiced_start, voiced_end))
-            in_voiced = False
-        if is_speech:
-            voiced_audio.extend(frame)
-    if in_voiced:
-        voiced_end = len(audio_pcm) // 2
-        voiced_offsets.append((voiced_start, voiced_end))
-    # float32 변환
-    voiced_np = np.frombuffer(voiced_audio, dtype=np.int16).astype(np.float32) / 32767
-    return voiced_np, voiced_offsets
-
-def get_vad_segments(audio_array, sample_rate, frame_duration_ms=30):
-    vad = webrtcvad.Vad(3)
-    audio_pcm = (audio_array * 32767).astype(np.int16).tobytes()
-    frame_size = int(sample_rate * frame_duration_ms / 1000) * 2
+    pcm = to_pcm16(audio_array)
+    intervals = speech_intervals(pcm, sample_rate, mode=3, frame_duration_ms=frame_duration_ms)
+    voiced_offsets = [(int(start), int(end)) for start, end in intervals]  # (start_sample, end_sample)
+    return _voiced_audio(pcm, intervals), voiced_offsets
+
+def get_vad_segments(audio_array, sample_rate, frame_duration_ms=30, padding_ms=0, min_gap_ms=0):
+    intervals = speech_intervals(
+        audio_array,
+        sample_rate,
+        mode=3,
+        frame_duration_ms=frame_duration_ms,
+        padding_ms=padding_ms,
+        min_gap_ms=min_gap_ms,
+    )
+    return [(int(start), int(end)) for start, end in intervals]
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30  # Whisper 입력 길이
+BATCH_SIZE = 8
+BEAM_SIZE = 7
+LANGUAGE_CONFIDENCE_THRESHOLD = 0.6
+# 언어 감지에 쓰는 윈도우 수 (음성 에너지가 큰 순서로 고름)
+LANGUAGE_SAMPLE_WINDOWS = int(os.getenv("LIVESUB_LANGUAGE_SAMPLE_WINDOWS", "3"))
+VAD_PADDING_MS = 210  # 발화 앞뒤 여유 (행오버)
+VAD_MIN_GAP_MS = 300  # 이보다 짧은 무음은 같은 발화로 병합
+TIME_PRECISION = 0.02  # 타임스탬프 토큰 1개 = 20ms
+NOISE_GATE = 0.01
+BLOCK_SECONDS = 10
+STREAM_HORIZON_SECONDS = 120  # 이만큼 오디오가 쌓이면 디코딩 시작
+STREAM_TAIL_GUARD_SECONDS = 1
+DECODING_STRATEGY = os.getenv("LIVESUB_DECODING_STRATEGY", "speculative")  # speculative | beam | greedy
+WORD_TIMESTAMPS = os.getenv("LIVESUB_WORD_TIMESTAMPS", "1") == "1"
+
+def pack_windows(segments, max_samples=SAMPLE_RATE * WINDOW_SECONDS):
+    """VAD 구간들을 최대 max_samples 길이의 디코딩 윈도우로 묶습니다."""
+    windows = []
+    win_start = win_end = None
+    for seg_start, seg_end in segments:
+        # 윈도우보다 긴 발화는 max_samples 단위로 자름
+        while seg_end - seg_start > max_samples:
+            if win_start is not None:
+                windows.append((win_start, win_end))
+                win_start = None
+            windows.append((seg_start, seg_start + max_samples))
+            seg_start += max_samples
+        if win_start is None:
+            win_start, win_end = seg_start, seg_end
+        elif seg_end - win_start <= max_samples:
+            win_end = seg_end
+        else:
+            windows.append((win_start, win_end))
+            win_start, win_end = seg_start, seg_end
+    if win_start is not None:
+        windows.append((win_start, win_end))
+    return windows
+
+def _window_mels(model, audio_array, windows):
+    """윈도우별 log-mel 스펙트로그램을 (batch, n_mels, 3000) 텐서로 만듭니다."""
+    import torch
+    import whisper
+
+    mels = []
+    for start, end in windows:
+        chunk = whisper.pad_or_trim(np.asarray(audio_array[start:end], dtype=np.float32))
+        mels.append(whisper.log_mel_spectrogram(chunk, n_mels=model.dims.n_mels))
+    return torch.stack(mels).to(model.device)
+
+def detect_language(model, mel) -> tuple:
+    """배치의 언어 확률을 평균 내어 (언어, 신뢰도)를 반환합니다."""
+    _, probs = model.detect_language(mel)
+    if isinstance(probs, dict):
+        probs = [probs]
+    totals = {}
+    for window_probs in probs:
+        for lang, p in window_probs.items():
+            totals[lang] = totals.get(lang, 0.0) + p
+    language = max(totals, key=totals.get)
+    return language, totals[language] / len(probs)
+
+def _detect_windows_language(audio_array, windows, model_name=DEFAULT_MODEL):
+    model = get_model(model_name)
+    return detect_language(model, _window_mels(model, audio_array, windows))
+
+def speech_rich_windows(audio_array, windows, count=LANGUAGE_SAMPLE_WINDOWS):
+    """음성 에너지(제곱합)가 가장 큰 윈도우 count개를 시간 순서로 반환합니다 (언어 감지용).
+
+    VAD로 묶은 윈도우이므로 에너지가 크면 발화가 길고 뚜렷해 언어 확률이 안정적입니다.
+    """
+    if len(windows) <= count:
+        return list(windows)
+    energy = [float(np.dot(audio_array[start:end], audio_array[start:end])) for start, end in windows]
+    chosen = sorted(range(len(windows)), key=energy.__getitem__, reverse=True)[:count]
+    return [windows[i] for i in sorted(chosen)]
+
+def _encode(model, mel):
+    """인코더를 한 번만 실행해 디코딩, 재디코딩, 언어 재감지가 같은 오디오 특징을 쓰도록 합니다.
+
+    whisper.decode와 model.detect_language는 (n_audio_ctx, n_audio_state) 모양의 입력을 받으면
+    인코더를 건너뜁니다.
+    """
+    import torch
+
+    with torch.no_grad():
+        return model.encoder(mel.half() if model.device.type != "cpu" else mel)
+
+def _segments_from_tokens(tokens, tokenizer, duration):
+    """타임스탬프 토큰으로 디코딩 결과를 (start, end, text) 구간으로 나눕니다."""
+    segments = []
+    seg_start = None
+    text_tokens = []
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            timestamp = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if text_tokens:
+                segments.append((seg_start or 0.0, timestamp, tokenizer.decode(text_tokens)))
+                text_tokens = []
+            seg_start = timestamp
+        else:
+            text_tokens.append(token)
+    if text_tokens:
+        segments.append((seg_start or 0.0, duration, tokenizer.decode(text_tokens)))
+    return segments
+
+class DecodingConfig(BaseModel):
+    """작업별 디코딩 전략과 품질 기준.
+
+    speculative: 먼저 greedy로 디코딩하고, 기준을 통과하지 못한 윈도우만 beam search로 다시 디코딩합니다.
+    beam: 모든 윈도우를 beam search로 디코딩합니다 (이전 동작).
+    greedy: 다시 디코딩하지 않습니다.
+    """
+    strategy: Literal["speculative", "beam", "greedy"] = DECODING_STRATEGY
+    beam_size: int = BEAM_SIZE
+    logprob_threshold: float = -1.0
+    compression_ratio_threshold: float = 2.4
+    no_speech_threshold: float = 0.6
+    word_timestamps: bool = WORD_TIMESTAMPS  # 끄면 Whisper 구간 단위로 자막을 나눔
+
+    def is_silence(self, result) -> bool:
+        return result.no_speech_prob > self.no_speech_threshold and result.avg_logprob < self.logprob_threshold
+
+    def needs_fallback(self, result) -> bool:
+        return (result.avg_logprob < self.logprob_threshold
+                or result.compression_ratio > self.compression_ratio_threshold)
+
+# 프로세스별 디코딩 통계 (speculative 모드의 재디코딩 비율, 구간별 언어 전환 확인용)
+decoding_stats = {"windows": 0, "fallbacks": 0, "language_checks": 0, "language_switches": 0}
+
+def _decode_mel(model, mel, language, beam_size):
+    import whisper
+
+    options = whisper.DecodingOptions(
+        task="transcribe",
+        language=language,
+        beam_size=beam_size,
+        without_timestamps=False,
+        fp16=model.device.type != "cpu",
+    )
+    return whisper.decode(model, mel, options)
+
+def _redetect_switched(model, features, results, language, config: DecodingConfig) -> List[Optional[str]]:
+    """디코딩 신뢰도가 낮은 윈도우만 언어를 다시 감지하고, 다른 언어면 그 언어로 다시 디코딩합니다.
+
+    한 영상 안에서 언어가 바뀌는 구간(코드 스위칭)을 윈도우 단위로 처리합니다. 인코더 출력을
+    재사용하므로 추가 비용은 감지용 디코더 1스텝과 바뀐 윈도우의 재디코딩뿐입니다.
+    결과 대신 윈도우별 디코딩 언어 목록을 반환하고, results는 제자리에서 바꿉니다.
+    """
+    languages = [language] * len(results)
+    if language is None or not model.is_multilingual:
+        return languages
+    suspect = [i for i, result in enumerate(results)
+               if not config.is_silence(result) and config.needs_fallback(result)]
+    if not suspect:
+        return languages
+    decoding_stats["language_checks"] += len(suspect)
+    _, probs = model.detect_language(features[suspect])
+    if isinstance(probs, dict):
+        probs = [probs]
+    switched: Dict[str, List[int]] = {}
+    for i, window_probs in zip(suspect, probs):
+        detected = max(window_probs, key=window_probs.get)
+        if detected != language and window_probs[detected] >= LANGUAGE_CONFIDENCE_THRESHOLD:
+            switched.setdefault(detected, []).append(i)
+    beam_size = None if config.strategy == "greedy" else config.beam_size
+    for detected, indices in switched.items():
+        for i, result in zip(indices, _decode_mel(model, features[indices], detected, beam_size)):
+            if result.avg_logprob > results[i].avg_logprob:
+                results[i] = result
+                languages[i] = detected
+                decoding_stats["language_switches"] += 1
+                logger.info(f"Window {i} re-decoded as {detected} (was {language})")
+    return languages
+
+def _decode_batch(audio_array, windows, language, sample_rate, base_offset=0, model_name=DEFAULT_MODEL,
+                  config: Optional[DecodingConfig] = None):
+    """윈도우 배치를 한 번에 디코딩하고 전역 시간으로 보정된 단어(word_timestamps) 또는 구간을 반환합니다."""
+    import whisper
+
+    config = config or DecodingConfig()
+    model = get_model(model_name)
+    mel = _window_mels(model, audio_array, windows)
+    features = _encode(model, mel)
+    if config.strategy == "beam":
+        results = _decode_mel(model, features, language, config.beam_size)
+    else:
+        results = _decode_mel(model, features, language, None)
+        decoding_stats["windows"] += len(results)
+        if config.strategy == "speculative":
+            # 무음으로 판단된 윈도우는 다시 디코딩하지 않음
+            retry = [i for i, result in enumerate(results)
+                     if not config.is_silence(result) and config.needs_fallback(result)]
+            if retry:
+                decoding_stats["fallbacks"] += len(retry)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Beam fallback for {len(retry)}/{len(results)} windows")
+                for i, result in zip(retry, _decode_mel(model, features[retry], language, config.beam_size)):
+                    results[i] = result
+    languages = _redetect_switched(model, features, results, language, config)
+    tokenizers = {}
+
+    def tokenizer_for(lang):
+        if lang not in tokenizers:
+            tokenizers[lang] = whisper.tokenizer.get_tokenizer(
+                model.is_multilingual, num_languages=model.num_languages, language=lang, task="transcribe"
+            )
+        return tokenizers[lang]
+
     segments = []
-    in_voiced = False
-    voiced_start = 0
-    for i in range(0, len(audio_pcm), frame_size):
-        frame = audio_pcm[i:i+frame_size]
-        if len(frame) < frame_size:
-            break
-        is_speech = vad.is_speech(frame, sample_rate)
-        if is_speech and not in_voiced:
-            voiced_start = i // 2
-            in_voiced = True
-        if not is_speech and in_voiced:
-            voiced_end = i // 2
-            segments.append((voiced_start, voiced_end))
-            in_voiced = False
-    if in_voiced:
-        voiced_end = len(audio_pcm) // 2
-        segments.append((voiced_start, voiced_end))
+    for i, ((start, end), result) in enumerate(zip(windows, results)):
+        if config.is_silence(result):
+            continue
+        tokenizer = tokenizer_for(languages[i])
+        offset = (base_offset + start) / sample_rate
+        duration = (end - start) / sample_rate
+        if config.word_timestamps:
+            words = _window_words(model, tokenizer, features[i], result.tokens, end - start, duration)
+            segments.extend((offset + w_start, offset + w_end, text) for w_start, w_end, text in words)
+            continue
+        for seg_start, seg_end, text in _segments_from_tokens(result.tokens, tokenizer, duration):
+            text = text.strip()
+            if text:
+                # Segmenter가 단어처럼 이어 붙이므로 앞에 공백을 둠
+                segments.append((offset + seg_start, offset + min(seg_end, duration), " " + text))
     return segments
 
-async def transcribe_audio(audio_array: np.ndarray, sample_rate: int) -> Optional[List[Subtitle]]:
+class _EncodedModel:
+    """이미 계산한 인코더 출력을 입력으로 받는 모델 래퍼.
+
+    whisper.timing.find_alignment는 model(mel, tokens)로 인코더와 디코더를 모두 실행하므로,
+    원래 모델을 넘기면 단어 정렬마다 인코더를 다시 돌립니다. 이 래퍼는 호출을 디코더로만 보내고
+    나머지 속성(dims, decoder, alignment_heads, device)은 원래 모델에서 가져옵니다.
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def __call__(self, audio_features, tokens):
+        return self._model.decoder(tokens, audio_features)
+
+def _window_words(model, tokenizer, features, tokens, num_samples, duration):
+    """윈도우 하나의 디코딩 결과를 cross-attention 정렬로 단어 (start, end, text) 목록으로 바꿉니다.
+
+    features는 _encode로 계산한 윈도우의 인코더 출력이며, 정렬에는 디코더를 한 번 더 실행하는
+    비용만 듭니다. text는 앞 공백을 포함하므로 이어 붙이면 원문이 됩니다 (공백 없는 언어도 그대로 동작).
+    """
+    from whisper.audio import HOP_LENGTH
+    from whisper.timing import add_word_timestamps
+
+    text_tokens = [t for t in tokens if t < tokenizer.eot]
+    if not text_tokens:
+        return []
+    segment = {"seek": 0, "start": 0.0, "end": duration, "tokens": text_tokens}
+    add_word_timestamps(segments=[segment], model=_EncodedModel(model), tokenizer=tokenizer, mel=features,
+                        num_frames=num_samples // HOP_LENGTH, last_speech_timestamp=0.0)
+    return [(word["start"], min(word["end"], duration), word["word"]) for word in segment.get("words", [])]
+
+def decode_window(audio_array, language=None, beam_size=None, prefix=None, prompt=None, timestamps=False,
+                  model_name=DEFAULT_MODEL) -> dict:
+    """30초 이하 윈도우 하나를 디코딩합니다 (실시간 세션용).
+
+    prefix 토큰은 다시 생성하지 않고 그대로 이어 붙입니다. 반환되는 tokens에는 prefix가 빠지고,
+    text에는 prefix가 포함됩니다.
+    """
+    import whisper
+
+    model = get_model(model_name)
+    mel = _window_mels(model, audio_array, [(0, len(audio_array))])
+    options = whisper.DecodingOptions(
+        task="transcribe",
+        language=language,
+        beam_size=beam_size,
+        without_timestamps=not timestamps,
+        prefix=prefix or None,
+        prompt=prompt or None,
+        fp16=model.device.type != "cpu",
+    )
+    result = whisper.decode(model, mel, options)[0]
+    tokenizer = whisper.tokenizer.get_tokenizer(
+        model.is_multilingual, num_languages=model.num_languages, language=result.language, task="transcribe"
+    )
+    duration = len(audio_array) / SAMPLE_RATE
+    text = tokenizer.decode(list(prefix) + result.tokens) if isinstance(prefix, list) else result.text
+    segments = _segments_from_tokens(result.tokens, tokenizer, duration) if timestamps else []
+    return {
+        "language": result.language,
+        "tokens": [t for t in result.tokens if t < tokenizer.timestamp_begin],
+        "text": text.strip(),
+        "segments": [(start, min(end, duration), text.strip()) for start, end, text in segments if text.strip()],
+        "avg_logprob": result.avg_logprob,
+        "no_speech_prob": result.no_speech_prob,
+    }
+
+def decoding_signature(model_name: str = DEFAULT_MODEL, config: Optional[DecodingConfig] = None) -> dict:
+    """결과에 영향을 주는 모델/디코딩 파라미터 (캐시 키에 사용)."""
+    return {
+        "model": model_name,
+        **(config or DecodingConfig()).model_dump(),
+        "window_seconds": WINDOW_SECONDS,
+        "vad_padding_ms": VAD_PADDING_MS,
+        "vad_min_gap_ms": VAD_MIN_GAP_MS,
+        "noise_gate": NOISE_GATE,
+        **segmentation_signature(),
+    }
+
+def preprocess_block(block: np.ndarray) -> np.ndarray:
+    """블록 단위 전처리: DC 성분을 제거하고 작은 값을 0으로 만듭니다."""
+    block = np.asarray(block, dtype=np.float32)
+    block = block - np.mean(block)
+    block[np.abs(block) < NOISE_GATE] = 0
+    return block
+
+def _ready_windows(buffer, sample_rate, final):
+    """지금 디코딩할 윈도우와 다음 버퍼가 시작할 위치를 반환합니다."""
+    windows = pack_windows(get_vad_segments(
+        buffer, sample_rate, padding_ms=VAD_PADDING_MS, min_gap_ms=VAD_MIN_GAP_MS
+    ))
+    if final:
+        return windows, len(buffer)
+    guard = int(sample_rate * STREAM_TAIL_GUARD_SECONDS)
+    if windows and windows[-1][1] >= len(buffer) - guard:
+        # 버퍼 끝에 걸친 윈도우는 발화가 이어질 수 있으므로 다음 버퍼로 넘김
+        return windows[:-1], windows[-1][0]
+    return windows, max(len(buffer) - guard, 0)
+
+async def _decode_windows(buffer, windows, language, sample_rate, buffer_offset, model_name, config):
+    """윈도우를 배치 단위로 디코딩해 (배치, 구간)을 순서대로 내보냅니다. 워커 풀이 있으면 워커들에 나눠 보냅니다."""
+    pool = get_inference_pool()
+    started = time.perf_counter()
+    if pool is not None:
+        async for batch, segments in pool.decode_windows(buffer, windows, language, sample_rate, buffer_offset,
+                                                         BATCH_SIZE, model_name, config):
+            _observe_windows(batch, started)
+            yield batch, segments or []
+            started = time.perf_counter()
+        return
+    for batch_start in range(0, len(windows), BATCH_SIZE):
+        batch = windows[batch_start:batch_start + BATCH_SIZE]
+        try:
+            segments = await run_in_stage("transcribe", _decode_batch, buffer, batch, language, sample_rate, buffer_offset, model_name, config)
+        except Exception as e:
+            logger.error(f"Whisper transcription error at {(buffer_offset + batch[0][0]) / sample_rate:.2f}s: {e}")
+            segments = []
+        _observe_windows(batch, started)
+        yield batch, segments
+        started = time.perf_counter()
+
+def _observe_windows(batch, started):
+    """배치 디코딩 시간을 윈도우 수로 나눠 윈도우당 디코딩 시간으로 기록합니다."""
+    per_window = (time.perf_counter() - started) / len(batch)
+    for _ in batch:
+        STAGE_SECONDS.observe(per_window, stage="window_decode")
+
+async def _detect_language(buffer, windows, model_name):
+    pool = get_inference_pool()
+    if pool is not None:
+        with stage_timer("language_detection"):
+            return await pool.detect_language(buffer, windows, model_name)
+    with stage_timer("language_detection"):
+        return await run_in_stage("transcribe", _detect_windows_language, buffer, windows, model_name)
+
+def _to_subtitles(cues, first_id: int) -> List[Subtitle]:
+    return [
+        Subtitle(
+            id=str(first_id + i),
+            startTime=start,
+            endTime=end,
+            text=text
+        )
+        for i, (start, end, text) in enumerate(cues)
+    ]
+
+def _committed(segmenter: Segmenter, processed_seconds: float) -> float:
+    pending = segmenter.pending_start
+    return processed_seconds if pending is None else min(processed_seconds, pending)
+
+async def transcribe_stream(blocks: AsyncIterable[np.ndarray], sample_rate: int = SAMPLE_RATE,
+                            model_name: str = DEFAULT_MODEL,
+                            config: Optional[DecodingConfig] = None,
+                            language: Optional[str] = None,
+                            start_seconds: float = 0.0,
+                            first_id: int = 0,
+                            on_language: Optional[Callable[[str, float], None]] = None,
+                            ) -> AsyncIterator[Tuple[List[Subtitle], float]]:
+    """오디오 블록 스트림을 받아 윈도우 배치가 끝날 때마다 (새 자막, 처리된 오디오 초)를 내보냅니다.
+
+    블록은 sample_rate의 mono/다채널 float 또는 int16 배열이며, AudioPreprocessor가 블록마다
+    16kHz mono float32로 변환하므로 전체 오디오를 리샘플용으로 따로 복사하지 않습니다.
+    체크포인트에서 이어서 처리할 때는 start_seconds 이전 오디오를 디코딩하지 않고 버리고,
+    language가 주어지면 언어 감지를 건너뜁니다. 감지한 언어는 on_language(언어, 신뢰도)로 알립니다.
+    디코딩한 단어는 배치 경계와 상관없이 Segmenter로 다시 나누며, 처리된 오디오 초는 아직 자막으로
+    내보내지 않은 단어 이전까지만 보고하므로 그 시점부터 이어서 처리해도 빠지는 자막이 없습니다.
+    """
+    preprocessor = AudioPreprocessor(sample_rate, SAMPLE_RATE, NOISE_GATE)
+    sample_rate = SAMPLE_RATE
+    horizon = sample_rate * STREAM_HORIZON_SECONDS
+    buffer = np.zeros(0, dtype=np.float32)
+    skip = int(round(start_seconds * sample_rate))
+    buffer_offset = skip
+    next_id = first_id
+    segmenter = Segmenter()
+    block_iter = blocks.__aiter__()
+    exhausted = False
+    while not exhausted:
+        try:
+            # 다운로드/ffmpeg 디코딩을 기다린 시간
+            with stage_timer("audio_decode"):
+                block = await block_iter.__anext__()
+            with stage_timer("preprocess"):
+                samples = preprocessor.process(block)
+            if skip:
+                dropped = min(skip, len(samples))
+                samples = samples[dropped:]
+                skip -= dropped
+            buffer = np.concatenate((buffer, samples))
+            if len(buffer) < horizon:
+                continue
+        except StopAsyncIteration:
+            exhausted = True
+            buffer = np.concatenate((buffer, preprocessor.flush()))
+        # VAD와 디코딩은 단계별 풀에서 실행해 이벤트 루프를 막지 않음
+        with stage_timer("vad"):
+            windows, consumed = await run_in_stage("decode", _ready_windows, buffer, sample_rate, exhausted)
+        windows = [(s, e) for s, e in windows if e - s >= sample_rate]
+        if windows and language is None:
+            # 언어 감지는 영상당 한 번 (첫 버퍼에서 음성이 뚜렷한 윈도우 몇 개만 사용).
+            # 이후에는 디코딩 신뢰도가 낮은 윈도우만 _decode_batch에서 다시 감지함
+            sample = await run_in_stage("decode", speech_rich_windows, buffer, windows)
+            language, confidence = await _detect_language(buffer, sample, model_name)
+            logger.info(f"Selected language: {language} (confidence: {confidence:.3f})")
+            if confidence < LANGUAGE_CONFIDENCE_THRESHOLD:
+                logger.warning(f"Low language detection confidence ({confidence:.3f})")
+            if on_language:
+                on_language(language, confidence)
+        async for batch, words in _decode_windows(buffer, windows, language, sample_rate, buffer_offset, model_name, config):
+            cues = segmenter.push(words)
+            if exhausted and batch[-1] == windows[-1]:
+                # 스트림 끝: 보류한 단어/자막을 모두 내보냄
+                cues += segmenter.flush()
+            subtitles = _to_subtitles(cues, next_id)
+            next_id += len(subtitles)
+            yield subtitles, _committed(segmenter, (buffer_offset + batch[-1][1]) / sample_rate)
+        buffer = buffer[consumed:]
+        buffer_offset += consumed
+        logger.info(f"Transcribed up to {buffer_offset / sample_rate:.2f}s ({next_id} subtitles)")
+        if not windows:
+            subtitles = _to_subtitles(segmenter.flush(), next_id) if exhausted else []
+            next_id += len(subtitles)
+            yield subtitles, _committed(segmenter, buffer_offset / sample_rate)
+
+async def _array_blocks(audio_array, block_samples):
+    for start in range(0, len(audio_array), block_samples):
+        yield audio_array[start:start + block_samples]
+
+async def transcribe_audio(audio_array: np.ndarray, sample_rate: int, model_name: str = DEFAULT_MODEL,
+                           config: Optional[DecodingConfig] = None) -> Optional[List[Subtitle]]:
     try:
         logger.info(f"Input audio shape: {audio_array.shape}, dtype: {audio_array.dtype}")
         logger.info(f"Sample rate: {sample_rate}")
         logger.info(f"Audio duration: {len(audio_array)/sample_rate:.2f} seconds")
-        if np.max(np.abs(audio_array)) > 1.0:
-            logger.warning("Audio values outside [-1, 1] range, normalizing...")
-            audio_array = audio_array / np.max(np.abs(audio_array))
-        if sample_rate != 16000:
-            logger.info(f"Resampling audio from {sample_rate}Hz to 16000Hz")
-            import librosa
-            audio_array = librosa.resample(
-                audio_array, 
-                orig_sr=sample_rate, 
-                target_sr=16000,
-                res_type='kaiser_best'
-            )
-            sample_rate = 16000
-        import scipy.signal as signal
-        audio_array = audio_array - np.mean(audio_array)
-        threshold = 0.01
-        audio_array[np.abs(audio_array) < threshold] = 0
-
-        CHUNK_SIZE = 16000 * 10  # 10초 단위
-        all_segments = []
-        for chunk_idx, start in enumerate(range(0, len(audio_array), CHUNK_SIZE)):
-            chunk = audio_array[start:start+CHUNK_SIZE]
-            chunk = np.asarray(chunk, dtype=np.float32).flatten()
-            duration_sec = chunk.shape[0] / sample_rate
-            min_val = np.min(chunk) if chunk.size > 0 else 0
-            max_val = np.max(chunk) if chunk.size > 0 else 0
-            logger.info(f"Chunk {chunk_idx} shape: {chunk.shape}, duration: {duration_sec:.2f}s, min: {min_val}, max: {max_val}")
-            if duration_sec < 1.0:
-                logger.warning(f"Chunk {chunk_idx} is too short or silent. Skipping.")
-                continue
-            if np.max(np.abs(chunk)) < 0.01:
-                logger.warning(f"Chunk {chunk_idx} is almost silent. Skipping.")
-                continue
-            logger.info(f"Processing chunk {chunk_idx}: samples {start}~{start+len(chunk)}, duration: {duration_sec:.2f} seconds")
-            try:
-                mel = whisper.log_mel_spectrogram(chunk).to(model.device)
-                _, probs = model.detect_language(mel)
-                sorted_probs = sorted(probs.items(), key=lambda x: x[1], reverse=True)
-                detected_language = sorted_probs[0][0]
-                confidence = sorted_probs[0][1]
-                logger.info(f"Selected language: {detected_language} (confidence: {confidence:.3f})")
-                if confidence < 0.6:
-                    logger.warning(f"Low language detection confidence ({confidence:.3f})")
-                logger.info(f"Transcribing chunk {chunk_idx} with Whisper...")
-                result = model.transcribe(
-                    chunk,
-                    language=detected_language,
-                    beam_size=7,
-                    temperature=0.1,
-                    condition_on_previous_text=True
-                )
-                if not result["segments"]:
-                    logger.warning(f"No segments generated in chunk {chunk_idx}")
-                    continue
-                for segment in result["segments"]:
-                    segment["start"] += start / sample_rate
-                    segment["end"] += start / sample_rate
-                    all_segments.append(segment)
-                    logger.info(f"[Whisper] chunk {chunk_idx} subtitle: {segment['text'].strip()} ({segment['start']:.2f}~{segment['end']:.2f}s)")
-            except Exception as e:
-                logger.error(f"Whisper transcription error in chunk {chunk_idx}: {e}")
-                continue
-        if not all_segments:
-            logger.warning("No segments generated in any chunk.")
+        if sample_rate != SAMPLE_RATE:
+            logger.info(f"Resampling audio from {sample_rate}Hz to {SAMPLE_RATE}Hz (polyphase, blockwise)")
+        subtitles = []
+        async for batch, _ in transcribe_stream(_array_blocks(audio_array, sample_rate * BLOCK_SECONDS), sample_rate, model_name, config):
+            subtitles.extend(batch)
+        if not subtitles:
+            logger.warning("No segments generated in any window.")
             return None
-        subtitles = [
-            Subtitle(
-                id=str(i),
-                startTime=seg["start"],
-                endTime=seg["end"],
-                text=seg["text"].strip()
-            )
-            for i, seg in enumerate(all_segments)
-        ]
-        for i, subtitle in enumerate(subtitles):
-            logger.info(f"Generated subtitle {i}: {subtitle.text}")
+        logger.info(f"Generated {len(subtitles)} subtitles")
         return subtitles
     except Exception as e:
         logger.error(f"자막 생성 중 오류 발생: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
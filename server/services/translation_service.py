@@ -1,56 +1,221 @@
+import asyncio
+import hashlib
 import logging
+import sqlite3
+import threading
+import time
 import httpx
-from typing import List, Optional
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
 from models.video import Subtitle
+from services.job_service import run_in_stage
 import os
 
 logger = logging.getLogger(__name__)
 
+TRANSLATION_BACKEND = os.getenv("LIVESUB_TRANSLATION_BACKEND", "google")  # google | http
+TRANSLATION_URL = os.getenv("LIVESUB_TRANSLATION_URL", "http://127.0.0.1:5000")
+TRANSLATION_MEMORY_PATH = os.getenv(
+    "LIVESUB_TRANSLATION_MEMORY", os.path.join(os.path.dirname(__file__), "..", "translation_memory.db")
+)
+MAX_CONCURRENT_REQUESTS = 4
+REQUESTS_PER_SECOND = 10
+
+class TranslationBackend(ABC):
+    """번역 백엔드 인터페이스. 한 요청에 보낼 수 있는 분량은 max_segments/max_chars로 제한합니다."""
+    max_segments = 128
+    max_chars = 5000
+
+    @abstractmethod
+    async def translate(self, texts: List[str], target_language: str) -> List[str]: ...
+
+    async def aclose(self):
+        pass
+
+class GoogleTranslateBackend(TranslationBackend):
+    """Google Cloud Translation API v2 백엔드 (연결을 재사용하는 클라이언트 하나를 유지)."""
+    url = "https://translation.googleapis.com/language/translate/v2"
+
+    def __init__(self, api_key: Optional[str] = None):
+        # API 키는 환경 변수에서 가져옴
+        self.api_key = api_key or os.getenv("GOOGLE_TRANSLATE_API_KEY")
+        if not self.api_key:
+            raise ValueError("Google Translate API key not found")
+        self.client = httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_keepalive_connections=MAX_CONCURRENT_REQUESTS))
+
+    async def translate(self, texts: List[str], target_language: str) -> List[str]:
+        # q를 쿼리 파라미터가 아닌 본문으로 보내 URL 길이 제한을 피함
+        response = await self.client.post(
+            self.url,
+            params={"key": self.api_key},
+            json={"q": texts, "target": target_language, "format": "text"}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Translation API error: {response.text}")
+        return [t["translatedText"] for t in response.json()["data"]["translations"]]
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class HttpTranslationBackend(TranslationBackend):
+    """LibreTranslate 호환 서버 백엔드. 오프라인 로컬 모델 서버나 테스트용 스텁 서버에 사용합니다."""
+
+    def __init__(self, base_url: str = TRANSLATION_URL):
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=60.0)
+
+    async def translate(self, texts: List[str], target_language: str) -> List[str]:
+        response = await self.client.post(
+            "/translate",
+            json={"q": texts, "source": "auto", "target": target_language, "format": "text"}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Translation server error: {response.text}")
+        return response.json()["translatedText"]
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class RateLimiter:
+    """초당 요청 수와 동시 요청 수를 제한합니다."""
+
+    def __init__(self, rate: float = REQUESTS_PER_SECOND, concurrency: int = MAX_CONCURRENT_REQUESTS):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
+
+class TranslationMemory:
+    """(텍스트, 대상 언어) 단위 번역 결과를 SQLite에 저장해 영상 간에 재사용합니다."""
+
+    def __init__(self, path: str = TRANSLATION_MEMORY_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    text_hash TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    translated TEXT NOT NULL,
+                    PRIMARY KEY (text_hash, language)
+                )
+            """)
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str], language: str) -> Dict[str, str]:
+        hashes = {self._hash(text): text for text in texts}
+        found = {}
+        items = list(hashes)
+        with self._lock:
+            for i in range(0, len(items), 500):
+                chunk = items[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT text_hash, translated FROM translations WHERE language = ? AND text_hash IN ({placeholders})",
+                    (language, *chunk)
+                ).fetchall()
+                for text_hash, translated in rows:
+                    found[hashes[text_hash]] = translated
+        return found
+
+    def put_many(self, pairs: Dict[str, str], language: str):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?)",
+                [(self._hash(text), language, translated) for text, translated in pairs.items()]
+            )
+
+def chunk_texts(texts: List[str], max_segments: int, max_chars: int) -> List[List[str]]:
+    """요청 하나에 들어갈 수 있도록 세그먼트 수/문자 수 예산으로 나눕니다."""
+    chunks, current, chars = [], [], 0
+    for text in texts:
+        if current and (len(current) >= max_segments or chars + len(text) > max_chars):
+            chunks.append(current)
+            current, chars = [], 0
+        current.append(text)
+        chars += len(text)
+    if current:
+        chunks.append(current)
+    return chunks
+
+_backend: Optional[TranslationBackend] = None
+_memory: Optional[TranslationMemory] = None
+_limiter: Optional[RateLimiter] = None
+
+def get_backend() -> TranslationBackend:
+    global _backend
+    if _backend is None:
+        _backend = HttpTranslationBackend() if TRANSLATION_BACKEND == "http" else GoogleTranslateBackend()
+    return _backend
+
+def set_backend(backend: TranslationBackend):
+    """백엔드를 교체합니다 (로컬 모델, 테스트용 스텁 등)."""
+    global _backend
+    _backend = backend
+
+def get_memory() -> TranslationMemory:
+    global _memory
+    if _memory is None:
+        _memory = TranslationMemory()
+    return _memory
+
+async def close_translation_backend():
+    global _backend
+    if _backend is not None:
+        await _backend.aclose()
+        _backend = None
+
+async def _translate_chunk(backend: TranslationBackend, chunk: List[str], target_language: str) -> Dict[str, str]:
+    async with _limiter:
+        translations = await backend.translate(chunk, target_language)
+    return dict(zip(chunk, translations))
+
 async def translate_subtitles(subtitles: List[Subtitle], target_language: str) -> Optional[List[Subtitle]]:
     """자막을 대상 언어로 번역합니다."""
+    global _limiter
     try:
-        # Google Cloud Translation API 엔드포인트
-        url = "https://translation.googleapis.com/language/translate/v2"
-        
-        # API 키는 환경 변수에서 가져옴
-        api_key = os.getenv("GOOGLE_TRANSLATE_API_KEY")
-        if not api_key:
-            raise ValueError("Google Translate API key not found")
-        
-        # 번역할 텍스트 추출
-        texts = [sub.text for sub in subtitles]
-        
-        # API 요청
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                params={
-                    "key": api_key,
-                    "q": texts,
-                    "target": target_language
-                }
+        backend = get_backend()
+        memory = get_memory()
+        if _limiter is None:
+            _limiter = RateLimiter()
+
+        # 중복 제거 후 번역 메모리에 없는 텍스트만 요청
+        texts = list(dict.fromkeys(sub.text for sub in subtitles))
+        translated = await run_in_stage("translate", memory.get_many, texts, target_language)
+        missing = [text for text in texts if text not in translated]
+        logger.info(f"Translating {len(missing)}/{len(texts)} texts to {target_language} (memory hits: {len(translated)})")
+        if missing:
+            chunks = chunk_texts(missing, backend.max_segments, backend.max_chars)
+            results = await asyncio.gather(*(_translate_chunk(backend, chunk, target_language) for chunk in chunks))
+            fresh = {text: result for chunk_result in results for text, result in chunk_result.items()}
+            await run_in_stage("translate", memory.put_many, fresh, target_language)
+            translated.update(fresh)
+
+        # 번역된 자막 생성
+        return [
+            Subtitle(
+                id=f"{subtitle.id}_translated",
+                startTime=subtitle.startTime,
+                endTime=subtitle.endTime,
+                text=translated[subtitle.text]
             )
-            
-            if response.status_code != 200:
-                raise Exception(f"Translation API error: {response.text}")
-            
-            # 응답 파싱
-            result = response.json()
-            translations = result["data"]["translations"]
-            
-            # 번역된 자막 생성
-            translated_subtitles = []
-            for i, (subtitle, translation) in enumerate(zip(subtitles, translations)):
-                translated_subtitle = Subtitle(
-                    id=f"{subtitle.id}_translated",
-                    startTime=subtitle.startTime,
-                    endTime=subtitle.endTime,
-                    text=translation["translatedText"]
-                )
-                translated_subtitles.append(translated_subtitle)
-            
-            return translated_subtitles
-            
+            for subtitle in subtitles
+        ]
+
     except Exception as e:
         logger.error(f"자막 번역 중 오류 발생: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
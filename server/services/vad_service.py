@@ -0,0 +1,102 @@
+import logging
+from typing import Optional
+import numpy as np
+import webrtcvad
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRAME_MS = 30
+# energy_threshold를 주면 이 RMS(정규화 값) 미만의 프레임은 webrtcvad 호출 없이 무음 처리 (-60dBFS).
+# webrtcvad의 행오버/잡음 적응 상태가 달라져 마스크가 바뀌므로 기본값은 0(끔)
+ENERGY_THRESHOLD = 1e-3
+_ENERGY_BLOCK_FRAMES = 4096
+
+def create_vad(mode: int = 3) -> webrtcvad.Vad:
+    """스트림 하나에서 쓸 webrtcvad.Vad를 만듭니다.
+
+    Vad는 이전 프레임으로 잡음 모델과 행오버 상태를 갱신하므로 스트림 사이에 공유하면 결과가
+    호출 순서에 따라 달라집니다. 만드는 비용은 작습니다.
+    """
+    return webrtcvad.Vad(mode)
+
+def to_pcm16(audio_array: np.ndarray) -> np.ndarray:
+    """float 오디오를 16bit PCM 배열로 한 번만 변환합니다. int16 입력은 그대로 반환합니다."""
+    if audio_array.dtype == np.int16:
+        return np.ascontiguousarray(audio_array)
+    return (audio_array * 32767).astype(np.int16)
+
+def frame_view(pcm: np.ndarray, frame_len: int) -> np.ndarray:
+    """PCM 배열을 복사 없이 (프레임 수, frame_len) 형태로 봅니다. 남는 샘플은 버립니다."""
+    n_frames = len(pcm) // frame_len
+    return pcm[:n_frames * frame_len].reshape(n_frames, frame_len)
+
+def frame_energy(frames: np.ndarray) -> np.ndarray:
+    """프레임별 RMS를 [0, 1] 범위로 계산합니다. 블록 단위로 처리해 전체 복사를 피합니다."""
+    energy = np.empty(len(frames), dtype=np.float32)
+    for i in range(0, len(frames), _ENERGY_BLOCK_FRAMES):
+        block = frames[i:i + _ENERGY_BLOCK_FRAMES].astype(np.float32)
+        energy[i:i + len(block)] = np.sqrt(np.mean(block * block, axis=1)) / 32768.0
+    return energy
+
+def speech_mask(pcm: np.ndarray, sample_rate: int, mode: int = 3,
+                frame_duration_ms: int = DEFAULT_FRAME_MS,
+                energy_threshold: float = 0.0, vad: Optional[webrtcvad.Vad] = None) -> np.ndarray:
+    """프레임별 발화 여부를 bool 배열로 반환합니다.
+
+    vad를 주지 않으면 호출마다 새 Vad를 씁니다. 여러 번 나눠 넣는 스트림은 같은 vad를 넘깁니다.
+    """
+    frame_len = int(sample_rate * frame_duration_ms / 1000)
+    frames = frame_view(pcm, frame_len)
+    mask = np.zeros(len(frames), dtype=bool)
+    if not len(frames):
+        return mask
+    if energy_threshold > 0:
+        candidates = np.flatnonzero(frame_energy(frames) >= energy_threshold)
+    else:
+        candidates = range(len(frames))
+    # 프레임마다 bytes를 새로 만들지 않고 memoryview 슬라이스를 넘김
+    buf = memoryview(frames).cast("B")
+    frame_bytes = frame_len * 2
+    is_speech = (vad or create_vad(mode)).is_speech
+    for i in candidates:
+        offset = i * frame_bytes
+        mask[i] = is_speech(buf[offset:offset + frame_bytes], sample_rate)
+    return mask
+
+def mask_to_intervals(mask: np.ndarray, frame_len: int, total_samples: int,
+                      padding_frames: int = 0, min_gap_frames: int = 0) -> np.ndarray:
+    """프레임 마스크를 (start_sample, end_sample) 구간 배열로 변환합니다."""
+    if padding_frames > 0:
+        # 행오버: 발화 프레임 앞뒤로 padding_frames 만큼 확장
+        # (mode="same"은 마스크가 커널보다 짧으면 커널 길이로 나와 위치가 밀리므로 full에서 직접 자름)
+        kernel = np.ones(2 * padding_frames + 1, dtype=np.int32)
+        full = np.convolve(mask.astype(np.int32), kernel, mode="full")
+        mask = full[padding_frames:padding_frames + len(mask)] > 0
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if min_gap_frames > 0 and len(starts) > 1:
+        keep = (starts[1:] - ends[:-1]) >= min_gap_frames
+        starts = np.concatenate((starts[:1], starts[1:][keep]))
+        ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+    intervals = np.stack((starts, ends), axis=1).astype(np.int64) * frame_len
+    # 마지막 프레임까지 발화가 이어지면 남은 샘플까지 포함
+    if len(intervals) and ends[-1] == len(mask):
+        intervals[-1, 1] = total_samples
+    np.minimum(intervals, total_samples, out=intervals)
+    return intervals
+
+def speech_intervals(audio_array: np.ndarray, sample_rate: int, mode: int = 3,
+                     frame_duration_ms: int = DEFAULT_FRAME_MS, padding_ms: int = 0,
+                     min_gap_ms: int = 0, energy_threshold: float = 0.0) -> np.ndarray:
+    """발화 구간을 (N, 2) int64 샘플 오프셋 배열로 반환합니다."""
+    pcm = to_pcm16(audio_array)
+    frame_len = int(sample_rate * frame_duration_ms / 1000)
+    mask = speech_mask(pcm, sample_rate, mode, frame_duration_ms, energy_threshold)
+    return mask_to_intervals(
+        mask,
+        frame_len,
+        len(pcm),
+        padding_frames=padding_ms // frame_duration_ms,
+        min_gap_frames=min_gap_ms // frame_duration_ms,
+    )
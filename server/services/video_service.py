@@ -1,89 +1,217 @@
+import asyncio
 import logging
-import yt_dlp
-import os
-import wave
-import numpy as np
+import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from models.video import Video, Subtitle
-from services.firebase_service import save_video_to_firebase, update_video_cache
-from services.websocket_service import broadcast_progress
-from services.transcription_service import transcribe_audio
+from services.firebase_service import (
+    save_video_to_firebase,
+    update_video_cache,
+    update_video_fields,
+    update_video_progress,
+    save_translations
+)
+from services.websocket_service import broadcast_progress, publish_subtitles, end_subtitle_stream
+from services.transcription_service import (
+    LANGUAGE_CONFIDENCE_THRESHOLD,
+    DecodingConfig,
+    transcribe_stream,
+    decoding_signature
+)
+from services.audio_service import peek_fingerprint
+from services.download_service import fetch_metadata, open_download
+from services.artifact_service import invalidate_subtitle_artifacts
+from services.cache_service import cache_key, transcription_cache
 from services.translation_service import translate_subtitles
+from services.job_service import run_in_stage
+from services.model_service import choose_model
+from services.checkpoint_service import checkpoint_store
+from services.metrics_service import AUDIO_SECONDS, REAL_TIME_FACTOR, stage_timer
 
 logger = logging.getLogger(__name__)
 
-async def process_video(video_id: str, youtube_url: str, target_langs: List[str]) -> Optional[Video]:
+async def _translate(subtitles: List[Subtitle], target_lang: str) -> Optional[List[Subtitle]]:
+    with stage_timer("translation"):
+        return await translate_subtitles(subtitles, target_lang)
+
+async def translate_all(video_id: str, subtitles: List[Subtitle], target_langs: List[str]):
+    """모든 대상 언어를 동시에 번역하고 저장합니다."""
+    if not target_langs:
+        return
+    results = await asyncio.gather(*(_translate(subtitles, lang) for lang in target_langs))
+    translations = {}
+    for lang, translated in zip(target_langs, results):
+        if translated:
+            translations[lang] = translated
+        else:
+            logger.error(f"Translation failed: {video_id} - {lang}")
+    await save_translations(video_id, translations)
+    invalidate_subtitle_artifacts(video_id)
+
+async def _complete_from_cache(video: Video, cached: dict, target_langs: List[str]) -> Video:
+    """캐시된 전사 결과로 비디오를 바로 완료 처리합니다."""
+    video.subtitles = [Subtitle.from_dict(sub) for sub in cached["subtitles"]]
+    video.detected_language = cached.get("detected_language")
+    video.progress = 100
+    video.status = 'completed'
+    await update_video_cache(video)
+    invalidate_subtitle_artifacts(video.id)
+    await broadcast_progress(video.id, 100)
+    await translate_all(video.id, video.subtitles, target_langs)
+    return video
+
+async def process_video(video_id: str, youtube_url: str, target_langs: List[str],
+                        quality: Optional[str] = None, decoding: Optional[Dict[str, Any]] = None) -> Optional[Video]:
     video = None
+    source = None
+    claimed_key = None
     try:
         logger.info(f"Start processing video: {video_id} {youtube_url}")
-        # 1. 유튜브 오디오 다운로드
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'wav',
-            }],
-            'outtmpl': f'temp/{video_id}.%(ext)s',
-            'noplaylist': True,
-            'quiet': False,
-            'nocheckcertificate': True,
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(youtube_url, download=True)
-            video = Video(
-                id=video_id,
-                title=info['title'],
-                description=info.get('description', ''),
-                youtubeUrl=youtube_url,
-                thumbnailUrl=info.get('thumbnail', ''),
-                uploadDate=datetime.now(),
-                duration=str(info.get('duration', 0)),
-                progress=0,
-                status='processing'
-            )
-            await save_video_to_firebase(video)
-            audio_path = f'temp/{video_id}.wav'
-            if not os.path.exists(audio_path):
-                raise Exception("Audio file not found")
-            with wave.open(audio_path, 'rb') as wf:
-                n_channels = wf.getnchannels()
-                frame_rate = wf.getframerate()
-                n_frames = wf.getnframes()
-                audio_data = wf.readframes(n_frames)
-                audio_array = np.frombuffer(audio_data, dtype=np.int16)
-                if n_channels == 2:
-                    audio_array = audio_array.reshape((-1, 2)).mean(axis=1)
-                # float32 변환 및 정규화
-                audio_array = audio_array.astype(np.float32) / 32768.0
-                logger.info(f"audio_array shape: {audio_array.shape}, dtype: {audio_array.dtype}, min: {audio_array.min()}, max: {audio_array.max()}")
-                logger.info(f"frame_rate: {frame_rate}")
-            video.progress = 50
-            await update_video_cache(video)
-            await broadcast_progress(video_id, 50)
-            # 2. Whisper로 자막 생성
-            logger.info("Transcribing audio with Whisper...")
-            subtitles = await transcribe_audio(audio_array, frame_rate)
-            logger.info(f"Whisper result: {subtitles}")
+        # 1. 메타데이터 조회 후 캐시 확인
+        with stage_timer("metadata"):
+            info = await run_in_stage("download", fetch_metadata, youtube_url)
+        # 품질 등급이 없으면 오디오 길이로 모델 크기를 고름
+        model_name = choose_model(quality, info.get('duration'))
+        config = DecodingConfig(**(decoding or {}))
+        params = decoding_signature(model_name, config)
+        key = cache_key("youtube", info['id'], params)
+        # 중단된 작업이면 마지막으로 끝난 윈도우부터 이어서 처리
+        checkpoint = checkpoint_store.load(video_id, key)
+        duration = float(info.get('duration') or 0)
+        video = Video(
+            id=video_id,
+            title=info['title'],
+            description=info.get('description', ''),
+            youtubeUrl=youtube_url,
+            thumbnailUrl=info.get('thumbnail', ''),
+            uploadDate=datetime.now(),
+            duration=str(info.get('duration', 0)),
+            progress=min(99, int(checkpoint.offset_seconds / duration * 100)) if checkpoint and duration else 0,
+            status='processing',
+            detected_language=checkpoint.language if checkpoint else None
+        )
+        await save_video_to_firebase(video)
+        cached = transcription_cache.get(key)
+        if cached is None:
+            pending = transcription_cache.inflight(key)
+            if pending is not None:
+                logger.info(f"Waiting for in-flight transcription of {info['id']}")
+                cached = await asyncio.shield(pending)
+        if cached:
+            logger.info(f"Transcription cache hit: {info['id']}")
+            checkpoint_store.delete(video_id)
+            return await _complete_from_cache(video, cached, target_langs)
+        transcription_cache.claim(key)
+        claimed_key = key
+
+        # 2. 가장 작은 적합한 오디오 포맷을 받으면서 바로 디코딩 (WAV 파일을 만들지 않음)
+        download_state = {"downloaded": 0, "total": None}
+
+        def report_download(downloaded: int, total: Optional[int]):
+            download_state.update(downloaded=downloaded, total=total)
+            asyncio.ensure_future(broadcast_progress(
+                video_id, video.progress, downloaded_bytes=downloaded, total_bytes=total))
+
+        source = await open_download(video_id, info, report_download)
+        fingerprint, blocks = await peek_fingerprint(source.blocks())
+        # 지문은 앞부분만 보므로 길이도 키에 넣음 (같은 인트로의 다른 회차, 결말이 다른 재업로드 구분).
+        # 길이를 모르면 오디오 키 캐시를 쓰지 않음
+        audio_key = cache_key("audio", fingerprint, {**params, "duration": round(duration)}) if duration else None
+        cached = transcription_cache.get(audio_key) if audio_key else None
+        if cached:
+            # 다른 ID로 올라온 같은 오디오 (남은 다운로드는 취소)
+            logger.info(f"Transcription cache hit by audio fingerprint: {fingerprint}")
+            source.close()
+            transcription_cache.put(key, cached)
+            transcription_cache.release(key, cached)
+            checkpoint_store.delete(video_id)
+            return await _complete_from_cache(video, cached, target_langs)
+
+        # 3. Whisper로 자막 생성 (윈도우 배치마다 구독자에게 바로 전송하고 체크포인트 기록)
+        if checkpoint:
+            subtitles = list(checkpoint.subtitles)
+            resume_at = checkpoint.offset_seconds
+            logger.info(f"Resuming {video_id} from {resume_at:.1f}s ({len(subtitles)} subtitles already done)")
             if subtitles:
-                video.subtitles = subtitles
-                video.progress = 100
-                video.status = 'completed'
-            else:
-                video.status = 'error'
-                logger.error("Whisper failed to generate subtitles.")
-            # 3. Firestore에 자막 저장
+                await publish_subtitles(video_id, [sub.to_dict() for sub in subtitles])
+        else:
+            subtitles = []
+            resume_at = 0.0
+            checkpoint_store.start(video_id, key)
+
+        # 같은 영상은 모델/디코딩 설정이 달라도 언어가 같으므로 이전에 감지한 언어를 재사용
+        language_key = cache_key("language", info['id'], {})
+        if video.detected_language is None:
+            memo = transcription_cache.get(language_key)
+            if memo:
+                video.detected_language = memo["language"]
+                logger.info(f"Using memoized language for {info['id']}: {memo['language']}")
+
+        def on_language(language: str, confidence: float):
+            video.detected_language = language
+            asyncio.ensure_future(update_video_fields(video_id, {"detected_language": language}))
+            if confidence >= LANGUAGE_CONFIDENCE_THRESHOLD:
+                transcription_cache.put(language_key, {"language": language, "confidence": confidence})
+
+        logger.info(f"Transcribing audio with Whisper ({model_name})...")
+        processed_seconds = resume_at
+        started = time.perf_counter()
+        async for batch, processed_seconds in transcribe_stream(
+                blocks, model_name=model_name, config=config, language=video.detected_language,
+                start_seconds=resume_at, first_id=len(subtitles), on_language=on_language):
+            checkpoint_store.append(video_id, batch, processed_seconds, video.detected_language)
+            if batch:
+                subtitles.extend(batch)
+                await publish_subtitles(video_id, [sub.to_dict() for sub in batch])
+            progress = min(99, int(processed_seconds / duration * 100)) if duration else 0
+            if progress != video.progress:
+                video.progress = progress
+                await broadcast_progress(video_id, progress, processed_seconds,
+                                         download_state["downloaded"], download_state["total"])
+                await update_video_progress(video_id, progress)
+        wall = time.perf_counter() - started
+        transcribed = processed_seconds - resume_at
+        logger.info(f"Whisper generated {len(subtitles)} subtitles ({transcribed:.0f}s audio in {wall:.0f}s)")
+        AUDIO_SECONDS.inc(transcribed, model=model_name)
+        if wall > 0 and transcribed > 0:
+            REAL_TIME_FACTOR.observe(transcribed / wall, model=model_name)
+        if subtitles:
+            video.subtitles = subtitles
+            video.progress = 100
+            video.status = 'completed'
+            entry = {
+                "youtubeId": info['id'],
+                "subtitles": [sub.to_dict() for sub in subtitles],
+                "detected_language": video.detected_language
+            }
+            transcription_cache.put(key, entry)
+            if audio_key:
+                transcription_cache.put(audio_key, entry)
+            transcription_cache.release(key, entry)
+        else:
+            video.status = 'error'
+            logger.error("Whisper failed to generate subtitles.")
+        # 4. Firestore에 자막 저장
+        with stage_timer("persist"):
             await update_video_cache(video)
-            await broadcast_progress(video_id, 100)
-            os.remove(audio_path)
-            return video
+        checkpoint_store.delete(video_id)
+        invalidate_subtitle_artifacts(video_id)
+        await broadcast_progress(video_id, 100)
+        end_subtitle_stream(video_id)
+        # 5. 대상 언어 번역
+        if subtitles:
+            await translate_all(video_id, subtitles, target_langs)
+        return video
     except Exception as e:
         logger.error(f"비디오 처리 중 오류 발생: {str(e)}")
         if video:
             video.status = 'error'
-            await update_video_cache(video)
-        return None 
\ No newline at end of file
+            await update_video_fields(video_id, {"status": "error"})
+        end_subtitle_stream(video_id)
+        return None
+    finally:
+        if source:
+            source.close()
+        if claimed_key:
+            # 실패한 경우 기다리던 요청은 직접 처리하도록 None 전달
+            transcription_cache.release(claimed_key)
@@ -1,64 +1,255 @@
 import logging
 import json
-from typing import Dict, Set
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, Hashable, List, Optional, Set, Tuple
 from fastapi import WebSocket
 from datetime import datetime
 import asyncio
+import time
+from services.metrics_service import WEBSOCKET_DROPPED, WEBSOCKET_FANOUT_SECONDS
 
 logger = logging.getLogger(__name__)
 
+ALL_TOPIC = "*"  # 특정 비디오를 구독하지 않은 클라이언트(목록 화면)가 받는 토픽
+OUTGOING_QUEUE_SIZE = 64
+
+RESYNC_MESSAGE = json.dumps({"type": "resync"})
+_RESYNC_KEY = "resync"
+
+class ClientConnection:
+    """연결별 송신 큐와 송신 태스크를 관리합니다.
+
+    같은 coalesce 키의 메시지는 큐에 남아 있는 이전 메시지를 최신 값으로 덮어씁니다.
+    큐가 가득 차면 최신 값으로 대체 가능한 메시지(coalesce 키가 있는 진행률/대기 순번 등)만
+    오래된 것부터 버립니다. 자막(subtitle_delta)처럼 버리면 안 되는 메시지만 남았다면 그 메시지들을
+    비우고 resync 메시지를 보내, 클라이언트가 비디오를 다시 읽고 구독해 스냅샷을 받도록 합니다.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int = OUTGOING_QUEUE_SIZE):
+        self.websocket = websocket
+        self.topics: Set[str] = {ALL_TOPIC}
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.resyncs = 0
+        # 키 -> (텍스트, 넣은 시각). coalesce 키가 없는 메시지는 int 키
+        self._queue: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._ids = count()
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._sender())
+
+    def _drop(self, key: Hashable):
+        del self._queue[key]
+        self.dropped += 1
+        WEBSOCKET_DROPPED.inc()
+
+    def _make_room(self, coalesce_key: Optional[Hashable]) -> bool:
+        """큐에 자리를 만듭니다. 새 메시지를 버려야 하면 False."""
+        while len(self._queue) >= self.queue_size:
+            droppable = next((key for key in self._queue
+                              if not isinstance(key, int) and key != _RESYNC_KEY), None)
+            if droppable is not None:
+                self._drop(droppable)
+            elif coalesce_key is not None:
+                # 자막만 쌓여 있으면 새 진행률 메시지를 버림
+                self.dropped += 1
+                WEBSOCKET_DROPPED.inc()
+                return False
+            else:
+                # 자막을 버려야 하는 상황: 대기 중인 자막을 비우고 다시 동기화하도록 알림
+                for key in list(self._queue):
+                    self._drop(key)
+                self._queue[_RESYNC_KEY] = (RESYNC_MESSAGE, time.perf_counter())
+                self.resyncs += 1
+                return False
+        return True
+
+    def enqueue(self, text: str, coalesce_key: Optional[Hashable] = None):
+        if coalesce_key is not None and coalesce_key in self._queue:
+            self._queue[coalesce_key] = (text, self._queue[coalesce_key][1])
+            return
+        if coalesce_key is None and _RESYNC_KEY in self._queue:
+            # 이미 다시 동기화할 예정이면 그 사이의 자막은 스냅샷에 포함됨
+            self.dropped += 1
+            WEBSOCKET_DROPPED.inc()
+            return
+        if self._make_room(coalesce_key):
+            self._queue[coalesce_key if coalesce_key is not None else next(self._ids)] = (text, time.perf_counter())
+        self._ready.set()
+
+    async def _sender(self):
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                while self._queue:
+                    _, (text, enqueued) = self._queue.popitem(last=False)
+                    await self.websocket.send_text(text)
+                    WEBSOCKET_FANOUT_SECONDS.observe(time.perf_counter() - enqueued)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending to client: {str(e)}")
+            broadcaster.unregister(self.websocket)
+
+    def close(self):
+        self._task.cancel()
+
+class Broadcaster:
+    """비디오별 토픽 구독과 비차단 팬아웃을 담당합니다."""
+
+    def __init__(self):
+        self.connections: Dict[WebSocket, ClientConnection] = {}
+        self.topics: Dict[str, Set[ClientConnection]] = {}
+
+    def register(self, websocket: WebSocket) -> ClientConnection:
+        connection = ClientConnection(websocket)
+        self.connections[websocket] = connection
+        self.topics.setdefault(ALL_TOPIC, set()).add(connection)
+        return connection
+
+    def unregister(self, websocket: WebSocket):
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        for topic in connection.topics:
+            self._discard(topic, connection)
+        connection.close()
+
+    def subscribe(self, connection: ClientConnection, topic: str):
+        # 첫 구독 시 전체 토픽에서 빠져 해당 비디오 메시지만 받음
+        if ALL_TOPIC in connection.topics and topic != ALL_TOPIC:
+            connection.topics.discard(ALL_TOPIC)
+            self._discard(ALL_TOPIC, connection)
+        connection.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, connection: ClientConnection, topic: str):
+        connection.topics.discard(topic)
+        self._discard(topic, connection)
+
+    def _discard(self, topic: str, connection: ClientConnection):
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.topics[topic]
+
+    def publish(self, topic: str, message: dict, coalesce_key: Optional[Hashable] = None) -> int:
+        """메시지를 한 번만 직렬화해 토픽 구독자와 전체 토픽 구독자의 큐에 넣습니다."""
+        text = json.dumps(message)
+        recipients = self.topics.get(topic, set()) | self.topics.get(ALL_TOPIC, set())
+        for connection in recipients:
+            connection.enqueue(text, coalesce_key)
+        return len(recipients)
+
+    def broadcast(self, message: dict, coalesce_key: Optional[Hashable] = None) -> int:
+        text = json.dumps(message)
+        for connection in list(self.connections.values()):
+            connection.enqueue(text, coalesce_key)
+        return len(self.connections)
+
+broadcaster = Broadcaster()
 # 연결된 클라이언트 관리
-connected_clients: Set[WebSocket] = set()
+connected_clients = broadcaster.connections
+# 처리 중인 비디오의 subtitle_delta 메시지 (늦게 구독한 클라이언트에게 재전송)
+subtitle_streams: Dict[str, List[dict]] = {}
+
+def _subtitle_snapshot(video_id: str) -> Optional[str]:
+    """지금까지의 subtitle_delta를 하나로 합친 메시지를 만듭니다."""
+    stream = subtitle_streams.get(video_id)
+    if not stream:
+        return None
+    return json.dumps({
+        "type": "subtitle_delta",
+        "videoId": video_id,
+        "seq": len(stream),
+        "subtitles": [sub for delta in stream for sub in delta["subtitles"]],
+        "timestamp": datetime.now().isoformat()
+    })
 
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket 연결을 처리합니다."""
     await websocket.accept()
-    connected_clients.add(websocket)
+    connection = broadcaster.register(websocket)
     try:
         while True:
             data = await websocket.receive_text()
             try:
                 message = json.loads(data)
                 if message.get("type") == "heartbeat":
-                    await websocket.send_json({"type": "heartbeat", "timestamp": datetime.now().isoformat()})
+                    connection.enqueue(json.dumps({"type": "heartbeat", "timestamp": datetime.now().isoformat()}), "heartbeat")
+                elif message.get("type") == "subscribe" and message.get("videoId"):
+                    video_id = message["videoId"]
+                    broadcaster.subscribe(connection, video_id)
+                    snapshot = _subtitle_snapshot(video_id)
+                    if snapshot:
+                        connection.enqueue(snapshot)
+                elif message.get("type") == "unsubscribe" and message.get("videoId"):
+                    broadcaster.unsubscribe(connection, message["videoId"])
             except json.JSONDecodeError:
                 logger.error("Invalid JSON received")
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
     finally:
-        connected_clients.remove(websocket)
+        broadcaster.unregister(websocket)
 
-async def broadcast_progress(video_id: str, progress: int):
-    """모든 연결된 클라이언트에게 진행 상황을 브로드캐스트합니다."""
+async def broadcast_progress(video_id: str, progress: int, processed_seconds: Optional[float] = None,
+                             downloaded_bytes: Optional[int] = None, total_bytes: Optional[int] = None):
+    """해당 비디오 구독자와 목록 화면 클라이언트에게 진행 상황(전사 진행률과 다운로드 바이트)을 전송합니다."""
     message = {
         "type": "progress",
         "videoId": video_id,
         "progress": progress,
         "timestamp": datetime.now().isoformat()
     }
-    for client in connected_clients.copy():
-        try:
-            if client.client_state.value == 1:  # WebSocketState.CONNECTED
-                await client.send_json(message)
-        except Exception as e:
-            logger.error(f"Error broadcasting to client: {str(e)}")
-            connected_clients.remove(client)
+    if processed_seconds is not None:
+        message["processedSeconds"] = round(processed_seconds, 2)
+    if downloaded_bytes is not None:
+        message["downloadedBytes"] = downloaded_bytes
+        if total_bytes:
+            message["totalBytes"] = total_bytes
+    # 아직 보내지 못한 이전 진행률은 최신 값으로 대체
+    broadcaster.publish(video_id, message, coalesce_key=("progress", video_id))
+
+def publish_queue_position(video_id: str, position: int, queued: int):
+    """대기 순번을 해당 비디오 구독자에게 전송합니다. position이 0이면 처리가 시작된 것입니다."""
+    message = {
+        "type": "queue",
+        "videoId": video_id,
+        "position": position,
+        "queued": queued,
+        "timestamp": datetime.now().isoformat()
+    }
+    broadcaster.publish(video_id, message, coalesce_key=("queue", video_id))
+
+async def publish_subtitles(video_id: str, subtitles: List[dict]):
+    """새로 생성된 자막을 해당 비디오 구독자에게 subtitle_delta로 전송합니다."""
+    stream = subtitle_streams.setdefault(video_id, [])
+    message = {
+        "type": "subtitle_delta",
+        "videoId": video_id,
+        "seq": len(stream) + 1,
+        "subtitles": subtitles,
+        "timestamp": datetime.now().isoformat()
+    }
+    stream.append(message)
+    text = json.dumps(message)
+    for connection in broadcaster.topics.get(video_id, set()):
+        connection.enqueue(text)
+
+def end_subtitle_stream(video_id: str):
+    """자막이 저장된 뒤 재전송용 메시지를 정리합니다."""
+    subtitle_streams.pop(video_id, None)
 
 async def send_heartbeat():
     """주기적으로 하트비트를 전송합니다."""
     while True:
         try:
-            message = {
+            broadcaster.broadcast({
                 "type": "heartbeat",
                 "timestamp": datetime.now().isoformat()
-            }
-            for client in connected_clients.copy():
-                try:
-                    if client.client_state.value == 1:  # WebSocketState.CONNECTED
-                        await client.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending heartbeat to client: {str(e)}")
-                    connected_clients.remove(client)
+            }, coalesce_key="heartbeat")
         except Exception as e:
             logger.error(f"Error in heartbeat loop: {str(e)}")
-        await asyncio.sleep(30)  # 30초마다 하트비트 전송 
\ No newline at end of file
+        await asyncio.sleep(30)  # 30초마다 하트비트 전송